@@ -10,8 +10,10 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.1/ref/settings/
 """
 
+import os
 from pathlib import Path
 from datetime import timedelta
+from importlib.util import find_spec
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -46,12 +48,14 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'main.middleware.MetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     "corsheaders.middleware.CorsMiddleware",
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'main.middleware.ProfilingMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -92,20 +96,40 @@ REST_FRAMEWORK = {
     'DEFAULT_SCHEMA_CLASS': 'drf_spectacular.openapi.AutoSchema',
 
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'main.api.auth.authentication.JWTAuthentication',
     ),
 
     'DEFAULT_PERMISSION_CLASSES': (
         'rest_framework.permissions.IsAuthenticated',   
     ),
     'DEFAULT_SCHEMA_CLASS': 'drf_spectacular.openapi.AutoSchema',
+
+    # JSON goes through orjson. MessagePack (Accept: application/msgpack)
+    # is offered when the msgpack package is installed.
+    'DEFAULT_RENDERER_CLASSES': [
+        'main.api.renderers.ORJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ] + (['main.api.renderers.MessagePackRenderer'] if find_spec('msgpack') else []),
+
+    'DEFAULT_PARSER_CLASSES': [
+        'main.api.parsers.ORJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ] + (['main.api.parsers.MessagePackParser'] if find_spec('msgpack') else []),
+}
+
+# Users resolved from access tokens are cached per process. TIMEOUT (seconds)
+# bounds how long other processes keep accepting a deactivated user.
+AUTH_USER_CACHE = {
+    "TIMEOUT": 60,
+    "MAX_SIZE": 10000,
 }
 
 SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': timedelta(days=1),  # Default: 5 minutes
     'REFRESH_TOKEN_LIFETIME': timedelta(days=3),    # Default: 1 day
-    'ROTATE_REFRESH_TOKENS': False,               # Recommended to set to True in production for security
-    'BLACKLIST_AFTER_ROTATION': True,             # Also good to set to True if rotating refresh tokens
+    'ROTATE_REFRESH_TOKENS': True,                # Rotated tokens are revoked in main.RevokedToken
+    'BLACKLIST_AFTER_ROTATION': False,            # simplejwt's token_blacklist app is not used, see main/api/auth/tokens.py
     'AUTH_HEADER_TYPES': ('Bearer',),                # Default is ('Bearer',) - Case-insensitive
     'AUTH_TOKEN_CLASSES': ('rest_framework_simplejwt.tokens.AccessToken',),
     'TOKEN_TYPE_CLAIM': 'token_type',              # Default is 'token_type'
@@ -115,6 +139,72 @@ SIMPLE_JWT = {
     # 'SLIDING_TOKEN_REFRESH_LIFETIME': timedelta(days=1),
 }
 
+# File-based so that every worker on the host sees the same cache versions
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': BASE_DIR / 'cache',
+    }
+}
+
+# Seconds a cached board, status or lead type response is kept
+API_CACHE_TIMEOUT = 300
+
+# Broker of the /api/board/<uuid>/events/ stream. The in-process broker only
+# reaches clients of the worker that made the write; with several workers use
+# "main.events.RedisBroker" with OPTIONS {"URL": "redis://..."}
+BOARD_EVENTS = {
+    "BACKEND": "main.events.InProcessBroker",
+    "OPTIONS": {},
+    # Seconds between keep-alive comments on idle streams
+    "KEEPALIVE": 25,
+}
+
+# Seconds a board funnel over days that are over is kept
+ANALYTICS_CACHE_TIMEOUT = 60 * 60 * 24
+
+# Lead history older than this many days is moved to the archive table by
+# `python manage.py archive_lead_history`
+LEAD_HISTORY_HOT_DAYS = 180
+
+# Overlap between consecutive /board/<uuid>/changes/ windows
+SYNC_TOKEN_OVERLAP = timedelta(seconds=5)
+
+# Per-view request metrics served at /api/metrics. With several workers set
+# MULTIPROCESS_DIR to a directory they share (emptied on restart) so the
+# endpoint reports the totals of all of them. The scraper must send TOKEN as
+# "Authorization: Bearer <token>" or be a staff user, unless PUBLIC is set.
+METRICS = {
+    "ENABLED": True,
+    "MULTIPROCESS_DIR": os.environ.get("METRICS_MULTIPROCESS_DIR"),
+    # Seconds between two writes of the totals of a worker
+    "FLUSH_INTERVAL": 5,
+    "TOKEN": os.environ.get("METRICS_TOKEN"),
+    "PUBLIC": os.environ.get("METRICS_PUBLIC", "0") == "1",
+}
+
+# Requests of staff users that send the HEADER header or the ?profile= flag
+# are profiled: a flame graph (collapsed stacks) and their SQL with stack
+# origins are written to DIRECTORY, the X-Profile-Id response header names
+# the files. Other requests are not slowed down. Off unless PROFILING_ENABLED=1
+# is set in the environment.
+PROFILING = {
+    "ENABLED": os.environ.get("PROFILING_ENABLED", "0") == "1",
+    "DIRECTORY": BASE_DIR / "profiles",
+    "HEADER": "X-Profile",
+    "QUERY_PARAM": "profile",
+    # Seconds between two stack samples
+    "INTERVAL": 0.005,
+}
+
+# Keep the denormalized LeadCard table in sync and serve lead listings from it.
+# Run `python manage.py rebuild_lead_cards` after turning it on.
+LEAD_CARDS_ENABLED = False
+
+# Country code and national number length used to normalize local phone numbers
+PHONE_DEFAULT_COUNTRY_CODE = "998"
+PHONE_NATIONAL_NUMBER_LENGTH = 9
+
 # CORS_ALLOWED_ORIGINS = ['http://192.168.1.110:8000']
 CORS_ALLOW_ALL_ORIGINS = True
 
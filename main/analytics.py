@@ -0,0 +1,201 @@
+"""
+Board funnel and time-in-stage analytics computed in SQL from LeadHistory.
+
+Every LeadHistory row is a lead entering a status (and lead type). A stay
+in a stage starts with the first row of a run of rows of the same status
+for a lead and ends with the first row of the next run. Runs are found
+with LAG and stays are closed with LEAD, both partitioned by lead. Medians
+and 90th percentiles are nearest-rank percentiles taken with ROW_NUMBER
+and COUNT windows, so the same statements run on SQLite and PostgreSQL.
+Only the per-stage and per-transition aggregates come back to Python.
+Ranges reaching past the archive horizon also read LeadHistoryArchive.
+
+Results are cached per board and day range. Ranges that ended before
+today no longer change and are kept for ANALYTICS_CACHE_TIMEOUT, ranges
+that include today for API_CACHE_TIMEOUT.
+"""
+from datetime import datetime, time, timedelta
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection
+from django.utils import timezone
+from main import archive, models
+
+# Seconds spent between the start and the end of a stay
+DURATION_SQL = {
+    "sqlite": "ROUND((julianday(left_at) - julianday(entered_at)) * 86400.0, 3)",
+    "postgresql": "EXTRACT(EPOCH FROM (left_at - entered_at))",
+    "mysql": "TIMESTAMPDIFF(MICROSECOND, entered_at, left_at) / 1000000.0",
+}
+PERCENTILES = (("median_seconds", 0.5), ("p90_seconds", 0.9))
+
+
+def _history_sql(start):
+    """
+    The history table, or the union of it and its archive when start is
+    past the archive horizon
+    """
+    history = models.LeadHistory._meta.db_table
+    if start >= archive.archive_horizon():
+        return history
+    columns = "id, lead_id, status_id, created_at, is_active"
+    return f"(SELECT {columns} FROM {history} UNION ALL SELECT {columns} FROM {models.LeadHistoryArchive._meta.db_table})"
+
+
+def _stays_sql(start):
+    """
+    Stays of the board's leads that started in [start, end): status, next
+    status and duration in seconds (NULL while the lead is still there)
+    """
+    history = _history_sql(start)
+    status = models.Status._meta.db_table
+    return f"""
+        WITH marked AS (
+            SELECT
+                history.id,
+                history.lead_id,
+                history.status_id,
+                history.created_at,
+                LAG(history.status_id) OVER (
+                    PARTITION BY history.lead_id ORDER BY history.created_at, history.id
+                ) AS previous_status_id
+            FROM {history} AS history
+            WHERE history.is_active
+                AND history.created_at >= %s
+                AND history.status_id IN (SELECT id FROM {status} WHERE board_id = %s)
+        ),
+        entries AS (
+            SELECT
+                lead_id,
+                status_id,
+                created_at AS entered_at,
+                LEAD(created_at) OVER (PARTITION BY lead_id ORDER BY created_at, id) AS left_at,
+                LEAD(status_id) OVER (PARTITION BY lead_id ORDER BY created_at, id) AS next_status_id
+            FROM marked
+            WHERE previous_status_id IS NULL OR previous_status_id <> status_id
+        ),
+        stays AS (
+            SELECT
+                lead_id,
+                status_id,
+                next_status_id,
+                {DURATION_SQL[connection.vendor]} AS seconds
+            FROM entries
+            WHERE entered_at < %s
+        )
+    """
+
+
+def _stage_rows(cursor, start, params):
+    percentile_columns = ",\n".join(
+        f"MIN(CASE WHEN seconds IS NOT NULL AND position >= {fraction} * completed THEN seconds END) AS {name}"
+        for name, fraction in PERCENTILES
+    )
+    cursor.execute(
+        _stays_sql(start) + f"""
+        , ranked AS (
+            SELECT
+                lead_id,
+                status_id,
+                next_status_id,
+                seconds,
+                ROW_NUMBER() OVER (
+                    PARTITION BY status_id ORDER BY CASE WHEN seconds IS NULL THEN 1 ELSE 0 END, seconds
+                ) AS position,
+                COUNT(seconds) OVER (PARTITION BY status_id) AS completed
+            FROM stays
+        )
+        SELECT
+            status_id,
+            COUNT(*) AS entered,
+            COUNT(DISTINCT lead_id) AS leads,
+            COUNT(next_status_id) AS exited,
+            {percentile_columns}
+        FROM ranked
+        GROUP BY status_id
+        """,
+        params,
+    )
+    columns = [column[0] for column in cursor.description]
+    return {row[0]: dict(zip(columns, row)) for row in cursor.fetchall()}
+
+
+def _transition_rows(cursor, start, params):
+    cursor.execute(
+        _stays_sql(start) + """
+        SELECT status_id, next_status_id, COUNT(*)
+        FROM stays
+        WHERE next_status_id IS NOT NULL
+        GROUP BY status_id, next_status_id
+        """,
+        params,
+    )
+    return cursor.fetchall()
+
+
+def board_funnel(board, date_from, date_to):
+    """
+    Funnel of a board for the stays that started between two dates
+    (both included): per status the stays, the leads, how many moved on,
+    how many moved to a later status, the conversion rate and the median
+    and 90th percentile time spent, plus the counts of every transition.
+    """
+    start = timezone.make_aware(datetime.combine(date_from, time.min))
+    end = timezone.make_aware(datetime.combine(date_to + timedelta(days=1), time.min))
+    params = [
+        connection.ops.adapt_datetimefield_value(start),
+        board.pk,
+        connection.ops.adapt_datetimefield_value(end),
+    ]
+    with connection.cursor() as cursor:
+        stages = _stage_rows(cursor, start, params)
+        transitions = _transition_rows(cursor, start, params)
+
+    statuses = list(models.Status.objects.filter(board=board).order_by("order", "created_at"))
+    positions = {status.pk: index for index, status in enumerate(statuses)}
+    forward = {}
+    for status_id, next_status_id, count in transitions:
+        if positions.get(next_status_id, -1) > positions.get(status_id, -1):
+            forward[status_id] = forward.get(status_id, 0) + count
+
+    by_id = {status.pk: status for status in statuses}
+    result = []
+    for status in statuses:
+        if not status.is_active and status.pk not in stages:
+            continue
+        row = stages.get(status.pk, {})
+        entered = row.get("entered", 0)
+        result.append({
+            "status": status.uuid,
+            "status_name": status.name,
+            "order": status.order,
+            "entered": entered,
+            "leads": row.get("leads", 0),
+            "exited": row.get("exited", 0),
+            "moved_forward": forward.get(status.pk, 0),
+            "conversion_rate": round(forward.get(status.pk, 0) / entered, 4) if entered else None,
+            **{name: row.get(name) for name, _ in PERCENTILES},
+        })
+    return {
+        "date_from": date_from,
+        "date_to": date_to,
+        "stages": result,
+        "transitions": [
+            {"from": by_id[status_id].uuid, "to": by_id[next_status_id].uuid, "count": count}
+            for status_id, next_status_id, count in transitions
+            if status_id in by_id and next_status_id in by_id
+        ],
+    }
+
+
+def cached_board_funnel(board, date_from, date_to):
+    key = f"analytics:funnel:{board.uuid}:{date_from.isoformat()}:{date_to.isoformat()}"
+    data = cache.get(key)
+    if data is None:
+        data = board_funnel(board, date_from, date_to)
+        if date_to < timezone.localdate():
+            timeout = settings.ANALYTICS_CACHE_TIMEOUT
+        else:
+            timeout = settings.API_CACHE_TIMEOUT
+        cache.set(key, data, timeout)
+    return data
@@ -0,0 +1,87 @@
+"""
+Refresh token rotation backed by main.RevokedToken.
+
+Rotating a refresh token inserts its JTI into RevokedToken. The JTI is the
+primary key, so the insert itself is the reuse check: a token presented
+twice, even by two concurrent requests, fails with an IntegrityError and no
+extra SELECT is needed. Revocations are permanent until the token expires,
+so every process remembers the JTIs it has seen revoked and rejects them
+again without touching the database.
+"""
+import threading
+from datetime import datetime, timezone as dt_timezone
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.settings import api_settings
+from main import models
+
+PRUNE_BATCH_SIZE = 5000
+REVOKED_CACHE_SIZE = 10000
+
+_revoked = {}
+_revoked_lock = threading.Lock()
+
+
+def _remember_revoked(jti, expires_at):
+    now = timezone.now()
+    with _revoked_lock:
+        if len(_revoked) >= REVOKED_CACHE_SIZE:
+            for expired in [key for key, value in _revoked.items() if value <= now]:
+                del _revoked[expired]
+            # Forgetting a JTI is safe: the primary key still rejects it
+            while len(_revoked) >= REVOKED_CACHE_SIZE:
+                del _revoked[next(iter(_revoked))]
+        _revoked[jti] = expires_at
+
+
+def _known_revoked(jti):
+    with _revoked_lock:
+        return jti in _revoked
+
+
+def revoke_token(token):
+    """
+    Revoke a refresh token. Raises TokenError when it already was.
+    """
+    jti = token[api_settings.JTI_CLAIM]
+    expires_at = datetime.fromtimestamp(token["exp"], tz=dt_timezone.utc)
+    if _known_revoked(jti):
+        raise TokenError("Token is blacklisted")
+    try:
+        with transaction.atomic():
+            models.RevokedToken.objects.create(jti=jti, expires_at=expires_at)
+    except IntegrityError:
+        _remember_revoked(jti, expires_at)
+        raise TokenError("Token is blacklisted")
+    _remember_revoked(jti, expires_at)
+
+
+def rotate_refresh_token(refresh):
+    """
+    Revoke a refresh token and turn it into a new one with a fresh JTI,
+    issue time and expiry
+    """
+    revoke_token(refresh)
+    refresh.set_jti()
+    refresh.set_exp()
+    refresh.set_iat()
+    return refresh
+
+
+def prune_revoked_tokens(batch_size=PRUNE_BATCH_SIZE):
+    """
+    Delete revoked tokens that have expired, batch_size rows per DELETE so
+    the table is never locked for long. Returns the number of rows deleted.
+    """
+    now = timezone.now()
+    deleted = 0
+    while True:
+        jtis = list(
+            models.RevokedToken.objects.filter(expires_at__lte=now)
+            .order_by("expires_at")
+            .values_list("jti", flat=True)[:batch_size]
+        )
+        if not jtis:
+            return deleted
+        deleted += models.RevokedToken.objects.filter(jti__in=jtis).delete()[0]
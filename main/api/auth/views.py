@@ -5,9 +5,10 @@ from rest_framework import status
 from rest_framework_simplejwt.tokens import RefreshToken
 from django.contrib.auth import authenticate
 from rest_framework_simplejwt.exceptions import TokenError
-from drf_spectacular.utils import extend_schema, OpenApiParameter, OpenApiExample, inline_serializer
+from drf_spectacular.utils import extend_schema, OpenApiExample, inline_serializer
 from rest_framework import serializers
-from main import models
+from rest_framework_simplejwt.settings import api_settings
+from .tokens import rotate_refresh_token
 
 
 @extend_schema(
@@ -111,6 +112,7 @@ def getTokensForUser(request):
     description="""
     Endpoint to obtain a new access token by providing a valid refresh token in the request body.
     The refresh token must be valid and not expired.
+    When refresh token rotation is on, a new refresh token is returned too and the one sent can not be used again.
     """,
     request=inline_serializer(  # Describe refresh token request body
         name='TokenRefreshRequestSerializer',
@@ -119,7 +121,10 @@ def getTokensForUser(request):
     responses={
         200: inline_serializer(  # Document successful 200 response
             name='TokenRefreshResponseSerializer',
-            fields={'access': serializers.CharField(help_text="New JWT access token")}
+            fields={
+                'access': serializers.CharField(help_text="New JWT access token"),
+                'refresh': serializers.CharField(required=False, help_text="New JWT refresh token, when rotation is on"),
+            }
         ),
         400: inline_serializer( # Document 400 (missing refresh token)
             name='TokenRefreshError400Serializer',
@@ -143,7 +148,7 @@ def getTokensForUser(request):
             description='Example of a successful refresh, providing a new access token.',
             response_only=True,
             status_codes=['200'],
-            value={'access': 'new_access_token_value...'}
+            value={'access': 'new_access_token_value...', 'refresh': 'new_refresh_token_value...'}
         ),
         OpenApiExample(
             name='Invalid Refresh Token Error', 
@@ -169,6 +174,12 @@ def refreshAccessToken(request):
 
     try:
         refresh = RefreshToken(refresh_token_value) 
+        if api_settings.ROTATE_REFRESH_TOKENS:
+            refresh = rotate_refresh_token(refresh)
+            return Response({
+                'access': str(refresh.access_token),
+                'refresh': str(refresh),
+                }, status=status.HTTP_200_OK)
         access_token = refresh.access_token  
         return Response({
             'access': str(access_token),
@@ -2,7 +2,35 @@ from rest_framework import serializers
 from main import models
 
 
-class BoardSerializer(serializers.ModelSerializer):
+class SparseFieldsMixin:
+    """
+    Serializer taking the `fields` to keep and the related fields to
+    `expand` into nested objects, as parsed from ?fields= and ?expand=.
+    expandable_fields maps a field name to the serializer class it expands to.
+    method_field_sources lists, per method field, the columns its method
+    reads, for sparse_queryset.
+    """
+    expandable_fields = {}
+    method_field_sources = {}
+
+    def __init__(self, *args, fields=None, expand=(), **kwargs):
+        super().__init__(*args, **kwargs)
+        for name in expand:
+            serializer_class = self.expandable_fields[name]
+            nested_fields = [
+                field_name for field_name, field in serializer_class().fields.items()
+                if not isinstance(field, serializers.SerializerMethodField)
+            ]
+            source = self.fields[name].source
+            self.fields[name] = serializer_class(
+                fields=nested_fields, read_only=True, **({"source": source} if source != name else {})
+            )
+        if fields is not None:
+            for name in set(self.fields) - set(fields) - set(expand):
+                self.fields.pop(name)
+
+
+class BoardSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = models.Board
         exclude = ["is_active", "id"]
@@ -10,45 +38,70 @@ class BoardSerializer(serializers.ModelSerializer):
 
 
 
-class StatusSerializer(serializers.ModelSerializer):
+class StatusSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     board = serializers.SlugRelatedField(slug_field="uuid", queryset=models.Board.objects.filter(is_active=True))
     board_name = serializers.CharField(source="board.name", read_only=True)
     leadtypes = serializers.SerializerMethodField(read_only=True)
 
+    expandable_fields = {"board": BoardSerializer}
+    # Prefetched lead types read status and status_name from the status they belong to
+    method_field_sources = {"leadtypes": ["uuid", "name"]}
+
     def get_leadtypes(self, obj):
+        if hasattr(obj, "active_leadtypes"):
+            return LeadTypeSerializer(obj.active_leadtypes, many=True).data
         leadtypes = models.LeadType.objects.filter(status=obj, is_active=True).order_by('order')
         return LeadTypeSerializer(leadtypes, many=True).data
 
     class Meta:
         model = models.Status
         exclude = ["is_active", "id"]
+        read_only_fields = ["lead_count"]
     
     
 
         
-class LeadTypeSerializer(serializers.ModelSerializer):
+class LeadTypeSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     status = serializers.SlugRelatedField(slug_field="uuid", queryset=models.Status.objects.filter(is_active=True))
     status_name = serializers.CharField(source="status.name", read_only=True)
+
+    expandable_fields = {"status": StatusSerializer}
     
     class Meta:
         model = models.LeadType
         exclude = ["is_active", "id"]
+        read_only_fields = ["lead_count"]
 
         
-class LeadSerializer(serializers.ModelSerializer):
+class LeadSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     type = serializers.SlugRelatedField(slug_field="uuid", queryset=models.LeadType.objects.filter(is_active=True))
     type_name = serializers.CharField(source="type.name", read_only=True)
 
+    expandable_fields = {"type": LeadTypeSerializer}
+
     class Meta:
         model = models.Lead
-        exclude = ["is_active", "id"]
+        exclude = ["is_active", "id", "phone_normalized"]
         
 
-class LeadHistorySerializer(serializers.ModelSerializer):
+class LeadCardSerializer(SparseFieldsMixin, serializers.ModelSerializer):
+    type = serializers.UUIDField(source="type_uuid", read_only=True)
+
+    class Meta:
+        model = models.LeadCard
+        fields = [
+            "uuid", "type", "type_name", "created_at", "updated_at", "title", "phone_number",
+            "gender", "birth_date", "description", "extra", "order",
+        ]
+
+
+class LeadHistorySerializer(SparseFieldsMixin, serializers.ModelSerializer):
     lead = serializers.SlugRelatedField(slug_field="uuid", queryset=models.Lead.objects.filter(is_active=True))
     lead_title = serializers.CharField(source="lead.title", read_only=True)
     status = serializers.SlugRelatedField(slug_field="uuid", queryset=models.Status.objects.filter(is_active=True))
     status_name = serializers.CharField(source="status.name", read_only=True)
+
+    expandable_fields = {"lead": LeadSerializer, "status": StatusSerializer, "lead_type": LeadTypeSerializer}
     
     class Meta:
         model = models.LeadHistory
@@ -57,4 +110,69 @@ class LeadHistorySerializer(serializers.ModelSerializer):
         
 
 
+class LeadTypeSnapshotSerializer(LeadTypeSerializer):
+    leads = LeadSerializer(source="active_leads", many=True, read_only=True)
+
+    class Meta(LeadTypeSerializer.Meta):
+        pass
+
+
+class StatusSnapshotSerializer(StatusSerializer):
+    leadtypes = LeadTypeSnapshotSerializer(source="active_leadtypes", many=True, read_only=True)
+
+    class Meta(StatusSerializer.Meta):
+        pass
+
+
+class BoardSnapshotSerializer(BoardSerializer):
+    statuses = StatusSnapshotSerializer(source="active_statuses", many=True, read_only=True)
+
+    class Meta(BoardSerializer.Meta):
+        pass
+
+
+class StatusChangeSerializer(StatusSerializer):
+    leadtypes = None
+
+    class Meta(StatusSerializer.Meta):
+        exclude = ["id"]
+
+
+class LeadTypeChangeSerializer(LeadTypeSerializer):
+    class Meta(LeadTypeSerializer.Meta):
+        exclude = ["id"]
+
+
+class LeadChangeSerializer(LeadSerializer):
+    class Meta(LeadSerializer.Meta):
+        exclude = ["id", "phone_normalized"]
+
+
+class LeadImportSerializer(serializers.ModelSerializer):
+    type = serializers.UUIDField()
+
+    class Meta:
+        model = models.Lead
+        fields = ["type", "title", "phone_number", "gender", "birth_date", "description", "extra", "order"]
+
+
+class OrderItemSerializer(serializers.Serializer):
+    uuid = serializers.UUIDField()
+    order = serializers.IntegerField()
+
+
+class ChangeOrderSerializer(serializers.Serializer):
+    model = serializers.ChoiceField(choices=["status", "leadtype", "lead"], default="status")
+    data = OrderItemSerializer(many=True, allow_empty=False)
+
+
+class MoveOrderSerializer(serializers.Serializer):
+    model = serializers.ChoiceField(choices=["status", "leadtype", "lead"])
+    uuid = serializers.UUIDField()
+    after = serializers.UUIDField(required=False, allow_null=True)
+
 
+class LeadMoveSerializer(serializers.Serializer):
+    uuid = serializers.UUIDField()
+    type = serializers.UUIDField()
+    position = serializers.IntegerField(min_value=0, default=0)
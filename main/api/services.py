@@ -0,0 +1,505 @@
+import csv
+import io
+import json
+from collections import Counter
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.db.models import Count, Q
+from django.utils import timezone
+from main import archive, models
+from main.api import serializers as my_serializers
+from main.api.utils import KeysetPagination
+from main.phones import normalize_phone
+
+
+LEAD_IMPORT_BATCH_SIZE = 1000
+LEAD_IMPORT_MAX_BATCH_SIZE = 5000
+LEAD_IMPORT_MAX_ERRORS = 1000
+LEAD_IMPORT_FORMATS = ("csv", "ndjson")
+ORDER_STEP = 1024
+ORDER_MODELS = {
+    "status": (models.Status, "board", "board__company_uuid"),
+    "leadtype": (models.LeadType, "status", "status__board__company_uuid"),
+    "lead": (models.Lead, "type", "type__status__board__company_uuid"),
+}
+LEAD_EXPORT_CHUNK_SIZE = 2000
+LEAD_EXPORT_FORMATS = ("csv", "ndjson")
+LEAD_EXPORT_FIELDS = (
+    ("uuid", "uuid"),
+    ("title", "title"),
+    ("phone_number", "phone_number"),
+    ("gender", "gender"),
+    ("birth_date", "birth_date"),
+    ("description", "description"),
+    ("extra", "extra"),
+    ("order", "order"),
+    ("created_at", "created_at"),
+    ("updated_at", "updated_at"),
+    ("type", "type__uuid"),
+    ("type_name", "type__name"),
+    ("status", "type__status__uuid"),
+    ("status_name", "type__status__name"),
+    ("board", "type__status__board__uuid"),
+)
+
+
+######################################
+# Lead import
+######################################
+
+
+class LeadImportError(ValueError):
+    """
+    The import file can not be read any further. report holds what was
+    imported from the rows before it.
+    """
+
+    def __init__(self, message, report=None):
+        super().__init__(message)
+        self.report = report
+
+
+def guess_import_format(filename):
+    """
+    Guess the import format from a file name
+    """
+    name = (filename or "").lower()
+    if name.endswith(".csv"):
+        return "csv"
+    if name.endswith((".ndjson", ".jsonl")):
+        return "ndjson"
+    return None
+
+
+def iter_csv_rows(stream):
+    """
+    Yield one dict per CSV line, read lazily from a binary stream
+    """
+    text = io.TextIOWrapper(stream, encoding="utf-8-sig", newline="")
+    reader = csv.DictReader(text)
+    try:
+        for row in reader:
+            row = {key: value for key, value in row.items() if key and value not in ("", None)}
+            if "extra" in row:
+                try:
+                    row["extra"] = json.loads(row["extra"])
+                except ValueError:
+                    pass
+            yield row
+    except UnicodeDecodeError:
+        raise LeadImportError("File is not UTF-8 encoded")
+    except csv.Error as exc:
+        raise LeadImportError(f"Malformed CSV near line {reader.line_num}: {exc}")
+
+
+def iter_ndjson_rows(stream):
+    """
+    Yield one dict per NDJSON line, read lazily from a binary stream.
+    Lines that are not valid JSON are yielded as None.
+    """
+    text = io.TextIOWrapper(stream, encoding="utf-8-sig")
+    try:
+        for line in text:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield json.loads(line)
+            except ValueError:
+                yield None
+    except UnicodeDecodeError:
+        raise LeadImportError("File is not UTF-8 encoded")
+
+
+def iter_import_rows(stream, file_format):
+    if file_format == "csv":
+        return iter_csv_rows(stream)
+    return iter_ndjson_rows(stream)
+
+
+def _add_import_error(report, row_number, errors):
+    report["failed"] += 1
+    if len(report["errors"]) < LEAD_IMPORT_MAX_ERRORS:
+        report["errors"].append({"row": row_number, "errors": errors})
+
+
+def _import_lead_batch(batch, company_uuid, report, skip_duplicates=False):
+    valid_rows = []
+    for row_number, row in batch:
+        if not isinstance(row, dict):
+            _add_import_error(report, row_number, {"non_field_errors": ["Row is not a valid JSON object."]})
+            continue
+        serializer = my_serializers.LeadImportSerializer(data=row)
+        if not serializer.is_valid():
+            _add_import_error(report, row_number, serializer.errors)
+            continue
+        valid_rows.append((row_number, serializer.validated_data))
+
+    type_uuids = {data["type"] for _, data in valid_rows}
+    lead_types = {
+        lead_type.uuid: lead_type
+        for lead_type in models.LeadType.objects.filter(
+            uuid__in=type_uuids, is_active=True, status__board__company_uuid=company_uuid
+        ).select_related("status")
+    }
+
+    leads = []
+    for row_number, data in valid_rows:
+        lead_type = lead_types.get(data.pop("type"))
+        if lead_type is None:
+            _add_import_error(report, row_number, {"type": ["Lead type not found."]})
+            continue
+        lead = models.Lead(type=lead_type, **data)
+        lead.phone_normalized = normalize_phone(lead.phone_number)
+        leads.append((row_number, lead))
+
+    existing = find_duplicate_leads(
+        (lead.type.status.board_id, lead.phone_normalized) for _, lead in leads
+    )
+    seen = set()
+    unique_leads = []
+    for row_number, lead in leads:
+        key = (lead.type.status.board_id, lead.phone_normalized)
+        if lead.phone_normalized and (key in existing or key in seen):
+            report["duplicates"] += 1
+            if skip_duplicates:
+                _add_import_error(report, row_number, {"phone_number": ["Duplicate of an active lead in this board."]})
+                continue
+        seen.add(key)
+        unique_leads.append(lead)
+    leads = unique_leads
+
+    created_per_type = Counter(lead.type_id for lead in leads)
+    with transaction.atomic():
+        models.Lead.objects.bulk_create(leads)
+        models.LeadHistory.objects.bulk_create(
+            models.LeadHistory(lead=lead, lead_type=lead.type, status=lead.type.status) for lead in leads
+        )
+        for lead_type_id, count in created_per_type.items():
+            models.change_lead_count(lead_type_id, count)
+        models.leads_changed(models.Lead.objects.filter(pk__in=[lead.pk for lead in leads]))
+    report["created"] += len(leads)
+
+
+def import_leads(rows, company_uuid, batch_size=LEAD_IMPORT_BATCH_SIZE, skip_duplicates=False):
+    """
+    Import leads in batches.
+    Lead types are resolved once per batch and each batch is written with
+    one bulk_create of its leads and one of their first history rows inside
+    its own transaction, so only one batch is held in memory at a time.
+    Rows whose phone number matches an active lead of the same board are
+    counted as duplicates, and skipped when skip_duplicates is set.
+    Raises LeadImportError when the file can not be decoded or parsed; the
+    batches before the one being read stay imported.
+    """
+    report = {"created": 0, "failed": 0, "duplicates": 0, "errors": []}
+    batch = []
+    try:
+        for row_number, row in enumerate(rows, start=1):
+            batch.append((row_number, row))
+            if len(batch) >= batch_size:
+                _import_lead_batch(batch, company_uuid, report, skip_duplicates)
+                batch = []
+    except LeadImportError as exc:
+        exc.report = report
+        raise
+    if batch:
+        _import_lead_batch(batch, company_uuid, report, skip_duplicates)
+    return report
+
+
+######################################
+# Duplicates
+######################################
+
+
+def find_duplicate_leads(keys):
+    """
+    Find active leads by (board id, normalized phone) with one indexed lookup.
+    Returns a dict mapping each matched key to the uuids of its leads.
+    """
+    keys = {(board_id, phone) for board_id, phone in keys if phone}
+    if not keys:
+        return {}
+    rows = models.Lead.objects.filter(
+        is_active=True,
+        phone_normalized__in={phone for _, phone in keys},
+        type__status__board_id__in={board_id for board_id, _ in keys},
+    ).values_list("type__status__board_id", "phone_normalized", "uuid")
+
+    duplicates = {}
+    for board_id, phone, uuid in rows:
+        if (board_id, phone) in keys:
+            duplicates.setdefault((board_id, phone), []).append(uuid)
+    return duplicates
+
+
+def find_lead_duplicates(lead_type, phone_number):
+    """
+    Return the uuids of active leads in the board of lead_type with the same phone number
+    """
+    phone = normalize_phone(phone_number)
+    if not phone:
+        return []
+    return list(
+        models.Lead.objects.filter(
+            is_active=True,
+            phone_normalized=phone,
+            type__status__board_id__in=models.Status.objects.filter(leadtypes=lead_type).values("board_id"),
+        ).values_list("uuid", flat=True)
+    )
+
+
+def merge_duplicate_leads(board_uuid=None, dry_run=False):
+    """
+    Merge active leads sharing a normalized phone number within a board.
+    Duplicates are grouped with one GROUP BY instead of comparing pairs.
+    The oldest lead of each group is kept: it takes over the hot and archived
+    histories and the history summaries of the others, fills its empty fields and extra keys from them, and the
+    others are deactivated.
+    Returns the number of groups found and of leads merged away.
+    """
+    leads = models.Lead.objects.filter(is_active=True, phone_normalized__isnull=False)
+    if board_uuid:
+        leads = leads.filter(type__status__board__uuid=board_uuid)
+    groups = list(
+        leads.order_by()
+        .values("type__status__board_id", "phone_normalized")
+        .annotate(count=Count("pk"))
+        .filter(count__gt=1)
+    )
+
+    merged = 0
+    for group in groups:
+        with transaction.atomic():
+            members = list(
+                models.Lead.objects.select_for_update().filter(
+                    is_active=True,
+                    phone_normalized=group["phone_normalized"],
+                    type__status__board_id=group["type__status__board_id"],
+                ).order_by("created_at", "pk")
+            )
+            if len(members) < 2:
+                continue
+            keeper, duplicates = members[0], members[1:]
+            merged += len(duplicates)
+            if dry_run:
+                continue
+
+            extra = {}
+            for duplicate in duplicates:
+                extra.update(duplicate.extra or {})
+                for field in ("gender", "birth_date"):
+                    if getattr(keeper, field) is None:
+                        setattr(keeper, field, getattr(duplicate, field))
+                if keeper.description in ("", "null"):
+                    keeper.description = duplicate.description
+            extra.update(keeper.extra or {})
+            keeper.extra = extra
+
+            archive.merge_lead_history(keeper, duplicates)
+            keeper.save()
+            models.deactivate(models.Lead.objects.filter(pk__in=[duplicate.pk for duplicate in duplicates]))
+    return len(groups), merged
+
+
+######################################
+# Lead export
+######################################
+
+
+class Echo:
+    """
+    File-like object whose write() returns the value, for csv.writer streaming
+    """
+    def write(self, value):
+        return value
+
+
+def iter_export_rows(queryset):
+    """
+    Yield one tuple per lead, fetched from the database in chunks
+    """
+    lookups = [lookup for _, lookup in LEAD_EXPORT_FIELDS]
+    return queryset.values_list(*lookups).iterator(chunk_size=LEAD_EXPORT_CHUNK_SIZE)
+
+
+def stream_leads_csv(queryset):
+    writer = csv.writer(Echo())
+    yield writer.writerow([name for name, _ in LEAD_EXPORT_FIELDS])
+    extra_index = [name for name, _ in LEAD_EXPORT_FIELDS].index("extra")
+    for row in iter_export_rows(queryset):
+        row = list(row)
+        row[extra_index] = json.dumps(row[extra_index]) if row[extra_index] is not None else ""
+        yield writer.writerow(row)
+
+
+def stream_leads_ndjson(queryset):
+    names = [name for name, _ in LEAD_EXPORT_FIELDS]
+    for row in iter_export_rows(queryset):
+        yield json.dumps(dict(zip(names, row)), cls=DjangoJSONEncoder) + "\n"
+
+
+######################################
+# Ordering
+######################################
+
+
+def bulk_change_order(model_name, items, company_uuid):
+    """
+    Set the order of many rows with one bulk_update in one transaction.
+    Returns the number of rows updated.
+    """
+    model, _, company_lookup = ORDER_MODELS[model_name]
+    orders = {item["uuid"]: item["order"] for item in items}
+    now = timezone.now()
+
+    with transaction.atomic():
+        rows = list(
+            model.objects.select_for_update().filter(uuid__in=orders.keys(), **{company_lookup: company_uuid})
+        )
+        for row in rows:
+            row.order = orders[row.uuid]
+            row.updated_at = now
+        model.objects.bulk_update(rows, ["order", "updated_at"])
+        if model is models.Lead:
+            models.leads_changed(models.Lead.objects.filter(pk__in=[row.pk for row in rows]), fields=["order"])
+        else:
+            models.invalidate_boards(
+                models.Board.objects.filter(**{models.BOARD_LOOKUPS[model] + "__in": [row.pk for row in rows]})
+            )
+    return len(rows)
+
+
+def _next_in_column(column, row, ordering):
+    """
+    Return the row right after `row` in `column` for the given ordering
+    """
+    keyset = KeysetPagination(ordering)
+    position = [getattr(row, field.lstrip("-")) for field in ordering]
+    return column.filter(keyset.get_keyset_filter(position)).order_by(*ordering).first()
+
+
+def _order_between(previous, following):
+    """
+    Order value between two neighbours (either may be None for a column
+    end), or None when there is no gap left between them
+    """
+    if previous is None and following is None:
+        return ORDER_STEP
+    if previous is None:
+        return following.order - ORDER_STEP
+    if following is None:
+        return previous.order + ORDER_STEP
+    if following.order - previous.order > 1:
+        return (previous.order + following.order) // 2
+    return None
+
+
+def _renumber_column(model, column, row, previous, ordering, now):
+    """
+    Respace a column by ORDER_STEP with row placed right after previous
+    and write the rows whose order changed. Returns the changed rows.
+    """
+    rows = list(column.select_for_update().order_by(*ordering))
+    index = rows.index(previous) + 1 if previous else 0
+    rows.insert(index, row)
+    changed = []
+    for position, item in enumerate(rows, start=1):
+        if item.order != position * ORDER_STEP:
+            item.order = position * ORDER_STEP
+            item.updated_at = now
+            changed.append(item)
+    model.objects.bulk_update(changed, ["order", "updated_at"])
+    return changed
+
+
+def move_after(model_name, uuid, after_uuid, company_uuid):
+    """
+    Move a row right after another row of the same column, or to the top
+    when after_uuid is None.
+    Ranks are spaced by ORDER_STEP, so a move normally writes only the
+    moved row with the midpoint of its new neighbours. The column is
+    renumbered only when there is no gap left between them.
+    """
+    model, parent_field, company_lookup = ORDER_MODELS[model_name]
+    ordering = ("order", "-created_at", "-id")
+    reverse_ordering = ("-order", "created_at", "id")
+
+    with transaction.atomic():
+        row = model.objects.select_for_update().get(uuid=uuid, is_active=True, **{company_lookup: company_uuid})
+        column = model.objects.filter(
+            is_active=True, **{parent_field: getattr(row, parent_field + "_id")}
+        ).exclude(pk=row.pk)
+
+        if after_uuid:
+            previous = column.get(uuid=after_uuid)
+            following = _next_in_column(column, previous, ordering)
+        else:
+            previous = None
+            following = column.order_by(*ordering).first()
+
+        new_order = _order_between(previous, following)
+        now = timezone.now()
+        if new_order is not None:
+            row.order = new_order
+            row.updated_at = now
+            model.objects.filter(pk=row.pk).update(order=new_order, updated_at=now)
+            if model is models.Lead:
+                models.leads_changed(models.Lead.objects.filter(pk=row.pk), fields=["order"])
+            else:
+                models.invalidate_boards(models.Board.objects.filter(**{models.BOARD_LOOKUPS[model]: row.pk}))
+            return row
+
+        changed = _renumber_column(model, column, row, previous, ordering, now)
+        if model is models.Lead:
+            models.leads_changed(models.Lead.objects.filter(pk__in=[item.pk for item in changed]), fields=["order"])
+        else:
+            models.invalidate_boards(models.Board.objects.filter(**{models.BOARD_LOOKUPS[model]: row.pk}))
+    return row
+
+
+def move_lead(uuid, type_uuid, position, company_uuid):
+    """
+    Move a lead to a lead type, at a 0-based position among its active leads.
+    The lead and the lead types it leaves and enters are locked for the
+    whole move, so concurrent drags into a column are applied one by one.
+    A LeadHistory row is written when the type changes. Like move_after it
+    normally writes only the moved lead, so the number of queries does not
+    depend on the size of the column.
+    """
+    ordering = ("order", "-created_at", "-id")
+    company_lookup = ORDER_MODELS["lead"][2]
+
+    with transaction.atomic():
+        lead = models.Lead.objects.select_for_update().get(uuid=uuid, is_active=True, **{company_lookup: company_uuid})
+        # Lock both columns in primary key order so crossing moves can not deadlock
+        lead_types = models.LeadType.objects.select_for_update(of=("self",)).filter(
+            Q(pk=lead.type_id) | Q(uuid=type_uuid, is_active=True, status__board__company_uuid=company_uuid)
+        ).select_related("status").order_by("pk")
+        lead_type = next((item for item in lead_types if item.uuid == type_uuid), None)
+        if lead_type is None:
+            raise models.LeadType.DoesNotExist("Lead type not found.")
+
+        column = models.Lead.objects.filter(is_active=True, type=lead_type).exclude(pk=lead.pk).order_by(*ordering)
+        if position > 0:
+            neighbours = list(column[position - 1:position + 1])
+            previous = neighbours[0] if neighbours else column.last()
+            following = neighbours[1] if len(neighbours) > 1 else None
+        else:
+            previous = None
+            following = column.first()
+
+        type_changed = lead.type_id != lead_type.pk
+        lead.type = lead_type
+        new_order = _order_between(previous, following)
+        if new_order is None:
+            changed = _renumber_column(models.Lead, column, lead, previous, ordering, timezone.now())
+            models.leads_changed(models.Lead.objects.filter(pk__in=[item.pk for item in changed]), fields=["order"])
+        else:
+            lead.order = new_order
+        lead.save(update_fields=["type", "order", "updated_at"])
+
+        if type_changed:
+            models.LeadHistory.objects.create(lead=lead, lead_type=lead_type, status=lead_type.status)
+    return lead
@@ -8,9 +8,20 @@ urlpatterns = [
     #status
     
     path('board/', views.BoardApiView.as_view(), name='board_url'),
+    path('board/<uuid:uuid>/snapshot/', views.BoardSnapshotApiView.as_view(), name='board_snapshot_url'),
+    path('board/<uuid:uuid>/changes/', views.BoardChangesApiView.as_view(), name='board_changes_url'),
+    path('board/<uuid:uuid>/analytics/', views.BoardAnalyticsApiView.as_view(), name='board_analytics_url'),
+    path('board/<uuid:uuid>/events/', views.BoardEventsView.as_view(), name='board_events_url'),
     path('status/', views.StatusApiView.as_view(), name='status_url'),
     path('lead-type/', views.LeadTypeApiView.as_view(), name='lead_type_url'),
     path('lead/', views.LeadApiView.as_view(), name='lead_url'),
+    path('lead/move/', views.LeadMoveApiView.as_view(), name='lead_move_url'),
+    path('lead/search/', views.LeadSearchApiView.as_view(), name='lead_search_url'),
+    path('lead/import/', views.LeadImportApiView.as_view(), name='lead_import_url'),
+    path('lead/export/', views.LeadExportApiView.as_view(), name='lead_export_url'),
     path('lead-history/', views.LeadHistoryApiView.as_view(), name='lead_history_url'),
+    path('change-order/', views.ChangeOrderApiView.as_view(), name='change_order_url'),
+    path('change-order/move/', views.MoveOrderApiView.as_view(), name='move_order_url'),
     path('clear/', views.ClearApiView.as_view(), name='clear_url'),
+    path('metrics', views.MetricsView.as_view(), name='metrics_url'),
 ]
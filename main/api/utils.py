@@ -1,5 +1,21 @@
+import binascii
+import hashlib
+import json
+from base64 import urlsafe_b64decode, urlsafe_b64encode
 from datetime import datetime
+from inspect import iscoroutinefunction
+from operator import attrgetter
+from urllib.parse import urlencode
+from asgiref.sync import sync_to_async
+from django.core.exceptions import ValidationError
+from django.db.models import Count, Max, Q
+from rest_framework.exceptions import APIException, NotFound, ValidationError as DRFValidationError
 from rest_framework.pagination import PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.serializers import BaseSerializer, SerializerMethodField, SlugRelatedField
+from rest_framework.views import APIView
+from rest_framework.utils.urls import replace_query_param
+from main import profiling
 
 
 class CustomPagination(PageNumberPagination):
@@ -10,3 +26,313 @@ class CustomPagination(PageNumberPagination):
 
 
 
+
+
+class AsyncAPIView(APIView):
+    """
+    APIView dispatched as a coroutine. Handlers may be async (run on the
+    event loop, using the async queryset API) or plain methods (run in a
+    worker thread, like any sync view under ASGI). Authentication classes
+    with an aauthenticate() coroutine are awaited instead of run in a thread.
+    """
+    view_is_async = True
+
+    async def dispatch(self, request, *args, **kwargs):
+        profiling.track_task()
+        self.args = args
+        self.kwargs = kwargs
+        request = self.initialize_request(request, *args, **kwargs)
+        self.request = request
+        self.headers = self.default_response_headers
+
+        try:
+            await self.aperform_authentication(request)
+            self.initial(request, *args, **kwargs)
+
+            if request.method.lower() in self.http_method_names:
+                handler = getattr(self, request.method.lower(), self.http_method_not_allowed)
+            else:
+                handler = self.http_method_not_allowed
+
+            if iscoroutinefunction(handler):
+                response = await handler(request, *args, **kwargs)
+            else:
+                response = await sync_to_async(handler)(request, *args, **kwargs)
+
+        except Exception as exc:
+            response = self.handle_exception(exc)
+
+        self.response = self.finalize_response(request, response, *args, **kwargs)
+        return self.response
+
+    async def aperform_authentication(self, request):
+        """
+        Resolve request.user up front, so initial() finds it already set
+        """
+        try:
+            for authenticator in request.authenticators:
+                if hasattr(authenticator, "aauthenticate"):
+                    user_auth_tuple = await authenticator.aauthenticate(request)
+                else:
+                    user_auth_tuple = await sync_to_async(authenticator.authenticate)(request)
+                if user_auth_tuple is not None:
+                    request._authenticator = authenticator
+                    request.user, request.auth = user_auth_tuple
+                    return
+        except APIException:
+            request._not_authenticated()
+            raise
+        request._not_authenticated()
+
+
+class KeysetPagination:
+    """
+    Cursor pagination over a composite ordering.
+    Pages are selected with a WHERE on the last seen row instead of OFFSET,
+    and no COUNT query is issued, so every page costs the same.
+    """
+    page_size = 10
+    page_size_query_param = 'page_size'
+    max_page_size = 200
+    cursor_query_param = 'cursor'
+    invalid_cursor_message = 'Invalid cursor'
+
+    def __init__(self, ordering):
+        self.ordering = ordering
+
+    def get_page_size(self, request):
+        try:
+            page_size = int(request.query_params.get(self.page_size_query_param, self.page_size))
+        except (TypeError, ValueError):
+            return self.page_size
+        if page_size <= 0:
+            return self.page_size
+        return min(page_size, self.max_page_size)
+
+    def encode_cursor(self, row):
+        position = []
+        for field in self.ordering:
+            value = getattr(row, field.lstrip('-'))
+            if isinstance(value, datetime):
+                value = value.isoformat()
+            position.append(value)
+        return urlsafe_b64encode(json.dumps(position).encode()).decode()
+
+    def decode_cursor(self, request):
+        cursor = request.query_params.get(self.cursor_query_param)
+        if not cursor:
+            return None
+        try:
+            position = json.loads(urlsafe_b64decode(cursor.encode()))
+        except (TypeError, ValueError, binascii.Error):
+            raise NotFound(self.invalid_cursor_message)
+        if not isinstance(position, list) or len(position) != len(self.ordering):
+            raise NotFound(self.invalid_cursor_message)
+        return position
+
+    def get_keyset_filter(self, position):
+        """
+        (a, b, c) after (x, y, z) is a > x OR (a = x AND b > y) OR (a = x AND b = y AND c > z),
+        with > flipped to < for descending fields.
+        """
+        condition = Q()
+        equal = Q()
+        for field, value in zip(self.ordering, position):
+            name = field.lstrip('-')
+            lookup = '__lt' if field.startswith('-') else '__gt'
+            condition |= equal & Q(**{name + lookup: value})
+            equal &= Q(**{name: value})
+        return condition
+
+    def get_page_queryset(self, queryset, request):
+        """
+        Slice of the rows after the cursor, one more than the page size
+        """
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        position = self.decode_cursor(request)
+
+        queryset = queryset.order_by(*self.ordering)
+        if position is not None:
+            try:
+                queryset = queryset.filter(self.get_keyset_filter(position))
+            except (TypeError, ValueError, ValidationError):
+                raise NotFound(self.invalid_cursor_message)
+        return queryset[:self.page_size + 1]
+
+    def paginate_queryset(self, queryset, request):
+        return self.paginate_rows(list(self.get_page_queryset(queryset, request)))
+
+    async def apaginate_queryset(self, queryset, request):
+        return self.paginate_rows([row async for row in self.get_page_queryset(queryset, request)])
+
+    async def apaginate_querysets(self, querysets, request):
+        """
+        Page through several querysets of rows sharing the ordering fields
+        as if they were one, e.g. a table and its archive
+        """
+        rows = []
+        for queryset in querysets:
+            rows += [row async for row in self.get_page_queryset(queryset, request)]
+        for field in reversed(self.ordering):
+            rows.sort(key=attrgetter(field.lstrip('-')), reverse=field.startswith('-'))
+        return self.paginate_rows(rows)
+
+    def paginate_rows(self, rows):
+        page_size = self.page_size
+        self.has_next = len(rows) > page_size
+        rows = rows[:page_size]
+        self.next_cursor = self.encode_cursor(rows[-1]) if self.has_next else None
+        return rows
+
+    def get_next_link(self):
+        if self.next_cursor is None:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, self.next_cursor)
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'results': data,
+        })
+
+
+def make_etag(request, *parts):
+    """
+    Build a weak ETag from the request path, user, query string and validator parts
+    """
+    query = urlencode(sorted(request.query_params.items()))
+    user_id = getattr(request.user, "id", None)
+    digest = hashlib.md5("|".join(str(part) for part in (request.path, user_id, query, *parts)).encode()).hexdigest()
+    return f'W/"{digest}"'
+
+
+def queryset_etag(request, queryset, *timestamp_fields):
+    """
+    ETag of a list response from one aggregate query: the row count and the
+    latest value of each timestamp field (updated_at of the rows and of
+    the related rows the serializer reads)
+    """
+    values = queryset.order_by().aggregate(**etag_aggregates(timestamp_fields))
+    return make_etag(request, *[values[key] for key in sorted(values)])
+
+
+async def aqueryset_etag(request, queryset, *timestamp_fields):
+    values = await queryset.order_by().aaggregate(**etag_aggregates(timestamp_fields))
+    return make_etag(request, *[values[key] for key in sorted(values)])
+
+
+def etag_aggregates(timestamp_fields):
+    aggregates = {"count": Count("pk")}
+    for index, field in enumerate(timestamp_fields):
+        aggregates[f"max_{index}"] = Max(field)
+    return aggregates
+
+
+def rows_etag(request, rows, *fields):
+    """
+    ETag of an already fetched page, from the given (dotted) attributes of its rows
+    """
+    getter = attrgetter(*fields)
+    return make_etag(request, *[getter(row) for row in rows])
+
+
+def etag_matches(request, etag):
+    """
+    Weak comparison of an ETag against the If-None-Match header
+    """
+    header = request.headers.get("If-None-Match")
+    if not header:
+        return False
+    tags = {tag.strip().removeprefix("W/") for tag in header.split(",")}
+    return "*" in tags or etag.removeprefix("W/") in tags
+
+
+def not_modified(etag):
+    return Response(status=304, headers={"ETag": etag})
+
+
+def encode_sync_token(moment):
+    return urlsafe_b64encode(moment.isoformat().encode()).decode()
+
+
+def decode_sync_token(token):
+    """
+    Return the datetime of a sync token, or None when it is invalid
+    """
+    try:
+        moment = datetime.fromisoformat(urlsafe_b64decode(token.encode()).decode())
+    except (TypeError, ValueError, binascii.Error, UnicodeDecodeError):
+        return None
+    if moment.tzinfo is None:
+        return None
+    return moment
+
+
+def _split_param(value):
+    return [name.strip() for name in (value or "").split(",") if name.strip()]
+
+
+def sparse_fields(request, serializer_class):
+    """
+    Parse ?fields= and ?expand= into serializer keyword arguments.
+    Unknown names are rejected with a 400.
+    """
+    fields = _split_param(request.query_params.get("fields"))
+    expand = _split_param(request.query_params.get("expand"))
+    known = serializer_class().fields
+    errors = {}
+    unknown_fields = [name for name in fields if name not in known]
+    if unknown_fields:
+        errors["fields"] = [f"Unknown field: {name}" for name in unknown_fields]
+    unknown_expand = [name for name in expand if name not in serializer_class.expandable_fields]
+    if unknown_expand:
+        errors["expand"] = [f"Field can not be expanded: {name}" for name in unknown_expand]
+    if errors:
+        raise DRFValidationError(errors)
+    return {"fields": fields or None, "expand": expand}
+
+
+def _collect_sources(serializer, prefix, only, related):
+    method_field_sources = getattr(serializer, "method_field_sources", {})
+    for name, field in serializer.fields.items():
+        if isinstance(field, SerializerMethodField):
+            only.update(prefix + source for source in method_field_sources.get(name, ()))
+            continue
+        if field.source == "*":
+            continue
+        source = prefix + field.source.replace(".", "__")
+        if isinstance(field, BaseSerializer):
+            related.add(source)
+            _collect_sources(field, source + "__", only, related)
+        elif isinstance(field, SlugRelatedField):
+            related.add(source)
+            only.add(f"{source}__{field.slug_field}")
+        else:
+            only.add(source)
+            if "__" in field.source.replace(".", "__"):
+                related.add(source.rsplit("__", 1)[0])
+
+
+def sparse_queryset(queryset, serializer, *extra_fields):
+    """
+    Load only the columns and joins the serializer reads, plus extra_fields
+    (ordering, cursors). Every joined row keeps its updated_at for ETags.
+    Returns the queryset and the joined relation paths.
+    """
+    only = set(extra_fields)
+    related = set()
+    _collect_sources(serializer, "", only, related)
+    only.update(f"{path}__updated_at" for path in related)
+    queryset = queryset.select_related(None)
+    if related:
+        queryset = queryset.select_related(*sorted(related))
+    return queryset.only(queryset.model._meta.pk.name, *sorted(only)), sorted(related)
+
+
+def related_etag_fields(related):
+    """
+    Dotted updated_at attributes of the relations joined by sparse_queryset, for rows_etag
+    """
+    return [path.replace("__", ".") + ".updated_at" for path in related]
@@ -1,3 +1,6 @@
+import hmac
+import json
+from django.conf import settings
 from django.shortcuts import render
 from rest_framework.views import APIView
 from rest_framework.response import Response
@@ -5,14 +8,47 @@ from main import models
 from . import serializers as my_serializers
 from rest_framework import serializers as rest_serializers
 from drf_spectacular.utils import extend_schema, OpenApiParameter,inline_serializer
-from main.api.utils import CustomPagination
+from main.api.utils import AsyncAPIView, CustomPagination, KeysetPagination, aqueryset_etag, decode_sync_token, encode_sync_token, etag_matches, make_etag, not_modified, related_etag_fields, rows_etag, sparse_fields, sparse_queryset
 from rest_framework import status
+from django.db import transaction
+from django.db.models import Prefetch, prefetch_related_objects
+from django.shortcuts import get_object_or_404
+from django.http import StreamingHttpResponse
+from django.utils.dateparse import parse_datetime, parse_date
+from django.utils import timezone
+from datetime import datetime, time, timedelta
+from rest_framework.parsers import MultiPartParser
+from rest_framework.utils.urls import replace_query_param
+from . import services
+from main import analytics, archive, caching, events, metrics, search
+from asgiref.sync import sync_to_async
+from django.http import HttpResponse, JsonResponse
+from django.views import View
+from rest_framework.exceptions import AuthenticationFailed
+from main.api.auth.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
+SPARSE_PARAMETERS = [
+    OpenApiParameter(
+        name="fields",
+        description="Comma separated fields to return, all by default",
+        required=False,
+        type=str
+    ),
+    OpenApiParameter(
+        name="expand",
+        description="Comma separated related fields to return as nested objects instead of UUIDs",
+        required=False,
+        type=str
+    ),
+]
+
+
 ######################################
 # Board
 ######################################
 
 
-class BoardApiView(APIView):
+class BoardApiView(AsyncAPIView):
 
     @extend_schema(
         request=my_serializers.BoardSerializer,
@@ -24,27 +60,33 @@ class BoardApiView(APIView):
                 required=False,
                 type=str
             ),
+            *SPARSE_PARAMETERS,
         ],
         summary="Get all boards",
         description="Get all boards",
         tags=["Board"],
     )
-    def get(self, request):
+    async def get(self, request):
         """
         Get all boards
         """
-        company_uuid = request.GET.get("company_uuid")
+        company_uuid = request.GET.get("company_uuid") or request.user.id
+        sparse = sparse_fields(request, my_serializers.BoardSerializer)
 
-        if company_uuid:
+        async def build():
             boards = models.Board.objects.filter(is_active=True, company_uuid = company_uuid).order_by('id')
-        else:
-            boards = models.Board.objects.filter(is_active=True, company_uuid = request.user.id).order_by('id')
+            boards, _ = sparse_queryset(boards, my_serializers.BoardSerializer(**sparse))
+            return my_serializers.BoardSerializer([board async for board in boards], many=True, **sparse).data
 
-        serializer = my_serializers.BoardSerializer(boards, many=True)
+        key = await caching.aresponse_key("boards", request, company=company_uuid)
+        etag = caching.key_etag(key)
+        if etag_matches(request, etag):
+            return not_modified(etag)
         return Response(
             {
-                "boards": serializer.data
-            }
+                "boards": await caching.acached_data(key, build)
+            },
+            headers={"ETag": etag}
         )
     
 
@@ -89,9 +131,9 @@ class BoardApiView(APIView):
         """
         Delete a board
         """
-        board = models.Board.objects.get(uuid=request.query_params.get("uuid"))
-        board.is_active = False
-        board.save()
+        deleted = models.deactivate(models.Board.objects.filter(uuid=request.query_params.get("uuid")))
+        if not deleted:
+            return Response({"message": "Board not found"}, status=status.HTTP_404_NOT_FOUND)
         return Response({"message": "Board deleted successfully"})
     
 
@@ -120,11 +162,262 @@ class BoardApiView(APIView):
         serializer.save()
         return Response(serializer.data)
 
+class BoardSnapshotApiView(APIView):
+
+    @extend_schema(
+        responses={200: my_serializers.BoardSnapshotSerializer},
+        summary="Get a board snapshot",
+        description="Get a board with its active statuses, lead types and leads nested in a fixed number of queries",
+        tags=["Board"],
+    )
+    def get(self, request, uuid):
+        """
+        Get a board snapshot
+        """
+        def build():
+            leads = models.Lead.objects.filter(is_active=True).order_by('order', '-created_at')
+            lead_types = models.LeadType.objects.filter(is_active=True).order_by('order', '-created_at').prefetch_related(
+                Prefetch('lead_set', queryset=leads, to_attr='active_leads')
+            )
+            statuses = models.Status.objects.filter(is_active=True).order_by('order', '-created_at').prefetch_related(
+                Prefetch('leadtypes', queryset=lead_types, to_attr='active_leadtypes')
+            )
+            boards = models.Board.objects.filter(is_active=True, company_uuid=request.user.id).prefetch_related(
+                Prefetch('status_set', queryset=statuses, to_attr='active_statuses')
+            )
+            board = get_object_or_404(boards, uuid=uuid)
+            return my_serializers.BoardSnapshotSerializer(board).data
+
+        key = caching.response_key("board-snapshot", request, board=uuid, company=request.user.id)
+        etag = caching.key_etag(key)
+        if etag_matches(request, etag):
+            return not_modified(etag)
+        return Response(
+            {
+                "board": caching.cached_data(key, build)
+            },
+            headers={"ETag": etag}
+        )
+
+def board_departures(board, since):
+    """
+    Uuids of the statuses, lead types and leads that moved off a board
+    since a moment, leaving out the ones that moved back onto it
+    """
+    departures = {}
+    for kind, uuid in models.BoardDeparture.objects.filter(board=board, departed_at__gt=since).values_list("kind", "uuid"):
+        departures.setdefault(kind, set()).add(uuid)
+    on_board = {
+        "status": models.Status.objects.filter(board=board),
+        "leadtype": models.LeadType.objects.filter(status__board=board),
+        "lead": models.Lead.objects.filter(type__status__board=board),
+    }
+    removed = {}
+    for kind, name in (("status", "statuses"), ("leadtype", "leadtypes"), ("lead", "leads")):
+        uuids = departures.get(kind, set())
+        if uuids:
+            uuids -= set(on_board[kind].filter(uuid__in=uuids).values_list("uuid", flat=True))
+        removed[name] = sorted(str(uuid) for uuid in uuids)
+    return removed
+
+
+class BoardChangesApiView(APIView):
+
+    @extend_schema(
+        responses={200: inline_serializer(
+            name="BoardChanges",
+            fields={
+                "statuses": my_serializers.StatusChangeSerializer(many=True),
+                "leadtypes": my_serializers.LeadTypeChangeSerializer(many=True),
+                "leads": my_serializers.LeadChangeSerializer(many=True),
+                "removed": inline_serializer(
+                    name="BoardRemovedRows",
+                    fields={
+                        "statuses": rest_serializers.ListField(child=rest_serializers.UUIDField()),
+                        "leadtypes": rest_serializers.ListField(child=rest_serializers.UUIDField()),
+                        "leads": rest_serializers.ListField(child=rest_serializers.UUIDField()),
+                    },
+                ),
+                "token": rest_serializers.CharField(),
+            },
+        )},
+        summary="Get board changes",
+        parameters=[
+            OpenApiParameter(
+                name="since",
+                description="Token returned by the previous call; omit it for a full sync",
+                required=False,
+                type=str
+            ),
+        ],
+        description=(
+            "Get statuses, lead types and leads of a board created, updated or deactivated since the token, "
+            "and the uuids of those moved to another board"
+        ),
+        tags=["Board"],
+    )
+    def get(self, request, uuid):
+        """
+        Get board changes
+        """
+        board = get_object_or_404(models.Board, uuid=uuid, company_uuid=request.user.id, is_active=True)
+        since = request.query_params.get('since')
+        # Rows committed by transactions still running now may carry an older
+        # updated_at, so the next token overlaps the previous window a little
+        token = encode_sync_token(timezone.now() - settings.SYNC_TOKEN_OVERLAP)
+
+        statuses = models.Status.objects.filter(board=board).select_related('board')
+        lead_types = models.LeadType.objects.filter(status__board=board).select_related('status')
+        leads = models.Lead.objects.filter(type__status__board=board).select_related('type')
+        removed = {"statuses": [], "leadtypes": [], "leads": []}
+        if since:
+            since = decode_sync_token(since)
+            if since is None:
+                return Response({"message": "Invalid since token"}, status=400)
+            statuses = statuses.filter(updated_at__gt=since)
+            lead_types = lead_types.filter(updated_at__gt=since)
+            leads = leads.filter(updated_at__gt=since)
+            removed = board_departures(board, since)
+        else:
+            statuses = statuses.filter(is_active=True)
+            lead_types = lead_types.filter(is_active=True)
+            leads = leads.filter(is_active=True)
+
+        return Response(
+            {
+                "statuses": my_serializers.StatusChangeSerializer(statuses.order_by('updated_at'), many=True).data,
+                "leadtypes": my_serializers.LeadTypeChangeSerializer(lead_types.order_by('updated_at'), many=True).data,
+                "leads": my_serializers.LeadChangeSerializer(leads.order_by('updated_at'), many=True).data,
+                "removed": removed,
+                "token": token,
+            }
+        )
+
+async def authenticate_stream(request):
+    """
+    Resolve the user of an event stream request. EventSource cannot send
+    headers, so the access token may also come as ?token=
+    """
+    authentication = JWTAuthentication()
+    try:
+        result = await authentication.aauthenticate(request)
+        if result is not None:
+            return result[0]
+        raw_token = request.GET.get('token')
+        if not raw_token:
+            return None
+        return await authentication.aget_user(authentication.get_validated_token(raw_token))
+    except (InvalidToken, AuthenticationFailed):
+        return None
+
+
+class BoardEventsView(View):
+    """
+    Server-Sent Events stream of a board. Every write to the board sends a
+    "changed" event; fetch /board/<uuid>/changes/ to get the rows.
+    Needs an ASGI server: an idle stream is a parked coroutine, not a thread.
+    """
+
+    async def get(self, request, uuid):
+        user = await authenticate_stream(request)
+        if user is None:
+            return JsonResponse({"message": "Authentication credentials were not provided"}, status=401)
+        if not await models.Board.objects.filter(uuid=uuid, company_uuid=user.id, is_active=True).aexists():
+            return JsonResponse({"message": "Board not found"}, status=404)
+        response = StreamingHttpResponse(self.stream(uuid), content_type='text/event-stream')
+        response['Cache-Control'] = 'no-cache'
+        response['X-Accel-Buffering'] = 'no'
+        return response
+
+    async def stream(self, uuid):
+        keepalive = settings.BOARD_EVENTS.get("KEEPALIVE", 25)
+        with events.get_broker().subscribe(uuid) as subscription:
+            yield "retry: 5000\n\n"
+            while True:
+                event = await subscription.get(keepalive)
+                if event is None:
+                    yield ": keep-alive\n\n"
+                else:
+                    yield f"event: {event['event']}\ndata: {json.dumps(event)}\n\n"
+
+class MetricsView(View):
+    """
+    Request metrics of every worker in the Prometheus text format. The
+    scraper must send METRICS["TOKEN"] as a bearer token, or be a staff
+    user, unless METRICS["PUBLIC"] is set.
+    """
+
+    def allowed(self, request):
+        if settings.METRICS.get("PUBLIC", False):
+            return True
+        token = settings.METRICS.get("TOKEN")
+        if token and hmac.compare_digest(request.headers.get("Authorization", ""), f"Bearer {token}"):
+            return True
+        if request.user.is_staff:
+            return True
+        try:
+            result = JWTAuthentication().authenticate(request)
+        except (InvalidToken, AuthenticationFailed):
+            return False
+        return result is not None and result[0].is_staff
+
+    def get(self, request):
+        if not self.allowed(request):
+            return JsonResponse({"message": "Authentication credentials were not provided"}, status=401)
+        return HttpResponse(
+            metrics.render(metrics.registry.collect()),
+            content_type="text/plain; version=0.0.4; charset=utf-8",
+        )
+
+class BoardAnalyticsApiView(APIView):
+
+    @extend_schema(
+        responses={200: inline_serializer(
+            name="BoardFunnel",
+            fields={
+                "date_from": rest_serializers.DateField(),
+                "date_to": rest_serializers.DateField(),
+                "stages": rest_serializers.ListField(child=rest_serializers.DictField()),
+                "transitions": rest_serializers.ListField(child=rest_serializers.DictField()),
+            },
+        )},
+        summary="Get board analytics",
+        parameters=[
+            OpenApiParameter(
+                name="date_from",
+                description="First day of the range (YYYY-MM-DD), 30 days ago by default",
+                required=False,
+                type=str
+            ),
+            OpenApiParameter(
+                name="date_to",
+                description="Last day of the range (YYYY-MM-DD), today by default",
+                required=False,
+                type=str
+            ),
+        ],
+        description="Get the conversion rates between statuses and the median and 90th percentile time spent in each status, from the lead history",
+        tags=["Board"],
+    )
+    def get(self, request, uuid):
+        """
+        Get board analytics
+        """
+        board = get_object_or_404(models.Board, uuid=uuid, company_uuid=request.user.id, is_active=True)
+        try:
+            date_to = parse_date(request.query_params.get('date_to') or timezone.localdate().isoformat())
+            date_from = parse_date(request.query_params.get('date_from') or (date_to - timedelta(days=30)).isoformat())
+        except ValueError:
+            date_to = date_from = None
+        if date_to is None or date_from is None or date_from > date_to:
+            return Response({"message": "Invalid date range"}, status=400)
+        return Response(analytics.cached_board_funnel(board, date_from, date_to))
+
 ######################################
 # Status
 ######################################
 
-class StatusApiView(APIView):
+class StatusApiView(AsyncAPIView):
 
     @extend_schema(
         request=my_serializers.StatusSerializer,
@@ -137,23 +430,38 @@ class StatusApiView(APIView):
                 required=True,
                 type=str
             ),
+            *SPARSE_PARAMETERS,
         ],
         description="Get all statuses",
         tags=["Status"],
     )
-    def get(self, request):
+    async def get(self, request):
         """
         Get all statuses
         """
         
-        if request.GET.get("board_uuid"):
-            statuses = models.Status.objects.filter(is_active=True, board__uuid=request.query_params.get("board_uuid")).order_by('order')
-        
-        serializer = my_serializers.StatusSerializer(statuses, many=True)
+        board_uuid = request.query_params.get("board_uuid")
+        sparse = sparse_fields(request, my_serializers.StatusSerializer)
+
+        async def build():
+            serializer = my_serializers.StatusSerializer(**sparse)
+            statuses = models.Status.objects.filter(is_active=True, board__uuid=board_uuid).order_by('order')
+            statuses, _ = sparse_queryset(statuses, serializer, 'order')
+            if 'leadtypes' in serializer.fields:
+                statuses = statuses.prefetch_related(
+                    Prefetch('leadtypes', queryset=models.LeadType.objects.filter(is_active=True).order_by('order'), to_attr='active_leadtypes')
+                )
+            return my_serializers.StatusSerializer([status async for status in statuses], many=True, **sparse).data
+
+        key = await caching.aresponse_key("statuses", request, board=board_uuid)
+        etag = caching.key_etag(key)
+        if etag_matches(request, etag):
+            return not_modified(etag)
         return Response(
             {
-                "statuses": serializer.data
-            }
+                "statuses": await caching.acached_data(key, build)
+            },
+            headers={"ETag": etag}
         )
 
     @extend_schema(
@@ -198,9 +506,9 @@ class StatusApiView(APIView):
         """
         Delete a status
         """
-        status = models.Status.objects.get(uuid=request.query_params.get("uuid"))
-        status.is_active = False
-        status.save()
+        deleted = models.deactivate(models.Status.objects.filter(uuid=request.query_params.get("uuid")))
+        if not deleted:
+            return Response({"message": "Status not found"}, status=status.HTTP_404_NOT_FOUND)
         return Response({"message": "Status deleted successfully"})
     
     @extend_schema(
@@ -250,6 +558,7 @@ class LeadTypeApiView(APIView):
                 required=False,
                 type=str
             ),
+            *SPARSE_PARAMETERS,
         ],
         summary="Get all lead types",
         description="Get all lead types",
@@ -259,14 +568,24 @@ class LeadTypeApiView(APIView):
         """
         Get all lead types
         """
-        lead_types = models.LeadType.objects.filter(is_active=True, status__board__company_uuid = request.user.id).order_by('order')
-        if request.query_params.get("status_uuid"):
-            lead_types = lead_types.filter(status__uuid=request.query_params.get("status_uuid"))
-        serializer = my_serializers.LeadTypeSerializer(lead_types, many=True)
+        sparse = sparse_fields(request, my_serializers.LeadTypeSerializer)
+
+        def build():
+            lead_types = models.LeadType.objects.filter(is_active=True, status__board__company_uuid = request.user.id).order_by('order')
+            if request.query_params.get("status_uuid"):
+                lead_types = lead_types.filter(status__uuid=request.query_params.get("status_uuid"))
+            lead_types, _ = sparse_queryset(lead_types, my_serializers.LeadTypeSerializer(**sparse), 'order')
+            return my_serializers.LeadTypeSerializer(lead_types, many=True, **sparse).data
+
+        key = caching.response_key("leadtypes", request, company=request.user.id)
+        etag = caching.key_etag(key)
+        if etag_matches(request, etag):
+            return not_modified(etag)
         return Response(
             {
-                "leadtypes":serializer.data
-            }
+                "leadtypes": caching.cached_data(key, build)
+            },
+            headers={"ETag": etag}
         )
 
     @extend_schema(
@@ -311,9 +630,9 @@ class LeadTypeApiView(APIView):
         """
         Delete a lead type
         """
-        lead_type = models.LeadType.objects.get(uuid=request.query_params.get("uuid"))
-        lead_type.is_active = False
-        lead_type.save()
+        deleted = models.deactivate(models.LeadType.objects.filter(uuid=request.query_params.get("uuid")))
+        if not deleted:
+            return Response({"message": "Lead type not found"}, status=status.HTTP_404_NOT_FOUND)
         return Response({"message": "Lead type deleted successfully"})
     
     @extend_schema(
@@ -345,7 +664,7 @@ class LeadTypeApiView(APIView):
 # Lead
 ######################################
 
-class LeadApiView(APIView):
+class LeadApiView(AsyncAPIView):
 
     @extend_schema(
         request=my_serializers.LeadSerializer,
@@ -378,28 +697,100 @@ class LeadApiView(APIView):
                 required=False,
                 type=int
             ),
+            OpenApiParameter(
+                name="pagination",
+                description="Set to 'cursor' to page through leads with keyset cursors",
+                required=False,
+                type=str
+            ),
+            OpenApiParameter(
+                name="cursor",
+                description="Cursor returned in the 'next' link of the previous page",
+                required=False,
+                type=str
+            ),
+            *SPARSE_PARAMETERS,
         ],  
     )
-    def get(self, request):
+    async def get(self, request):
         """
         Get all leads
         """
 
+        if settings.LEAD_CARDS_ENABLED:
+            return await self.get_from_cards(request)
+
+        sparse = sparse_fields(request, my_serializers.LeadSerializer)
         leads = models.Lead.objects.filter(is_active=True, type__status__board__company_uuid = request.user.id)
+        leads, related = sparse_queryset(leads, my_serializers.LeadSerializer(**sparse), 'order', 'created_at', 'updated_at')
 
         if request.query_params.get("type"):
             leads = leads.filter(type__uuid=request.query_params.get("type"))
         
         if request.query_params.get("status"):
             leads = leads.filter(type__status__uuid=request.query_params.get("status"))
+
+        if request.query_params.get("pagination") == "cursor":
+            paginator = KeysetPagination(ordering=('order', '-created_at', '-id'))
+            leads = await paginator.apaginate_queryset(leads, request)
+            etag = rows_etag(request, leads, 'pk', 'updated_at', *related_etag_fields(related))
+            if etag_matches(request, etag):
+                return not_modified(etag)
+            serializer = my_serializers.LeadSerializer(leads, many=True, **sparse)
+            response = paginator.get_paginated_response(serializer.data)
+            response["ETag"] = etag
+            return response
+
+        etag = await aqueryset_etag(request, leads, 'updated_at', *[f'{path}__updated_at' for path in related])
+        if etag_matches(request, etag):
+            return not_modified(etag)
         
-        serializer = my_serializers.LeadSerializer(leads, many=True)
+        serializer = my_serializers.LeadSerializer([lead async for lead in leads], many=True, **sparse)
         return Response(
             {
                 "leads": serializer.data
-            }
+            },
+            headers={"ETag": etag}
         )
     
+    async def get_from_cards(self, request):
+        """
+        Get all leads from the denormalized lead cards
+        """
+        sparse = sparse_fields(request, my_serializers.LeadCardSerializer)
+        leads = models.LeadCard.objects.filter(is_active=True, company_uuid=request.user.id)
+
+        if request.query_params.get("type"):
+            leads = leads.filter(type_uuid=request.query_params.get("type"))
+
+        if request.query_params.get("status"):
+            leads = leads.filter(status_uuid=request.query_params.get("status"))
+
+        if request.query_params.get("pagination") == "cursor":
+            paginator = KeysetPagination(ordering=('order', '-created_at', '-lead_id'))
+            leads, _ = sparse_queryset(leads, my_serializers.LeadCardSerializer(**sparse), 'order', 'created_at', 'updated_at', 'type_name')
+            leads = await paginator.apaginate_queryset(leads, request)
+            etag = rows_etag(request, leads, 'pk', 'updated_at', 'type_name')
+            if etag_matches(request, etag):
+                return not_modified(etag)
+            serializer = my_serializers.LeadCardSerializer(leads, many=True, **sparse)
+            response = paginator.get_paginated_response(serializer.data)
+            response["ETag"] = etag
+            return response
+
+        etag = await aqueryset_etag(request, leads, 'updated_at', 'lead__type__updated_at')
+        if etag_matches(request, etag):
+            return not_modified(etag)
+
+        leads, _ = sparse_queryset(leads, my_serializers.LeadCardSerializer(**sparse))
+        serializer = my_serializers.LeadCardSerializer([lead async for lead in leads], many=True, **sparse)
+        return Response(
+            {
+                "leads": serializer.data
+            },
+            headers={"ETag": etag}
+        )
+
     @extend_schema(
         request=my_serializers.LeadSerializer,
         responses={200: my_serializers.LeadSerializer},
@@ -413,8 +804,15 @@ class LeadApiView(APIView):
         """
         serializer = my_serializers.LeadSerializer(data=request.data)
         serializer.is_valid(raise_exception=True)
-        serializer.save()
-        return Response(serializer.data)
+        duplicates = services.find_lead_duplicates(
+            serializer.validated_data["type"],
+            serializer.validated_data.get("phone_number"),
+        )
+        with transaction.atomic():
+            lead = serializer.save()
+            # The first stay of the lead in the funnel starts here
+            models.LeadHistory.objects.create(lead=lead, lead_type=lead.type, status=lead.type.status)
+        return Response({**serializer.data, "duplicates": duplicates})
     
     @extend_schema(
         responses={200: {"message": "Lead deleted successfully"}},
@@ -434,9 +832,9 @@ class LeadApiView(APIView):
         """
         Delete a lead
         """
-        lead = models.Lead.objects.get(uuid=request.query_params.get("uuid"))
-        lead.is_active = False
-        lead.save()
+        deleted = models.deactivate(models.Lead.objects.filter(uuid=request.query_params.get("uuid")))
+        if not deleted:
+            return Response({"message": "Lead not found"}, status=status.HTTP_404_NOT_FOUND)
         return Response({"message": "Lead deleted successfully"})
     
     @extend_schema(
@@ -472,11 +870,246 @@ class LeadApiView(APIView):
         serializer.save()
         return Response(serializer.data)
 
+class LeadMoveApiView(APIView):
+
+    @extend_schema(
+        request=my_serializers.LeadMoveSerializer,
+        responses={200: my_serializers.LeadSerializer},
+        summary="Move a lead",
+        description="Move a lead to a lead type at a 0-based position, recording the move in the lead history",
+        tags=["Lead"],
+    )
+    def patch(self, request):
+        """
+        Move a lead
+        """
+        serializer = my_serializers.LeadMoveSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        try:
+            lead = services.move_lead(
+                serializer.validated_data["uuid"],
+                serializer.validated_data["type"],
+                serializer.validated_data["position"],
+                request.user.id,
+            )
+        except models.Lead.DoesNotExist:
+            return Response({"message": "Lead not found"}, status=status.HTTP_404_NOT_FOUND)
+        except models.LeadType.DoesNotExist:
+            return Response({"message": "Lead type not found"}, status=status.HTTP_404_NOT_FOUND)
+        return Response(my_serializers.LeadSerializer(lead).data)
+
+class LeadSearchApiView(APIView):
+
+    @extend_schema(
+        responses={200: my_serializers.LeadSerializer(many=True)},
+        summary="Search leads",
+        description="Full-text search over lead title, phone number, description and extra values, best match first",
+        tags=["Lead"],
+        parameters=[
+            OpenApiParameter(
+                name="q",
+                description="Search text, at least 3 characters per term",
+                required=True,
+                type=str
+            ),
+            OpenApiParameter(
+                name="page_size",
+                description="Page size",
+                required=False,
+                type=int
+            ),
+            OpenApiParameter(
+                name="page",
+                description="Page number",
+                required=False,
+                type=int
+            ),
+        ],
+    )
+    def get(self, request):
+        """
+        Search leads
+        """
+        terms = search.parse_query(request.query_params.get("q"))
+        if not terms:
+            return Response(
+                {"message": f"Search terms must be at least {search.MIN_TERM_LENGTH} characters long"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        paginator = CustomPagination()
+        page_size = paginator.get_page_size(request)
+        try:
+            page = max(int(request.query_params.get("page", 1)), 1)
+        except ValueError:
+            page = 1
+
+        lead_ids = search.search_leads(terms, request.user.id, limit=page_size + 1, offset=(page - 1) * page_size)
+        has_next = len(lead_ids) > page_size
+        lead_ids = lead_ids[:page_size]
+
+        leads = models.Lead.objects.select_related('type').in_bulk(lead_ids)
+        serializer = my_serializers.LeadSerializer([leads[pk] for pk in lead_ids if pk in leads], many=True)
+        next_link = None
+        if has_next:
+            next_link = replace_query_param(request.build_absolute_uri(), "page", page + 1)
+        return Response(
+            {
+                "next": next_link,
+                "results": serializer.data
+            }
+        )
+
+
+class LeadImportApiView(APIView):
+    parser_classes = [MultiPartParser]
+
+    @extend_schema(
+        request={
+            "multipart/form-data": inline_serializer(
+                name="LeadImportRequestSerializer",
+                fields={
+                    "file": rest_serializers.FileField(),
+                    "file_format": rest_serializers.ChoiceField(choices=services.LEAD_IMPORT_FORMATS, required=False),
+                    "batch_size": rest_serializers.IntegerField(required=False),
+                    "skip_duplicates": rest_serializers.BooleanField(required=False),
+                },
+            )
+        },
+        responses={200: inline_serializer(
+            name="LeadImportResponseSerializer",
+            fields={
+                "created": rest_serializers.IntegerField(),
+                "failed": rest_serializers.IntegerField(),
+                "duplicates": rest_serializers.IntegerField(),
+                "errors": rest_serializers.ListField(child=rest_serializers.DictField()),
+            },
+        )},
+        summary="Import leads",
+        description="Import leads from a CSV or NDJSON file in batches and return a per-row error report",
+        tags=["Lead"],
+    )
+    def post(self, request):
+        """
+        Import leads
+        """
+        upload = request.FILES.get("file")
+        if upload is None:
+            return Response({"message": "File is required"}, status=status.HTTP_400_BAD_REQUEST)
+
+        file_format = request.data.get("file_format") or services.guess_import_format(upload.name)
+        if file_format not in services.LEAD_IMPORT_FORMATS:
+            return Response({"message": "Unsupported file format"}, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            batch_size = int(request.data.get("batch_size") or services.LEAD_IMPORT_BATCH_SIZE)
+        except ValueError:
+            return Response({"message": "Invalid batch size"}, status=status.HTTP_400_BAD_REQUEST)
+        batch_size = min(max(batch_size, 1), services.LEAD_IMPORT_MAX_BATCH_SIZE)
+
+        rows = services.iter_import_rows(upload.file, file_format)
+        skip_duplicates = str(request.data.get("skip_duplicates", "")).lower() in ("1", "true", "yes")
+        try:
+            report = services.import_leads(rows, request.user.id, batch_size=batch_size, skip_duplicates=skip_duplicates)
+        except services.LeadImportError as exc:
+            return Response({"message": str(exc), **exc.report}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(report)
+
+class LeadExportApiView(APIView):
+
+    @extend_schema(
+        responses={(200, "text/csv"): str, (200, "application/x-ndjson"): str},
+        summary="Export leads",
+        description="Stream leads as CSV or NDJSON",
+        tags=["Lead"],
+        parameters=[
+            OpenApiParameter(
+                name="file_format",
+                description="csv or ndjson",
+                required=False,
+                type=str
+            ),
+            OpenApiParameter(
+                name="board",
+                description="Board UUID",
+                required=False,
+                type=str
+            ),
+            OpenApiParameter(
+                name="status",
+                description="Status UUID",
+                required=False,
+                type=str
+            ),
+            OpenApiParameter(
+                name="type",
+                description="Type UUID",
+                required=False,
+                type=str
+            ),
+            OpenApiParameter(
+                name="created_from",
+                description="Only leads created at or after this date/datetime",
+                required=False,
+                type=str
+            ),
+            OpenApiParameter(
+                name="created_to",
+                description="Only leads created at or before this date/datetime",
+                required=False,
+                type=str
+            ),
+        ],
+    )
+    def get(self, request):
+        """
+        Export leads
+        """
+        file_format = request.query_params.get("file_format", "csv")
+        if file_format not in services.LEAD_EXPORT_FORMATS:
+            return Response({"message": "Unsupported file format"}, status=status.HTTP_400_BAD_REQUEST)
+
+        leads = models.Lead.objects.filter(is_active=True, type__status__board__company_uuid = request.user.id).order_by('id')
+
+        if request.query_params.get("board"):
+            leads = leads.filter(type__status__board__uuid=request.query_params.get("board"))
+
+        if request.query_params.get("status"):
+            leads = leads.filter(type__status__uuid=request.query_params.get("status"))
+
+        if request.query_params.get("type"):
+            leads = leads.filter(type__uuid=request.query_params.get("type"))
+
+        for param, operator in (("created_from", "gte"), ("created_to", "lte")):
+            value = request.query_params.get(param)
+            if not value:
+                continue
+            try:
+                parsed_date = parse_date(value)
+                parsed_datetime = None if parsed_date else parse_datetime(value)
+            except ValueError:
+                parsed_date = parsed_datetime = None
+            if parsed_date:
+                leads = leads.filter(**{f"created_at__date__{operator}": parsed_date})
+            elif parsed_datetime:
+                if timezone.is_naive(parsed_datetime):
+                    parsed_datetime = timezone.make_aware(parsed_datetime)
+                leads = leads.filter(**{f"created_at__{operator}": parsed_datetime})
+            else:
+                return Response({"message": f"Invalid {param}"}, status=status.HTTP_400_BAD_REQUEST)
+
+        if file_format == "csv":
+            response = StreamingHttpResponse(services.stream_leads_csv(leads), content_type="text/csv")
+        else:
+            response = StreamingHttpResponse(services.stream_leads_ndjson(leads), content_type="application/x-ndjson")
+        response["Content-Disposition"] = f'attachment; filename="leads.{file_format}"'
+        return response
+
 ######################################
 # LeadHistory
 ######################################
 
-class LeadHistoryApiView(APIView):
+class LeadHistoryApiView(AsyncAPIView):
 
     @extend_schema(
         responses={200: my_serializers.LeadHistorySerializer(many=True)},
@@ -495,19 +1128,128 @@ class LeadHistoryApiView(APIView):
                 required=False,
                 type=int
             ),
+            OpenApiParameter(
+                name="lead",
+                description="Lead UUID",
+                required=False,
+                type=str
+            ),
+            OpenApiParameter(
+                name="date_from",
+                description="First day (YYYY-MM-DD); days older than the hot history also read the archive",
+                required=False,
+                type=str
+            ),
+            OpenApiParameter(
+                name="date_to",
+                description="Last day (YYYY-MM-DD)",
+                required=False,
+                type=str
+            ),
+            OpenApiParameter(
+                name="pagination",
+                description="Set to 'cursor' to page through histories with keyset cursors",
+                required=False,
+                type=str
+            ),
+            OpenApiParameter(
+                name="cursor",
+                description="Cursor returned in the 'next' link of the previous page",
+                required=False,
+                type=str
+            ),
+            *SPARSE_PARAMETERS,
         ],
         tags=["LeadHistory"],
     )
-    def get(self, request):
+    async def get(self, request):
         """
         Get all lead histories
         """
-        lead_histories = models.LeadHistory.objects.filter(is_active=True)
+        filters = {"is_active": True, "status__board__company_uuid": request.user.id}
+        if request.query_params.get("lead"):
+            filters["lead__uuid"] = request.query_params.get("lead")
+        try:
+            date_from = parse_date(request.query_params.get("date_from") or "")
+            date_to = parse_date(request.query_params.get("date_to") or "")
+        except ValueError:
+            return Response({"message": "Invalid date"}, status=status.HTTP_400_BAD_REQUEST)
+        start = None
+        if date_from:
+            start = timezone.make_aware(datetime.combine(date_from, time.min))
+        if date_to:
+            filters["created_at__lt"] = timezone.make_aware(datetime.combine(date_to + timedelta(days=1), time.min))
+        sparse = sparse_fields(request, my_serializers.LeadHistorySerializer)
+        serializer = my_serializers.LeadHistorySerializer(**sparse)
+        querysets = []
+        for queryset in archive.history_querysets(start, **filters):
+            queryset, related = sparse_queryset(queryset, serializer, 'created_at', 'updated_at')
+            querysets.append(queryset)
+        if len(querysets) > 1:
+            return await self.get_with_archive(request, querysets, sparse, related)
+        lead_histories = querysets[0]
+
+        if request.query_params.get("pagination") == "cursor":
+            paginator = KeysetPagination(ordering=('-created_at', '-id'))
+            lead_histories = await paginator.apaginate_queryset(lead_histories, request)
+            etag = rows_etag(request, lead_histories, 'pk', 'updated_at', *related_etag_fields(related))
+            if etag_matches(request, etag):
+                return not_modified(etag)
+            serializer = my_serializers.LeadHistorySerializer(lead_histories, many=True, **sparse)
+            response = paginator.get_paginated_response(serializer.data)
+            response["ETag"] = etag
+            return response
+
+        etag = await aqueryset_etag(request, lead_histories, 'updated_at', *[f'{path}__updated_at' for path in related])
+        if etag_matches(request, etag):
+            return not_modified(etag)
+
+        paginator = CustomPagination()
+        paginator.page_size = request.query_params.get("page_size", 10)
+        # PageNumberPagination counts and slices synchronously
+        lead_histories = await sync_to_async(paginator.paginate_queryset)(lead_histories, request)
+        serializer = my_serializers.LeadHistorySerializer(lead_histories, many=True, **sparse)
+        response = paginator.get_paginated_response(serializer.data)
+        response["ETag"] = etag
+        return response
+
+    async def get_with_archive(self, request, querysets, sparse, related):
+        """
+        Get lead histories from the hot table and the archive
+        """
+        if request.query_params.get("pagination") == "cursor":
+            paginator = KeysetPagination(ordering=('-created_at', '-id'))
+            lead_histories = await paginator.apaginate_querysets(querysets, request)
+            etag = rows_etag(request, lead_histories, 'pk', 'updated_at', *related_etag_fields(related))
+            if etag_matches(request, etag):
+                return not_modified(etag)
+            serializer = my_serializers.LeadHistorySerializer(lead_histories, many=True, **sparse)
+            response = paginator.get_paginated_response(serializer.data)
+            response["ETag"] = etag
+            return response
+
+        etag = make_etag(request, *[
+            await aqueryset_etag(request, queryset, 'updated_at', *[f'{path}__updated_at' for path in related])
+            for queryset in querysets
+        ])
+        if etag_matches(request, etag):
+            return not_modified(etag)
+
         paginator = CustomPagination()
         paginator.page_size = request.query_params.get("page_size", 10)
-        lead_histories = paginator.paginate_queryset(lead_histories, request)
-        serializer = my_serializers.LeadHistorySerializer(lead_histories, many=True)
-        return paginator.get_paginated_response(serializer.data)
+
+        def paginate():
+            # Combined querysets can not select_related, the page is prefetched instead
+            hot, archived = [queryset.select_related(None).order_by() for queryset in querysets]
+            page = paginator.paginate_queryset(hot.union(archived, all=True).order_by('-created_at', '-id'), request)
+            prefetch_related_objects(page, *related)
+            return page
+
+        lead_histories = await sync_to_async(paginate)()
+        serializer = my_serializers.LeadHistorySerializer(lead_histories, many=True, **sparse)
+        response = paginator.get_paginated_response(serializer.data)
+        response["ETag"] = etag
+        return response
 
 
 #####################################
@@ -517,17 +1259,59 @@ class LeadHistoryApiView(APIView):
 
 class ChangeOrderApiView(APIView):
 
+    @extend_schema(
+        request=my_serializers.ChangeOrderSerializer,
+        responses={200: {"message": "Order changed successfully"}},
+        summary="Change the order of statuses, lead types or leads",
+        description="Set the order of many rows in one transaction",
+        tags=["Actions"],
+    )
     def patch(self, request):
         """
-        Change the order of a status
+        Change the order of statuses, lead types or leads
         """
-        data = request.data.get("data")
-        for item in data:
-            status = models.Status.objects.get(uuid=item.get("uuid"))
-            status.order = item.get("order")
-            status.save()
+        serializer = my_serializers.ChangeOrderSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        updated = services.bulk_change_order(
+            serializer.validated_data["model"],
+            serializer.validated_data["data"],
+            request.user.id,
+        )
+        return Response({"message": "Order changed successfully", "updated": updated})
+
 
-        return Response({"message": "Status order changed successfully"})
+class MoveOrderApiView(APIView):
+
+    @extend_schema(
+        request=my_serializers.MoveOrderSerializer,
+        responses={200: inline_serializer(
+            name="MoveOrderResponseSerializer",
+            fields={
+                "uuid": rest_serializers.UUIDField(),
+                "order": rest_serializers.IntegerField(),
+            },
+        )},
+        summary="Move a status, lead type or lead",
+        description="Move a row right after another row of its column, or to the top when 'after' is null",
+        tags=["Actions"],
+    )
+    def patch(self, request):
+        """
+        Move a status, lead type or lead
+        """
+        serializer = my_serializers.MoveOrderSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        model = services.ORDER_MODELS[serializer.validated_data["model"]][0]
+        try:
+            row = services.move_after(
+                serializer.validated_data["model"],
+                serializer.validated_data["uuid"],
+                serializer.validated_data.get("after"),
+                request.user.id,
+            )
+        except model.DoesNotExist:
+            return Response({"message": "Not found"}, status=status.HTTP_404_NOT_FOUND)
+        return Response({"uuid": row.uuid, "order": row.order})
 
 class ClearApiView(APIView):
 
@@ -570,25 +1354,18 @@ class ClearApiView(APIView):
         leadtype_uuid = request.query_params.get("leadtype_uuid")
         lead_uuid = request.query_params.get("lead_uuid")
 
-        if board_uuid:
-            board = models.Board.objects.get(uuid=board_uuid)
-            board.is_active = False
-            board.save()
-
-        if status_uuid:
-            status = models.Status.objects.get(uuid=status_uuid)
-            status.is_active = False
-            status.save()
-
-        if leadtype_uuid:
-            lead_type = models.LeadType.objects.get(uuid=leadtype_uuid)
-            lead_type.is_active = False
-            lead_type.save()
-
-        if lead_uuid:
-            lead = models.Lead.objects.get(uuid=lead_uuid)
-            lead.is_active = False
-            lead.save()
+        with transaction.atomic():
+            if board_uuid:
+                models.deactivate(models.Board.objects.filter(uuid=board_uuid))
+
+            if status_uuid:
+                models.deactivate(models.Status.objects.filter(uuid=status_uuid))
+
+            if leadtype_uuid:
+                models.deactivate(models.LeadType.objects.filter(uuid=leadtype_uuid))
+
+            if lead_uuid:
+                models.deactivate(models.Lead.objects.filter(uuid=lead_uuid))
 
         return Response({"message": "All lead types deleted successfully"})
 
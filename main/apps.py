@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class MainConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'main'
+
+    def ready(self):
+        # Registers the receivers that drop changed users from the auth cache
+        from main.api.auth import authentication  # noqa: F401
@@ -0,0 +1,122 @@
+"""
+LeadHistory archival.
+
+History older than settings.LEAD_HISTORY_HOT_DAYS is moved, in batches
+each in its own transaction, from LeadHistory to LeadHistoryArchive.
+The per-lead LeadHistorySummary is updated in the same transaction. The
+hot table then only holds recent transitions. Readers that ask for older
+dates read both tables (see history_querysets).
+"""
+from datetime import timedelta
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from main import models
+
+ARCHIVE_BATCH_SIZE = 5000
+HISTORY_FIELDS = ("id", "uuid", "created_at", "updated_at", "is_active", "lead_id", "status_id", "lead_type_id")
+
+
+def archive_horizon():
+    """
+    Rows created before this moment may already be archived
+    """
+    return timezone.now() - timedelta(days=settings.LEAD_HISTORY_HOT_DAYS)
+
+
+def _update_summaries(rows):
+    """
+    Fold a batch of archived rows, in created_at order, into the lead summaries
+    """
+    batch = {}
+    for row in rows:
+        if not row["is_active"]:
+            continue
+        summary = batch.get(row["lead_id"])
+        if summary is None:
+            summary = batch[row["lead_id"]] = models.LeadHistorySummary(
+                lead_id=row["lead_id"], archived_count=0, first_at=row["created_at"]
+            )
+        summary.archived_count += 1
+        summary.last_at = row["created_at"]
+        summary.last_status_id = row["status_id"]
+        summary.last_lead_type_id = row["lead_type_id"]
+
+    for existing in models.LeadHistorySummary.objects.filter(lead_id__in=batch):
+        summary = batch[existing.lead_id]
+        summary.archived_count += existing.archived_count
+        summary.first_at = min(summary.first_at, existing.first_at)
+        if existing.last_at > summary.last_at:
+            summary.last_at = existing.last_at
+            summary.last_status_id = existing.last_status_id
+            summary.last_lead_type_id = existing.last_lead_type_id
+
+    models.LeadHistorySummary.objects.bulk_create(
+        batch.values(),
+        update_conflicts=True,
+        unique_fields=["lead"],
+        update_fields=["archived_count", "first_at", "last_at", "last_status", "last_lead_type"],
+    )
+
+
+def archive_lead_history(before=None, batch_size=ARCHIVE_BATCH_SIZE):
+    """
+    Move history created before `before` (the archive horizon by default)
+    to the archive table. Returns the number of rows moved.
+    """
+    before = before or archive_horizon()
+    archived = 0
+    while True:
+        with transaction.atomic():
+            rows = list(
+                models.LeadHistory.objects.filter(created_at__lt=before)
+                .order_by("created_at", "id")
+                .values(*HISTORY_FIELDS)[:batch_size]
+            )
+            if not rows:
+                return archived
+            models.LeadHistoryArchive.objects.bulk_create(
+                [models.LeadHistoryArchive(**row) for row in rows], ignore_conflicts=True
+            )
+            _update_summaries(rows)
+            models.LeadHistory.objects.filter(pk__in=[row["id"] for row in rows]).delete()
+        archived += len(rows)
+
+
+def merge_lead_history(keeper, duplicates):
+    """
+    Move the hot and archived history of duplicates to keeper and fold
+    their summaries into the summary of keeper
+    """
+    now = timezone.now()
+    models.LeadHistory.objects.filter(lead__in=duplicates).update(lead=keeper, updated_at=now)
+    models.LeadHistoryArchive.objects.filter(lead__in=duplicates).update(lead=keeper, updated_at=now)
+
+    summaries = list(models.LeadHistorySummary.objects.filter(lead__in=[keeper, *duplicates]))
+    if not summaries:
+        return
+    latest = max(summaries, key=lambda summary: summary.last_at)
+    models.LeadHistorySummary.objects.filter(lead__in=duplicates).delete()
+    models.LeadHistorySummary.objects.update_or_create(
+        lead=keeper,
+        defaults={
+            "archived_count": sum(summary.archived_count for summary in summaries),
+            "first_at": min(summary.first_at for summary in summaries),
+            "last_at": latest.last_at,
+            "last_status_id": latest.last_status_id,
+            "last_lead_type_id": latest.last_lead_type_id,
+        },
+    )
+
+
+def history_querysets(start=None, **filters):
+    """
+    Querysets of the history matching filters, created at or after start:
+    the hot table, plus the archive when start reaches past the horizon
+    """
+    querysets = [models.LeadHistory.objects.filter(**filters)]
+    if start is not None:
+        querysets[0] = querysets[0].filter(created_at__gte=start)
+        if start < archive_horizon():
+            querysets.append(models.LeadHistoryArchive.objects.filter(created_at__gte=start, **filters))
+    return querysets
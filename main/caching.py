@@ -0,0 +1,99 @@
+"""
+Versioned response cache for board, status and lead type reads.
+
+Every board and every tenant (company) has a version token in the cache.
+Cached responses are keyed by that token, so a write only has to replace
+the token to make every cached response of the board or tenant unreachable.
+Tokens are random rather than counters, so two concurrent bumps can never
+collapse into one.
+"""
+import hashlib
+from urllib.parse import urlencode
+from uuid import uuid4
+from django.conf import settings
+from django.core.cache import cache
+
+
+def _version_key(scope, value):
+    return f"api-version:{scope}:{value}"
+
+
+def get_version(scope, value):
+    key = _version_key(scope, value)
+    version = cache.get(key)
+    if version is None:
+        version = uuid4().hex
+        if not cache.add(key, version, None):
+            version = cache.get(key, version)
+    return version
+
+
+async def aget_version(scope, value):
+    key = _version_key(scope, value)
+    version = await cache.aget(key)
+    if version is None:
+        version = uuid4().hex
+        if not await cache.aadd(key, version, None):
+            version = await cache.aget(key, version)
+    return version
+
+
+def bump_versions(boards):
+    """
+    Replace the version tokens of boards and of their companies.
+    boards is an iterable of (board uuid, company uuid) pairs.
+    """
+    versions = {}
+    for board_uuid, company_uuid in boards:
+        versions[_version_key("board", board_uuid)] = uuid4().hex
+        versions[_version_key("company", company_uuid)] = uuid4().hex
+    if versions:
+        cache.set_many(versions, None)
+
+
+def response_key(name, request, **versions):
+    """
+    Build the cache key of a response from the view name, the version
+    tokens it depends on and the query string
+    """
+    tokens = [f"{scope}={get_version(scope, value)}" for scope, value in sorted(versions.items())]
+    return _response_key(name, request, tokens)
+
+
+async def aresponse_key(name, request, **versions):
+    tokens = [f"{scope}={await aget_version(scope, value)}" for scope, value in sorted(versions.items())]
+    return _response_key(name, request, tokens)
+
+
+def _response_key(name, request, tokens):
+    query = urlencode(sorted(request.query_params.items()))
+    return "api-response:" + hashlib.md5("|".join([name, query] + tokens).encode()).hexdigest()
+
+
+def key_etag(key):
+    """
+    Weak ETag of a cached response: its key already changes with every version bump
+    """
+    return 'W/"%s"' % key.rsplit(":", 1)[-1]
+
+
+def cached_data(key, build):
+    """
+    Return the cached value of key, building and storing it on a miss
+    """
+    data = cache.get(key)
+    if data is None:
+        data = build()
+        cache.set(key, data, settings.API_CACHE_TIMEOUT)
+    return data
+
+
+async def acached_data(key, build):
+    """
+    Async cached_data: build is a coroutine function
+    """
+    data = await cache.aget(key)
+    if data is None:
+        data = await build()
+        await cache.aset(key, data, settings.API_CACHE_TIMEOUT)
+    return data
@@ -1,8 +1,12 @@
+from django.conf import settings
 from django.shortcuts import render
 from main import models
 
 def index(request):
-    leads = models.Lead.objects.filter(is_active=True)
+    if settings.LEAD_CARDS_ENABLED:
+        leads = models.LeadCard.objects.filter(is_active=True)
+    else:
+        leads = models.Lead.objects.filter(is_active=True)
     status = models.Status.objects.all()
     context = {
         'leads': leads,
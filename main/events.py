@@ -0,0 +1,158 @@
+"""
+Board change notifications pushed to clients over Server-Sent Events.
+
+Once a write commits, models.invalidate_boards publishes a small "changed"
+event for every board it touched. Clients then pull the rows themselves
+from /api/board/<uuid>/changes/. Subscribers are coroutines waiting on
+a queue, so an idle dashboard holds no thread and no database connection.
+
+The broker is set by BOARD_EVENTS["BACKEND"]. InProcessBroker only reaches
+clients connected to the process that made the write. RedisBroker fans
+events out to every worker.
+"""
+import asyncio
+import json
+import logging
+import threading
+from collections import defaultdict
+from functools import cache
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger(__name__)
+
+
+class Subscription:
+    """
+    Events of one board for one client. Use it as a context manager so the
+    subscription is dropped when the client goes away.
+    """
+
+    def __init__(self, broker, board_uuid, max_pending):
+        self.broker = broker
+        self.board_uuid = board_uuid
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue(maxsize=max_pending)
+
+    def offer(self, event):
+        # Events only tell the client to resync, so when it falls behind the
+        # events it already has pending are enough and newer ones are dropped
+        if not self.queue.full():
+            self.queue.put_nowait(event)
+
+    async def get(self, timeout):
+        """
+        Wait for the next event, or return None after timeout seconds
+        """
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.broker.unsubscribe(self)
+
+
+class InProcessBroker:
+    """
+    Deliver events to the subscribers of the current process
+    """
+
+    def __init__(self, options=None):
+        self.options = options or {}
+        self.max_pending = self.options.get("MAX_PENDING", 16)
+        self._subscribers = defaultdict(set)
+        self._lock = threading.Lock()
+
+    def subscribe(self, board_uuid):
+        """
+        Subscribe to a board. Must be called from a running event loop.
+        """
+        subscription = Subscription(self, str(board_uuid), self.max_pending)
+        with self._lock:
+            self._subscribers[subscription.board_uuid].add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            subscribers = self._subscribers.get(subscription.board_uuid)
+            if subscribers is not None:
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self._subscribers[subscription.board_uuid]
+
+    def publish(self, board_uuid, event):
+        self.dispatch(str(board_uuid), event)
+
+    def dispatch(self, board_uuid, event):
+        """
+        Hand an event to the local subscribers of a board. Safe to call from
+        any thread: each subscriber is fed from its own event loop.
+        """
+        with self._lock:
+            subscribers = list(self._subscribers.get(board_uuid, ()))
+        for subscription in subscribers:
+            try:
+                subscription.loop.call_soon_threadsafe(subscription.offer, event)
+            except RuntimeError:
+                # The loop of the subscriber is already closed
+                self.unsubscribe(subscription)
+
+
+class RedisBroker(InProcessBroker):
+    """
+    Publish events through Redis pub/sub so subscribers on every worker see
+    them. Each process keeps one pattern subscription and hands incoming
+    events to its local subscribers. Needs the redis package.
+    """
+    channel_prefix = "board-events:"
+
+    def __init__(self, options=None):
+        super().__init__(options)
+        import redis
+
+        self.url = self.options.get("URL", "redis://localhost:6379/0")
+        self._client = redis.Redis.from_url(self.url)
+        self._listener = None
+
+    def subscribe(self, board_uuid):
+        if self._listener is None or self._listener.done():
+            self._listener = asyncio.get_running_loop().create_task(self._listen())
+        return super().subscribe(board_uuid)
+
+    def publish(self, board_uuid, event):
+        self._client.publish(self.channel_prefix + str(board_uuid), json.dumps(event))
+
+    async def _listen(self):
+        from redis import asyncio as aioredis
+
+        client = aioredis.Redis.from_url(self.url)
+        async with client.pubsub() as pubsub:
+            await pubsub.psubscribe(self.channel_prefix + "*")
+            async for message in pubsub.listen():
+                if message["type"] != "pmessage":
+                    continue
+                board_uuid = message["channel"].decode()[len(self.channel_prefix):]
+                self.dispatch(board_uuid, json.loads(message["data"]))
+
+
+@cache
+def get_broker():
+    config = settings.BOARD_EVENTS
+    return import_string(config["BACKEND"])(config.get("OPTIONS"))
+
+
+def publish_board_changes(boards):
+    """
+    Tell the subscribers of boards that they changed.
+    boards is an iterable of (board uuid, company uuid) pairs.
+    """
+    broker = get_broker()
+    for board_uuid in {str(board_uuid) for board_uuid, _ in boards}:
+        try:
+            broker.publish(board_uuid, {"event": "changed", "board": board_uuid})
+        except Exception:
+            logger.exception("Could not publish the changes of board %s", board_uuid)
@@ -0,0 +1,18 @@
+from datetime import timedelta
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from main.archive import ARCHIVE_BATCH_SIZE, archive_lead_history
+
+
+class Command(BaseCommand):
+    help = "Move lead history older than LEAD_HISTORY_HOT_DAYS to the archive table"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--days", type=int, default=settings.LEAD_HISTORY_HOT_DAYS, help="Archive history older than this many days")
+        parser.add_argument("--batch-size", type=int, default=ARCHIVE_BATCH_SIZE, help="Rows moved per transaction")
+
+    def handle(self, *args, **options):
+        before = timezone.now() - timedelta(days=options["days"])
+        archived = archive_lead_history(before, options["batch_size"])
+        self.stdout.write(self.style.SUCCESS(f"Archived {archived} lead history rows"))
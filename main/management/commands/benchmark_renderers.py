@@ -0,0 +1,65 @@
+from datetime import date
+from time import perf_counter
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+from main import models
+from main.api import renderers
+from main.api.serializers import LeadSerializer
+
+
+def sample_leads(count):
+    """
+    Up to count leads from the database, topped up with unsaved ones
+    """
+    leads = list(models.Lead.objects.select_related("type")[:count])
+    now = timezone.now()
+    lead_type = models.LeadType(name="Benchmark", created_at=now, updated_at=now)
+    for index in range(len(leads), count):
+        leads.append(models.Lead(
+            title=f"Lead {index}",
+            phone_number=f"+99890{index:07d}",
+            gender="male" if index % 2 else "female",
+            birth_date=date(1990, 1, 1),
+            description="Benchmark lead",
+            type=lead_type,
+            extra={"source": "benchmark", "tags": ["a", "b"], "score": index / 3},
+            order=index,
+            created_at=now,
+            updated_at=now,
+        ))
+    return leads
+
+
+class Command(BaseCommand):
+    help = "Compare the time and size of the API renderers on a page of serialized leads"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--leads", type=int, default=500, help="Leads per rendered page")
+        parser.add_argument("--repeat", type=int, default=200, help="Renders per renderer")
+
+    def handle(self, *args, **options):
+        data = {
+            "next": None,
+            "previous": None,
+            "results": LeadSerializer(sample_leads(options["leads"]), many=True).data,
+        }
+        candidates = [("DRF JSONRenderer", JSONRenderer()), ("ORJSONRenderer", renderers.ORJSONRenderer())]
+        try:
+            import msgpack  # noqa: F401
+        except ImportError:
+            self.stdout.write("msgpack is not installed, skipping MessagePackRenderer")
+        else:
+            candidates.append(("MessagePackRenderer", renderers.MessagePackRenderer()))
+
+        baseline = None
+        for name, renderer in candidates:
+            renderer.render(data, renderer.media_type)
+            start = perf_counter()
+            for _ in range(options["repeat"]):
+                body = renderer.render(data, renderer.media_type)
+            elapsed = (perf_counter() - start) * 1000 / options["repeat"]
+            baseline = baseline or elapsed
+            self.stdout.write(
+                f"{name:<20} {elapsed:8.3f} ms/op  {len(body):>9} bytes  {baseline / elapsed:5.1f}x"
+            )
@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+from main.api import services
+
+
+class Command(BaseCommand):
+    help = "Merge active leads that share a normalized phone number within a board"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--board", help="Only merge the leads of this board UUID")
+        parser.add_argument("--dry-run", action="store_true", help="Report duplicates without merging them")
+
+    def handle(self, *args, **options):
+        groups, merged = services.merge_duplicate_leads(board_uuid=options["board"], dry_run=options["dry_run"])
+        action = "Would merge" if options["dry_run"] else "Merged"
+        self.stdout.write(self.style.SUCCESS(f"{action} {merged} leads in {groups} duplicate groups"))
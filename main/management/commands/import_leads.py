@@ -0,0 +1,36 @@
+from django.core.management.base import BaseCommand, CommandError
+from main.api import services
+
+
+class Command(BaseCommand):
+    help = "Import leads from a CSV or NDJSON file"
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="Path to the CSV or NDJSON file")
+        parser.add_argument("--company", required=True, help="Company UUID the lead types belong to")
+        parser.add_argument("--format", choices=services.LEAD_IMPORT_FORMATS, help="File format, guessed from the extension by default")
+        parser.add_argument("--batch-size", type=int, default=services.LEAD_IMPORT_BATCH_SIZE, help="Rows per bulk insert")
+        parser.add_argument("--skip-duplicates", action="store_true", help="Skip rows whose phone number already exists in the board")
+
+    def handle(self, *args, **options):
+        file_format = options["format"] or services.guess_import_format(options["path"])
+        if file_format is None:
+            raise CommandError("Cannot guess the file format, pass --format")
+        if options["batch_size"] <= 0:
+            raise CommandError("--batch-size must be positive")
+
+        with open(options["path"], "rb") as stream:
+            rows = services.iter_import_rows(stream, file_format)
+            try:
+                report = services.import_leads(
+                    rows,
+                    options["company"],
+                    batch_size=options["batch_size"],
+                    skip_duplicates=options["skip_duplicates"],
+                )
+            except services.LeadImportError as exc:
+                raise CommandError(f"{exc} ({exc.report['created']} leads created before it)")
+
+        for error in report["errors"]:
+            self.stderr.write(f"Row {error['row']}: {error['errors']}")
+        self.stdout.write(self.style.SUCCESS(f"Created {report['created']} leads, {report['failed']} rows failed, {report['duplicates']} duplicates"))
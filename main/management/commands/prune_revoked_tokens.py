@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+from main.api.auth.tokens import PRUNE_BATCH_SIZE, prune_revoked_tokens
+
+
+class Command(BaseCommand):
+    help = "Delete revoked refresh tokens that have expired"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=PRUNE_BATCH_SIZE, help="Rows deleted per query")
+
+    def handle(self, *args, **options):
+        deleted = prune_revoked_tokens(options["batch_size"])
+        self.stdout.write(self.style.SUCCESS(f"Deleted {deleted} expired revoked tokens"))
@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+from main import models
+
+
+class Command(BaseCommand):
+    help = "Rebuild the denormalized lead cards from the lead tables"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--board", help="Only rebuild the cards of this board UUID")
+
+    def handle(self, *args, **options):
+        leads = models.Lead.objects.all()
+        if options["board"]:
+            leads = leads.filter(type__status__board__uuid=options["board"])
+
+        written = models.sync_lead_cards(leads)
+        self.stdout.write(self.style.SUCCESS(f"Wrote {written} lead cards"))
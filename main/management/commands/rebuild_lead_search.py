@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from main import search
+
+
+class Command(BaseCommand):
+    help = "Rebuild the lead full-text search index"
+
+    def handle(self, *args, **options):
+        if not search.search_available():
+            raise CommandError("Full-text search index is only available on SQLite")
+        with transaction.atomic():
+            chunks = search.rebuild_lead_search()
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt lead search index in {chunks} chunks"))
@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+from main import models
+
+
+class Command(BaseCommand):
+    help = "Recount the active leads of lead types and statuses whose counters drifted"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--board", help="Only reconcile the columns of this board UUID")
+
+    def handle(self, *args, **options):
+        lead_types = models.LeadType.objects.filter(is_active=True)
+        statuses = models.Status.objects.filter(is_active=True)
+        if options["board"]:
+            lead_types = lead_types.filter(status__board__uuid=options["board"])
+            statuses = statuses.filter(board__uuid=options["board"])
+
+        fixed_types, fixed_statuses = models.reconcile_lead_counts(lead_types, statuses)
+        self.stdout.write(self.style.SUCCESS(f"Fixed {fixed_types} lead types and {fixed_statuses} statuses"))
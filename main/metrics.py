@@ -0,0 +1,202 @@
+"""
+Per-view request metrics in the Prometheus text exposition format.
+
+MetricsMiddleware times every request and records, labelled by URL route
+and method: the latency, the number of SQL queries and the time spent in
+them, and the response size, as histograms, plus a request counter by
+status. SQL is counted by an execute wrapper installed once on every
+database connection. It only adds to the stats of the current request,
+which travel in a context variable so the queries of async views, run in
+sync_to_async threads, are counted too.
+
+Each process keeps its own totals. With METRICS["MULTIPROCESS_DIR"] set,
+every worker also writes them to <dir>/<pid>.json at most every
+FLUSH_INTERVAL seconds and on exit, and /api/metrics sums the files of all
+workers. Empty the directory when the server is restarted.
+"""
+import atexit
+import logging
+import os
+import threading
+from bisect import bisect_left
+from contextvars import ContextVar
+from pathlib import Path
+from time import monotonic, perf_counter
+import orjson
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+
+logger = logging.getLogger(__name__)
+
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+QUERY_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 250, 500)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216)
+
+HISTOGRAMS = {
+    "http_request_duration_seconds": ("Time spent handling a request", DURATION_BUCKETS),
+    "http_request_db_queries": ("SQL queries run by a request", QUERY_BUCKETS),
+    "http_request_db_duration_seconds": ("Time a request spent running SQL", DURATION_BUCKETS),
+    "http_response_size_bytes": ("Size of a response body", SIZE_BUCKETS),
+}
+COUNTERS = {
+    "http_requests_total": "Requests handled",
+}
+
+# [queries, seconds] of the request being handled
+sql_stats = ContextVar("sql_stats", default=None)
+
+
+def sql_wrapper(execute, sql, params, many, context):
+    stats = sql_stats.get()
+    if stats is None:
+        return execute(sql, params, many, context)
+    start = perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        stats[0] += 1
+        stats[1] += perf_counter() - start
+
+
+def _wrap_connection(sender, connection, **kwargs):
+    if sql_wrapper not in connection.execute_wrappers:
+        connection.execute_wrappers.append(sql_wrapper)
+
+
+def install():
+    connection_created.connect(_wrap_connection, dispatch_uid="main.metrics")
+    for connection in connections.all(initialized_only=True):
+        if connection.connection is not None:
+            _wrap_connection(None, connection)
+
+
+class Registry:
+    """
+    Totals of one process. A histogram row holds the count of every bucket
+    (the last one being +Inf), then the sum and the count of the values.
+    """
+
+    def __init__(self, directory=None, flush_interval=5):
+        self.directory = Path(directory) if directory else None
+        self.flush_interval = flush_interval
+        self._lock = threading.Lock()
+        self._rows = {}
+        self._flushed_at = monotonic()
+
+    def clear(self):
+        self._lock = threading.Lock()
+        self._rows = {}
+        self._flushed_at = monotonic()
+
+    def _observe(self, name, labels, value):
+        buckets = HISTOGRAMS[name][1]
+        row = self._rows.get((name, labels))
+        if row is None:
+            row = self._rows[(name, labels)] = [0] * (len(buckets) + 3)
+        row[bisect_left(buckets, value)] += 1
+        row[-2] += value
+        row[-1] += 1
+
+    def record_request(self, view, method, status, duration, queries, db_seconds, size):
+        labels = (("view", view), ("method", method))
+        with self._lock:
+            self._observe("http_request_duration_seconds", labels, duration)
+            self._observe("http_request_db_queries", labels, queries)
+            self._observe("http_request_db_duration_seconds", labels, db_seconds)
+            if size is not None:
+                self._observe("http_response_size_bytes", labels, size)
+            key = ("http_requests_total", labels + (("status", str(status)),))
+            self._rows[key] = self._rows.get(key, 0) + 1
+            flush = self.directory is not None and monotonic() - self._flushed_at >= self.flush_interval
+            if flush:
+                self._flushed_at = monotonic()
+        if flush:
+            self.flush()
+
+    def snapshot(self):
+        with self._lock:
+            return [
+                [name, labels, list(row) if isinstance(row, list) else row]
+                for (name, labels), row in self._rows.items()
+            ]
+
+    def flush(self):
+        """
+        Write the totals of this process to its file in the directory
+        """
+        if self.directory is None:
+            return
+        path = self.directory / f"{os.getpid()}.json"
+        temporary = path.with_suffix(".tmp")
+        try:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            temporary.write_bytes(orjson.dumps(self.snapshot()))
+            os.replace(temporary, path)
+        except OSError:
+            logger.exception("Could not write the metrics of process %s", os.getpid())
+
+    def collect(self):
+        """
+        Totals of this process, or of every process sharing the directory
+        """
+        if self.directory is None:
+            return {(name, tuple(map(tuple, labels))): row for name, labels, row in self.snapshot()}
+        self.flush()
+        totals = {}
+        for path in self.directory.glob("*.json"):
+            try:
+                rows = orjson.loads(path.read_bytes())
+            except (OSError, orjson.JSONDecodeError):
+                continue
+            for name, labels, row in rows:
+                key = (name, tuple(map(tuple, labels)))
+                total = totals.get(key)
+                if total is None:
+                    totals[key] = row
+                elif isinstance(row, list):
+                    totals[key] = [a + b for a, b in zip(total, row)]
+                else:
+                    totals[key] = total + row
+        return totals
+
+
+def _format_labels(labels):
+    def escape(value):
+        return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+    return "{" + ",".join(f'{key}="{escape(value)}"' for key, value in labels) + "}"
+
+
+def _format_number(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def render(totals):
+    """
+    Prometheus text exposition (version 0.0.4) of collected totals
+    """
+    lines = []
+    for name, help_text in COUNTERS.items():
+        lines += [f"# HELP {name} {help_text}", f"# TYPE {name} counter"]
+        for (metric, labels), value in sorted(totals.items()):
+            if metric == name:
+                lines.append(f"{name}{_format_labels(labels)} {_format_number(value)}")
+    for name, (help_text, buckets) in HISTOGRAMS.items():
+        lines += [f"# HELP {name} {help_text}", f"# TYPE {name} histogram"]
+        for (metric, labels), row in sorted(totals.items()):
+            if metric != name:
+                continue
+            cumulative = 0
+            for bound, count in zip((*map(str, buckets), "+Inf"), row):
+                cumulative += count
+                lines.append(f"{name}_bucket{_format_labels(labels + (('le', bound),))} {cumulative}")
+            lines.append(f"{name}_sum{_format_labels(labels)} {_format_number(row[-2])}")
+            lines.append(f"{name}_count{_format_labels(labels)} {row[-1]}")
+    return "\n".join(lines) + "\n"
+
+
+registry = Registry(settings.METRICS.get("MULTIPROCESS_DIR"), settings.METRICS.get("FLUSH_INTERVAL", 5))
+atexit.register(registry.flush)
+# Workers forked from a preloaded master start from empty totals
+os.register_at_fork(after_in_child=registry.clear)
@@ -0,0 +1,133 @@
+import logging
+from time import perf_counter
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.exceptions import InvalidToken
+from main import metrics, profiling
+from main.api.auth.authentication import JWTAuthentication
+
+logger = logging.getLogger(__name__)
+
+METHODS = {"GET", "HEAD", "POST", "PUT", "PATCH", "DELETE", "OPTIONS"}
+
+
+class MetricsMiddleware:
+    """
+    Record the latency, SQL queries, SQL time and response size of every
+    request in main.metrics. Put it first so the time of the other
+    middleware is included.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not settings.METRICS.get("ENABLED", True):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+        metrics.install()
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        stats = [0, 0.0]
+        token = metrics.sql_stats.set(stats)
+        start = perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            metrics.sql_stats.reset(token)
+        self.record(request, response, perf_counter() - start, stats)
+        return response
+
+    async def __acall__(self, request):
+        stats = [0, 0.0]
+        token = metrics.sql_stats.set(stats)
+        start = perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            metrics.sql_stats.reset(token)
+        self.record(request, response, perf_counter() - start, stats)
+        return response
+
+    def record(self, request, response, duration, stats):
+        # Label by route pattern, not path, so the series stay few
+        match = request.resolver_match
+        view = "/" + match.route if match is not None else "unmatched"
+        # The size of a streamed body is only known once it has been sent
+        size = None if response.streaming else len(response.content)
+        method = request.method if request.method in METHODS else "OTHER"
+        metrics.registry.record_request(
+            view, method, response.status_code, duration, stats[0], stats[1], size
+        )
+
+
+class ProfilingMiddleware:
+    """
+    Profile the requests of staff users that ask for it with main.profiling.
+    Put it after AuthenticationMiddleware. Users of the API are found from
+    their access token, only for requests that carry the flag.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not settings.PROFILING.get("ENABLED", False):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+        self.header = "HTTP_" + settings.PROFILING.get("HEADER", "X-Profile").upper().replace("-", "_")
+        self.query_param = settings.PROFILING.get("QUERY_PARAM", "profile")
+
+    def requested(self, request):
+        return self.header in request.META or self.query_param in request.GET
+
+    def is_staff(self, request):
+        if request.user.is_staff:
+            return True
+        try:
+            result = JWTAuthentication().authenticate(request)
+        except (InvalidToken, AuthenticationFailed):
+            return False
+        return result is not None and result[0].is_staff
+
+    async def ais_staff(self, request):
+        if (await request.auser()).is_staff:
+            return True
+        try:
+            result = await JWTAuthentication().aauthenticate(request)
+        except (InvalidToken, AuthenticationFailed):
+            return False
+        return result is not None and result[0].is_staff
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        if not self.requested(request) or not self.is_staff(request):
+            return self.get_response(request)
+        with profiling.Profile(settings.PROFILING.get("INTERVAL", 0.005)) as profile:
+            response = self.get_response(request)
+        return self.finish(profile, request, response)
+
+    async def __acall__(self, request):
+        if not self.requested(request) or not await self.ais_staff(request):
+            return await self.get_response(request)
+        async with profiling.Profile(settings.PROFILING.get("INTERVAL", 0.005)) as profile:
+            response = await self.get_response(request)
+        return self.finish(profile, request, response)
+
+    def finish(self, profile, request, response):
+        try:
+            profile.dump(settings.PROFILING["DIRECTORY"], request, response)
+        except OSError:
+            logger.exception("Could not write profile %s", profile.id)
+        else:
+            response["X-Profile-Id"] = profile.id
+        return response
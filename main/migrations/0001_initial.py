@@ -0,0 +1,115 @@
+# Generated by Django 5.1.6 on 2026-10-18 06:34
+
+import django.db.models.deletion
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Board',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('uuid', models.UUIDField(default=uuid.uuid4, editable=False, unique=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('is_active', models.BooleanField(default=True)),
+                ('company_uuid', models.CharField(blank=True, max_length=200, null=True)),
+                ('name', models.CharField(max_length=100)),
+            ],
+            options={
+                'verbose_name': 'Board',
+                'verbose_name_plural': 'Boards',
+                'ordering': ['-created_at'],
+            },
+        ),
+        migrations.CreateModel(
+            name='LeadType',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('uuid', models.UUIDField(default=uuid.uuid4, editable=False, unique=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('is_active', models.BooleanField(default=True)),
+                ('name', models.CharField(max_length=100)),
+                ('description', models.TextField(default='null')),
+                ('order', models.IntegerField(default=0)),
+            ],
+            options={
+                'verbose_name': 'Lead Type',
+                'verbose_name_plural': 'Lead Types',
+                'ordering': ['order', '-created_at'],
+            },
+        ),
+        migrations.CreateModel(
+            name='Lead',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('uuid', models.UUIDField(default=uuid.uuid4, editable=False, unique=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('is_active', models.BooleanField(default=True)),
+                ('title', models.CharField(max_length=100)),
+                ('phone_number', models.CharField(blank=True, max_length=100, null=True)),
+                ('gender', models.CharField(blank=True, choices=[('male', 'Male'), ('female', 'Female')], max_length=100, null=True)),
+                ('birth_date', models.DateField(blank=True, null=True)),
+                ('description', models.CharField(default='null', max_length=300)),
+                ('extra', models.JSONField(blank=True, default=dict, null=True)),
+                ('order', models.IntegerField(default=0)),
+                ('type', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='main.leadtype')),
+            ],
+            options={
+                'verbose_name': 'Lead',
+                'verbose_name_plural': 'Leads',
+                'ordering': ['order', '-created_at'],
+            },
+        ),
+        migrations.CreateModel(
+            name='Status',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('uuid', models.UUIDField(default=uuid.uuid4, editable=False, unique=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('is_active', models.BooleanField(default=True)),
+                ('name', models.CharField(max_length=100)),
+                ('order', models.IntegerField(default=0)),
+                ('board', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='main.board')),
+            ],
+            options={
+                'verbose_name': 'Status',
+                'verbose_name_plural': 'Statuses',
+                'ordering': ['order', '-created_at'],
+            },
+        ),
+        migrations.AddField(
+            model_name='leadtype',
+            name='status',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='leadtypes', to='main.status'),
+        ),
+        migrations.CreateModel(
+            name='LeadHistory',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('uuid', models.UUIDField(default=uuid.uuid4, editable=False, unique=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('is_active', models.BooleanField(default=True)),
+                ('lead', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='main.lead')),
+                ('lead_type', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='main.leadtype')),
+                ('status', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='main.status')),
+            ],
+            options={
+                'verbose_name': 'Lead History',
+                'verbose_name_plural': 'Lead Histories',
+                'ordering': ['-created_at'],
+            },
+        ),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 5.1.6 on 2026-10-18 06:34
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='board',
+            index=models.Index(fields=['company_uuid', 'is_active'], name='board_company_active_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='lead',
+            index=models.Index(fields=['type', 'is_active', 'order'], name='lead_type_active_order_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='lead',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['type', 'order', '-created_at', '-id'], name='lead_active_type_order_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='leadhistory',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['-created_at', '-id'], name='leadhistory_active_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='leadtype',
+            index=models.Index(fields=['status', 'is_active', 'order'], name='leadtype_status_active_ord_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='status',
+            index=models.Index(fields=['board', 'is_active', 'order'], name='status_board_active_order_idx'),
+        ),
+    ]
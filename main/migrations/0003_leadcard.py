@@ -0,0 +1,43 @@
+# Generated by Django 5.1.6 on 2026-10-18 06:35
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0002_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LeadCard',
+            fields=[
+                ('lead', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='card', serialize=False, to='main.lead')),
+                ('uuid', models.UUIDField(unique=True)),
+                ('created_at', models.DateTimeField()),
+                ('updated_at', models.DateTimeField()),
+                ('is_active', models.BooleanField(default=True)),
+                ('title', models.CharField(max_length=100)),
+                ('phone_number', models.CharField(blank=True, max_length=100, null=True)),
+                ('gender', models.CharField(blank=True, max_length=100, null=True)),
+                ('birth_date', models.DateField(blank=True, null=True)),
+                ('description', models.CharField(default='null', max_length=300)),
+                ('extra', models.JSONField(blank=True, default=dict, null=True)),
+                ('order', models.IntegerField(default=0)),
+                ('type_uuid', models.UUIDField(db_index=True)),
+                ('type_name', models.CharField(max_length=100)),
+                ('status_uuid', models.UUIDField(db_index=True)),
+                ('status_name', models.CharField(max_length=100)),
+                ('board_uuid', models.UUIDField(db_index=True)),
+                ('company_uuid', models.CharField(blank=True, max_length=200, null=True)),
+            ],
+            options={
+                'verbose_name': 'Lead Card',
+                'verbose_name_plural': 'Lead Cards',
+                'ordering': ['order', '-created_at'],
+                'indexes': [models.Index(condition=models.Q(('is_active', True)), fields=['company_uuid', 'order', '-created_at', '-lead'], name='leadcard_active_company_idx')],
+            },
+        ),
+    ]
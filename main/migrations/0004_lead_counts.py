@@ -0,0 +1,40 @@
+# Generated by Django 5.1.6 on 2026-10-18 06:37
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def count_leads(apps, schema_editor):
+    Lead = apps.get_model('main', 'Lead')
+    LeadType = apps.get_model('main', 'LeadType')
+    Status = apps.get_model('main', 'Status')
+
+    type_counts = Lead.objects.filter(is_active=True, type=OuterRef('pk')).order_by().values('type')
+    type_counts = type_counts.annotate(count=Count('pk')).values('count')
+    LeadType.objects.filter(is_active=True).update(lead_count=Coalesce(Subquery(type_counts), 0))
+
+    status_counts = Lead.objects.filter(is_active=True, type__status=OuterRef('pk')).order_by().values('type__status')
+    status_counts = status_counts.annotate(count=Count('pk')).values('count')
+    Status.objects.filter(is_active=True).update(lead_count=Coalesce(Subquery(status_counts), 0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0003_leadcard'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='leadtype',
+            name='lead_count',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='status',
+            name='lead_count',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.RunPython(count_leads, migrations.RunPython.noop),
+    ]
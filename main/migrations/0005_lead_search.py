@@ -0,0 +1,41 @@
+from django.db import migrations
+
+
+def create_search_table(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    schema_editor.execute(
+        "CREATE VIRTUAL TABLE IF NOT EXISTS main_lead_search "
+        "USING fts5(title, phone, description, extra, tokenize='trigram')"
+    )
+    schema_editor.execute(
+        """
+        INSERT INTO main_lead_search (rowid, title, phone, description, extra)
+        SELECT
+            lead.id,
+            lead.title,
+            replace(replace(replace(replace(replace(
+                coalesce(lead.phone_number, ''), ' ', ''), '-', ''), '+', ''), '(', ''), ')', ''),
+            lead.description,
+            (SELECT group_concat(value, ' ') FROM json_tree(lead.extra) WHERE atom IS NOT NULL)
+        FROM main_lead AS lead
+        WHERE lead.is_active
+        """
+    )
+
+
+def drop_search_table(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    schema_editor.execute("DROP TABLE IF EXISTS main_lead_search")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0004_lead_counts'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_table, drop_search_table),
+    ]
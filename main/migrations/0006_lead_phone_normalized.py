@@ -0,0 +1,37 @@
+# Generated by Django 5.1.6 on 2026-10-18 06:40
+
+from django.db import migrations, models
+from main.phones import normalize_phone
+
+
+def normalize_phones(apps, schema_editor):
+    Lead = apps.get_model('main', 'Lead')
+    batch = []
+    leads = Lead.objects.exclude(phone_number__isnull=True).exclude(phone_number='').only('pk', 'phone_number')
+    for lead in leads.iterator(chunk_size=2000):
+        lead.phone_normalized = normalize_phone(lead.phone_number)
+        batch.append(lead)
+        if len(batch) >= 2000:
+            Lead.objects.bulk_update(batch, ['phone_normalized'])
+            batch = []
+    Lead.objects.bulk_update(batch, ['phone_normalized'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0005_lead_search'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='lead',
+            name='phone_normalized',
+            field=models.CharField(blank=True, editable=False, max_length=32, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='lead',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['phone_normalized'], name='lead_active_phone_idx'),
+        ),
+        migrations.RunPython(normalize_phones, migrations.RunPython.noop),
+    ]
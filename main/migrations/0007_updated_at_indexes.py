@@ -0,0 +1,25 @@
+# Generated by Django 5.1.6 on 2026-10-18 06:45
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0006_lead_phone_normalized'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='lead',
+            index=models.Index(fields=['type', 'updated_at'], name='lead_type_updated_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='leadtype',
+            index=models.Index(fields=['status', 'updated_at'], name='leadtype_status_updated_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='status',
+            index=models.Index(fields=['board', 'updated_at'], name='status_board_updated_idx'),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.1.6 on 2026-10-18 06:58
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0008_revokedtoken'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='leadhistory',
+            index=models.Index(fields=['status', 'created_at'], name='leadhistory_status_created_idx'),
+        ),
+    ]
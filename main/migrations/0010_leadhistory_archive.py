@@ -0,0 +1,48 @@
+# Generated by Django 5.1.6 on 2026-10-18 07:00
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0009_leadhistory_status_created_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LeadHistorySummary',
+            fields=[
+                ('lead', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='history_summary', serialize=False, to='main.lead')),
+                ('archived_count', models.IntegerField(default=0)),
+                ('first_at', models.DateTimeField()),
+                ('last_at', models.DateTimeField()),
+                ('last_lead_type', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='main.leadtype')),
+                ('last_status', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='main.status')),
+            ],
+            options={
+                'verbose_name': 'Lead History Summary',
+                'verbose_name_plural': 'Lead History Summaries',
+            },
+        ),
+        migrations.CreateModel(
+            name='LeadHistoryArchive',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('uuid', models.UUIDField(unique=True)),
+                ('created_at', models.DateTimeField()),
+                ('updated_at', models.DateTimeField()),
+                ('is_active', models.BooleanField(default=True)),
+                ('lead', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='main.lead')),
+                ('lead_type', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='main.leadtype')),
+                ('status', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='main.status')),
+            ],
+            options={
+                'verbose_name': 'Lead History Archive',
+                'verbose_name_plural': 'Lead History Archive',
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['-created_at', '-id'], name='leadhistoryarch_created_idx'), models.Index(fields=['status', 'created_at'], name='leadhistoryarch_status_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,47 @@
+# Generated by Django 5.1.6 on 2026-10-18 09:10
+
+from django.db import migrations
+from django.db.models import OuterRef, Subquery
+
+
+def add_entries(apps, schema_editor):
+    """
+    Give every active lead without history a row for the type it is in,
+    dated at its creation, so its first stay shows in the funnel
+    """
+    Lead = apps.get_model('main', 'Lead')
+    LeadHistory = apps.get_model('main', 'LeadHistory')
+    LeadHistoryArchive = apps.get_model('main', 'LeadHistoryArchive')
+
+    leads = (
+        Lead.objects.filter(is_active=True)
+        .exclude(pk__in=LeadHistory.objects.values('lead_id'))
+        .exclude(pk__in=LeadHistoryArchive.objects.values('lead_id'))
+        .select_related('type')
+        .only('pk', 'type_id', 'type__status_id')
+    )
+    # created_at is auto_now_add, so it is copied from the lead afterwards
+    created_at = Lead.objects.filter(pk=OuterRef('lead_id')).values('created_at')[:1]
+
+    def write(batch):
+        rows = LeadHistory.objects.bulk_create(batch)
+        LeadHistory.objects.filter(pk__in=[row.pk for row in rows]).update(created_at=Subquery(created_at))
+
+    batch = []
+    for lead in leads.iterator(chunk_size=2000):
+        batch.append(LeadHistory(lead_id=lead.pk, lead_type_id=lead.type_id, status_id=lead.type.status_id))
+        if len(batch) >= 2000:
+            write(batch)
+            batch = []
+    write(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0010_leadhistory_archive'),
+    ]
+
+    operations = [
+        migrations.RunPython(add_entries, migrations.RunPython.noop),
+    ]
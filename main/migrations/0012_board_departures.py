@@ -0,0 +1,30 @@
+# Generated by Django 5.1.6 on 2026-10-18 10:05
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0011_lead_history_entries'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BoardDeparture',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('status', 'Status'), ('leadtype', 'Lead Type'), ('lead', 'Lead')], max_length=20)),
+                ('uuid', models.UUIDField()),
+                ('departed_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('board', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='departures', to='main.board')),
+            ],
+            options={
+                'verbose_name': 'Board Departure',
+                'verbose_name_plural': 'Board Departures',
+                'indexes': [models.Index(fields=['board', 'departed_at'], name='boarddeparture_board_idx')],
+            },
+        ),
+    ]
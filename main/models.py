@@ -1,5 +1,12 @@
-from django.db import models
+from itertools import islice
+from django.conf import settings
+from django.db import models, transaction
+from django.db.models import Count, F, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
+from django.utils import timezone
 from uuid import uuid4
+from main import caching, events
+from main.phones import normalize_phone
 
 
 class BaseModel(models.Model):
@@ -7,7 +14,38 @@ class BaseModel(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     is_active = models.BooleanField(default=True)
-    
+
+    # Fields only ever changed with set-based UPDATEs, never written by save()
+    counter_fields = ()
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_values = dict(zip(field_names, values))
+        return instance
+
+    def refresh_from_db(self, using=None, fields=None, from_queryset=None):
+        super().refresh_from_db(using=using, fields=fields, from_queryset=from_queryset)
+        # save() compares with the values last read from the database
+        loaded = getattr(self, "_loaded_values", {})
+        for field in self._meta.concrete_fields:
+            if fields is None or field.attname in fields or field.name in fields:
+                loaded[field.attname] = getattr(self, field.attname)
+        self._loaded_values = loaded
+
+    def save(self, *args, **kwargs):
+        if self.counter_fields and not self._state.adding and kwargs.get("update_fields") is None:
+            kwargs["update_fields"] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name not in self.counter_fields
+            ]
+        with transaction.atomic():
+            if not self.is_active and not self._state.adding:
+                # Deactivate while the row is still active in the database, so
+                # the leads it held are taken off the counters of its parents
+                deactivate(type(self).objects.filter(pk=self.pk))
+            super().save(*args, **kwargs)
+        self._loaded_values = {field.attname: getattr(self, field.attname) for field in self._meta.concrete_fields}
 
     class Meta:
         abstract = True
@@ -18,37 +56,56 @@ class Board(BaseModel):
     name = models.CharField(max_length=100)
 
     def save(self, *args, **kwargs):
-        if self.company_uuid == False:
-            statuses = Status.objects.filter(board=self)
-            for status in statuses:
-                status.is_active = False
-                status.save()
-        super().save(*args, **kwargs)
+        loaded_company_uuid = getattr(self, "_loaded_values", {}).get("company_uuid", self.company_uuid)
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            if settings.LEAD_CARDS_ENABLED:
+                LeadCard.objects.filter(board_uuid=self.uuid).update(company_uuid=self.company_uuid)
+            boards = [(self.uuid, self.company_uuid), (self.uuid, loaded_company_uuid)]
+            transaction.on_commit(lambda: caching.bump_versions(boards))
+            transaction.on_commit(lambda: events.publish_board_changes(boards))
 
     class Meta:
         verbose_name = "Board"
         verbose_name_plural = "Boards"
         ordering = ["-created_at"]
+        indexes = [
+            models.Index(fields=["company_uuid", "is_active"], name="board_company_active_idx"),
+        ]
 
 
 class Status(BaseModel):
     name = models.CharField(max_length=100)
     board = models.ForeignKey(Board, on_delete=models.CASCADE)
     order = models.IntegerField(default=0)
+    lead_count = models.IntegerField(default=0)
 
-    def save(self, *args, **kwargs):
-        if self.board == False:
-            leadtypes = LeadType.objects.filter(status=self)
-            for leadtype in leadtypes:
-                leadtype.is_active = False
-                leadtype.save()
-        super().save(*args, **kwargs)
+    counter_fields = ("lead_count",)
 
+    def save(self, *args, **kwargs):
+        loaded = getattr(self, "_loaded_values", {})
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            if settings.LEAD_CARDS_ENABLED:
+                board = Board.objects.values("uuid", "company_uuid").get(pk=self.board_id)
+                LeadCard.objects.filter(status_uuid=self.uuid).update(
+                    status_name=self.name,
+                    board_uuid=board["uuid"],
+                    company_uuid=board["company_uuid"],
+                )
+            old_board_id = loaded.get("board_id", self.board_id)
+            if old_board_id != self.board_id:
+                moved_boards(Status.objects.filter(pk=self.pk), old_board_id)
+            invalidate_boards(Board.objects.filter(pk__in=[self.board_id, old_board_id]))
 
     class Meta:
         verbose_name = "Status"
         verbose_name_plural = "Statuses"
         ordering = ["order", "-created_at"]
+        indexes = [
+            models.Index(fields=["board", "is_active", "order"], name="status_board_active_order_idx"),
+            models.Index(fields=["board", "updated_at"], name="status_board_updated_idx"),
+        ]
 
 
 class LeadType(BaseModel):
@@ -56,24 +113,49 @@ class LeadType(BaseModel):
     status = models.ForeignKey(Status, on_delete=models.CASCADE, related_name="leadtypes")
     description = models.TextField(default="null")
     order = models.IntegerField(default=0)
+    lead_count = models.IntegerField(default=0)
 
-    def save(self, *args, **kwargs):
-        if self.status == False:
-            leads = Lead.objects.filter(type=self)
-            for lead in leads:
-                lead.is_active = False
-                lead.save()
+    counter_fields = ("lead_count",)
 
-        super().save(*args, **kwargs)
+    def save(self, *args, **kwargs):
+        adding = self._state.adding
+        loaded = getattr(self, "_loaded_values", {})
+        old_status_id = loaded.get("status_id", self.status_id) if loaded.get("is_active", self.is_active) else None
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            new_status_id = self.status_id if self.is_active else None
+            if not adding and old_status_id and new_status_id and old_status_id != new_status_id:
+                moved = Subquery(LeadType.objects.filter(pk=self.pk).values("lead_count"))
+                Status.objects.filter(pk=old_status_id).update(lead_count=F("lead_count") - moved)
+                Status.objects.filter(pk=new_status_id).update(lead_count=F("lead_count") + moved)
+            if settings.LEAD_CARDS_ENABLED:
+                status = Status.objects.values("uuid", "name", "board__uuid", "board__company_uuid").get(pk=self.status_id)
+                LeadCard.objects.filter(type_uuid=self.uuid).update(
+                    type_name=self.name,
+                    status_uuid=status["uuid"],
+                    status_name=status["name"],
+                    board_uuid=status["board__uuid"],
+                    company_uuid=status["board__company_uuid"],
+                )
+            if loaded.get("status_id", self.status_id) != self.status_id:
+                boards = dict(Status.objects.filter(pk__in=[loaded["status_id"], self.status_id]).values_list("pk", "board_id"))
+                if boards[loaded["status_id"]] != boards[self.status_id]:
+                    moved_boards(LeadType.objects.filter(pk=self.pk), boards[loaded["status_id"]])
+            invalidate_boards(Board.objects.filter(status__in=[self.status_id, loaded.get("status_id", self.status_id)]))
 
     class Meta:
         verbose_name = "Lead Type"
         verbose_name_plural = "Lead Types"
         ordering = ["order", "-created_at"]
+        indexes = [
+            models.Index(fields=["status", "is_active", "order"], name="leadtype_status_active_ord_idx"),
+            models.Index(fields=["status", "updated_at"], name="leadtype_status_updated_idx"),
+        ]
 
 class Lead(BaseModel):
     title = models.CharField(max_length=100)
     phone_number = models.CharField(max_length=100, null=True, blank=True)
+    phone_normalized = models.CharField(max_length=32, null=True, blank=True, editable=False)
     gender = models.CharField(
         choices=[
             ("male", "Male"),
@@ -89,10 +171,48 @@ class Lead(BaseModel):
     extra = models.JSONField(default=dict, null=True, blank=True)
     order = models.IntegerField(default=0)
 
+    def save(self, *args, **kwargs):
+        self.phone_normalized = normalize_phone(self.phone_number)
+        if kwargs.get("update_fields") is not None and "phone_number" in kwargs["update_fields"]:
+            kwargs["update_fields"] = [*kwargs["update_fields"], "phone_normalized"]
+        adding = self._state.adding
+        loaded = getattr(self, "_loaded_values", {})
+        if adding:
+            old_type_id = None
+        else:
+            old_type_id = loaded.get("type_id", self.type_id) if loaded.get("is_active", self.is_active) else None
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            # Deactivation already released the lead in BaseModel.save
+            new_type_id = self.type_id if self.is_active else None
+            if new_type_id is not None and old_type_id != new_type_id:
+                change_lead_count(old_type_id, -1)
+                change_lead_count(new_type_id, 1)
+            if loaded.get("type_id", self.type_id) != self.type_id:
+                boards = dict(LeadType.objects.filter(pk__in=[loaded["type_id"], self.type_id]).values_list("pk", "status__board_id"))
+                if boards[loaded["type_id"]] != boards[self.type_id]:
+                    moved_boards(Lead.objects.filter(pk=self.pk), boards[loaded["type_id"]])
+                invalidate_boards(Board.objects.filter(pk=boards[loaded["type_id"]]))
+            leads_changed(Lead.objects.filter(pk=self.pk), fields=kwargs.get("update_fields"))
+
     class Meta:
         verbose_name = "Lead"
         verbose_name_plural = "Leads"
         ordering = ["order", "-created_at"]
+        indexes = [
+            models.Index(fields=["type", "is_active", "order"], name="lead_type_active_order_idx"),
+            models.Index(fields=["type", "updated_at"], name="lead_type_updated_idx"),
+            models.Index(
+                fields=["type", "order", "-created_at", "-id"],
+                condition=models.Q(is_active=True),
+                name="lead_active_type_order_idx",
+            ),
+            models.Index(
+                fields=["phone_normalized"],
+                condition=models.Q(is_active=True),
+                name="lead_active_phone_idx",
+            ),
+        ]
 
 
 class LeadHistory(BaseModel):
@@ -104,21 +224,366 @@ class LeadHistory(BaseModel):
         verbose_name = "Lead History"
         verbose_name_plural = "Lead Histories"
         ordering = ["-created_at"]
+        indexes = [
+            models.Index(
+                fields=["-created_at", "-id"],
+                condition=models.Q(is_active=True),
+                name="leadhistory_active_created_idx",
+            ),
+            models.Index(fields=["status", "created_at"], name="leadhistory_status_created_idx"),
+        ]
+
+
+class LeadHistoryArchive(models.Model):
+    """
+    LeadHistory rows older than settings.LEAD_HISTORY_HOT_DAYS, moved here
+    by archive_lead_history with their original id so hot and archived
+    rows interleave in one (created_at, id) order. Same columns as
+    LeadHistory, so the same serializer reads both.
+    """
+    id = models.BigIntegerField(primary_key=True)
+    uuid = models.UUIDField(unique=True)
+    created_at = models.DateTimeField()
+    updated_at = models.DateTimeField()
+    is_active = models.BooleanField(default=True)
+    lead = models.ForeignKey(Lead, on_delete=models.CASCADE)
+    status = models.ForeignKey(Status, on_delete=models.CASCADE)
+    lead_type = models.ForeignKey(LeadType, on_delete=models.CASCADE)
 
+    class Meta:
+        verbose_name = "Lead History Archive"
+        verbose_name_plural = "Lead History Archive"
+        ordering = ["-created_at"]
+        indexes = [
+            models.Index(fields=["-created_at", "-id"], name="leadhistoryarch_created_idx"),
+            models.Index(fields=["status", "created_at"], name="leadhistoryarch_status_idx"),
+        ]
+
+
+class LeadHistorySummary(models.Model):
+    """
+    What archiving took out of the hot table for one lead: how many
+    transitions and the first and last of them
+    """
+    lead = models.OneToOneField(Lead, on_delete=models.CASCADE, primary_key=True, related_name="history_summary")
+    archived_count = models.IntegerField(default=0)
+    first_at = models.DateTimeField()
+    last_at = models.DateTimeField()
+    last_status = models.ForeignKey(Status, on_delete=models.CASCADE, related_name="+")
+    last_lead_type = models.ForeignKey(LeadType, on_delete=models.CASCADE, related_name="+")
 
+    class Meta:
+        verbose_name = "Lead History Summary"
+        verbose_name_plural = "Lead History Summaries"
+
+
+class LeadCard(models.Model):
+    """
+    Denormalized copy of a lead with its type, status, board and company,
+    so tenant lead listings read a single table.
+    Only maintained when settings.LEAD_CARDS_ENABLED is True.
+    """
+    lead = models.OneToOneField(Lead, on_delete=models.CASCADE, primary_key=True, related_name="card")
+    uuid = models.UUIDField(unique=True)
+    created_at = models.DateTimeField()
+    updated_at = models.DateTimeField()
+    is_active = models.BooleanField(default=True)
+    title = models.CharField(max_length=100)
+    phone_number = models.CharField(max_length=100, null=True, blank=True)
+    gender = models.CharField(max_length=100, null=True, blank=True)
+    birth_date = models.DateField(null=True, blank=True)
+    description = models.CharField(max_length=300, default="null")
+    extra = models.JSONField(default=dict, null=True, blank=True)
+    order = models.IntegerField(default=0)
+    type_uuid = models.UUIDField(db_index=True)
+    type_name = models.CharField(max_length=100)
+    status_uuid = models.UUIDField(db_index=True)
+    status_name = models.CharField(max_length=100)
+    board_uuid = models.UUIDField(db_index=True)
+    company_uuid = models.CharField(max_length=200, null=True, blank=True)
 
+    class Meta:
+        verbose_name = "Lead Card"
+        verbose_name_plural = "Lead Cards"
+        ordering = ["order", "-created_at"]
+        indexes = [
+            models.Index(
+                fields=["company_uuid", "order", "-created_at", "-lead"],
+                condition=models.Q(is_active=True),
+                name="leadcard_active_company_idx",
+            ),
+        ]
+
+
+class BoardDeparture(models.Model):
+    """
+    A status, lead type or lead that moved off a board, so the changes
+    feed of the board can report it as removed. Written by moved_boards.
+    """
+    board = models.ForeignKey(Board, on_delete=models.CASCADE, related_name="departures")
+    kind = models.CharField(
+        choices=[
+            ("status", "Status"),
+            ("leadtype", "Lead Type"),
+            ("lead", "Lead"),
+        ],
+        max_length=20,
+    )
+    uuid = models.UUIDField()
+    departed_at = models.DateTimeField(default=timezone.now)
 
+    class Meta:
+        verbose_name = "Board Departure"
+        verbose_name_plural = "Board Departures"
+        indexes = [
+            models.Index(fields=["board", "departed_at"], name="boarddeparture_board_idx"),
+        ]
+
+
+class RevokedToken(models.Model):
+    """
+    JTI of a refresh token that was rotated or revoked. Rows are only needed
+    until the token would have expired anyway, so prune_revoked_tokens
+    deletes them by expires_at and the table stays small.
+    """
+    jti = models.CharField(max_length=64, primary_key=True)
+    expires_at = models.DateTimeField(db_index=True)
 
-
-
-
-
-
-
-
-
-
-
-
-
-
+    class Meta:
+        verbose_name = "Revoked Token"
+        verbose_name_plural = "Revoked Tokens"
+
+
+LEAD_CARD_CHUNK_SIZE = 2000
+LEAD_CARD_COLUMNS = (
+    ("uuid", "uuid"),
+    ("created_at", "created_at"),
+    ("updated_at", "updated_at"),
+    ("is_active", "is_active"),
+    ("title", "title"),
+    ("phone_number", "phone_number"),
+    ("gender", "gender"),
+    ("birth_date", "birth_date"),
+    ("description", "description"),
+    ("extra", "extra"),
+    ("order", "order"),
+    ("type_uuid", "type__uuid"),
+    ("type_name", "type__name"),
+    ("status_uuid", "type__status__uuid"),
+    ("status_name", "type__status__name"),
+    ("board_uuid", "type__status__board__uuid"),
+    ("company_uuid", "type__status__board__company_uuid"),
+)
+
+
+def sync_lead_cards(leads):
+    """
+    Upsert the cards of a lead queryset from one joined query,
+    written in chunks of LEAD_CARD_CHUNK_SIZE.
+    Returns the number of cards written.
+    """
+    names = [name for name, _ in LEAD_CARD_COLUMNS]
+    rows = leads.order_by().values_list("pk", *[lookup for _, lookup in LEAD_CARD_COLUMNS])
+    rows = rows.iterator(chunk_size=LEAD_CARD_CHUNK_SIZE)
+    written = 0
+    while True:
+        chunk = list(islice(rows, LEAD_CARD_CHUNK_SIZE))
+        if not chunk:
+            return written
+        LeadCard.objects.bulk_create(
+            [LeadCard(lead_id=row[0], **dict(zip(names, row[1:]))) for row in chunk],
+            update_conflicts=True,
+            unique_fields=["lead"],
+            update_fields=names,
+        )
+        written += len(chunk)
+
+
+def leads_changed(leads, fields=None):
+    """
+    Refresh the data derived from leads after they were written.
+    Lead.save calls it; bulk writes (bulk_create, bulk_update, update)
+    must call it with a queryset of the written leads and, when known,
+    the names of the fields they changed.
+    """
+    from main import search
+
+    if settings.LEAD_CARDS_ENABLED:
+        sync_lead_cards(leads)
+    invalidate_boards(Board.objects.filter(status__leadtypes__lead__in=leads.values("pk")))
+    if fields is None or set(fields) & set(search.SEARCH_FIELDS) or "is_active" in fields:
+        search.sync_lead_search(leads)
+
+
+def invalidate_boards(boards):
+    """
+    Drop the cached responses of a board queryset, and of their companies,
+    and notify the subscribers of the boards once the current transaction commits
+    """
+    rows = list(boards.order_by().distinct().values_list("uuid", "company_uuid"))
+    if rows:
+        transaction.on_commit(lambda: caching.bump_versions(rows))
+        transaction.on_commit(lambda: events.publish_board_changes(rows))
+
+
+def moved_boards(queryset, old_board_id):
+    """
+    Record that the rows of a Status, LeadType or Lead queryset left a
+    board, with their lead types and leads, for the changes feed of the
+    board. The children get a new updated_at, so the changes feed of the
+    board they moved to lists them too.
+    """
+    now = timezone.now()
+    roots = queryset.values("pk")
+    rows = [(queryset.model, queryset)] + [
+        (model, model.objects.filter(**{lookup + "__in": roots}))
+        for model, lookup in CASCADE[queryset.model] if model in (LeadType, Lead)
+    ]
+    for model, rows_of_model in rows:
+        BoardDeparture.objects.bulk_create([
+            BoardDeparture(board_id=old_board_id, kind=DEPARTURE_KINDS[model], uuid=uuid, departed_at=now)
+            for uuid in rows_of_model.values_list("uuid", flat=True)
+        ])
+        if model is not queryset.model:
+            rows_of_model.update(updated_at=now)
+
+
+def change_lead_count(lead_type_id, delta):
+    """
+    Add delta to the lead counters of a lead type and of its status
+    """
+    if lead_type_id is None or not delta:
+        return
+    LeadType.objects.filter(pk=lead_type_id).update(lead_count=F("lead_count") + delta)
+    Status.objects.filter(leadtypes=lead_type_id).update(lead_count=F("lead_count") + delta)
+
+
+def reconcile_lead_counts(lead_types=None, statuses=None):
+    """
+    Recount the active leads of lead types and statuses whose counters
+    drifted. Returns the number of lead types and statuses fixed.
+    """
+    if lead_types is None:
+        lead_types = LeadType.objects.all()
+    if statuses is None:
+        statuses = Status.objects.all()
+
+    type_counts = Lead.objects.filter(is_active=True, type=OuterRef("pk")).order_by().values("type")
+    type_counts = type_counts.annotate(count=Count("pk")).values("count")
+    drifted_types = lead_types.annotate(actual=Coalesce(Subquery(type_counts), 0)).exclude(lead_count=F("actual"))
+    fixed_types = LeadType.objects.filter(pk__in=list(drifted_types.values_list("pk", flat=True)))
+    fixed_types = fixed_types.update(lead_count=Coalesce(Subquery(type_counts), 0))
+
+    status_counts = Lead.objects.filter(is_active=True, type__status=OuterRef("pk")).order_by().values("type__status")
+    status_counts = status_counts.annotate(count=Count("pk")).values("count")
+    drifted_statuses = statuses.annotate(actual=Coalesce(Subquery(status_counts), 0)).exclude(lead_count=F("actual"))
+    fixed_statuses = Status.objects.filter(pk__in=list(drifted_statuses.values_list("pk", flat=True)))
+    fixed_statuses = fixed_statuses.update(lead_count=Coalesce(Subquery(status_counts), 0))
+
+    return fixed_types, fixed_statuses
+
+
+def _release_lead_counts(queryset, roots):
+    """
+    Take the active leads deactivated with the rows of queryset off the
+    counters of the parent columns that stay active. Columns that are
+    deactivated themselves are reset to zero by deactivate().
+    """
+    if queryset.model is Lead:
+        groups = Lead.objects.filter(is_active=True, pk__in=roots).values("type_id").annotate(count=Count("pk"))
+        for group in groups:
+            change_lead_count(group["type_id"], -group["count"])
+    elif queryset.model is LeadType:
+        groups = LeadType.objects.filter(is_active=True, pk__in=roots).values("status_id").annotate(count=Sum("lead_count"))
+        for group in groups:
+            Status.objects.filter(pk=group["status_id"]).update(lead_count=F("lead_count") - group["count"])
+
+
+def _remove_lead_search(queryset, roots):
+    from main import search
+
+    if queryset.model is Lead:
+        search.remove_lead_search(Lead.objects.filter(pk__in=roots))
+    elif Lead in dict(CASCADE[queryset.model]):
+        search.remove_lead_search(Lead.objects.filter(**{dict(CASCADE[queryset.model])[Lead] + "__in": roots}))
+
+
+# Lookup from Board to the rows of each model whose writes change cached board reads
+BOARD_LOOKUPS = {
+    Board: "pk",
+    Status: "status",
+    LeadType: "status__leadtypes",
+    Lead: "status__leadtypes__lead",
+}
+
+
+# Kind of the BoardDeparture rows of each model
+DEPARTURE_KINDS = {
+    Status: "status",
+    LeadType: "leadtype",
+    Lead: "lead",
+}
+
+
+# Rows deactivated together with a row of the key model, with the lookup
+# from each child model back to it.
+CASCADE = {
+    Board: [
+        (Status, "board"),
+        (LeadType, "status__board"),
+        (Lead, "type__status__board"),
+        (LeadHistory, "lead__type__status__board"),
+        (LeadHistoryArchive, "lead__type__status__board"),
+    ],
+    Status: [
+        (LeadType, "status"),
+        (Lead, "type__status"),
+        (LeadHistory, "lead__type__status"),
+        (LeadHistoryArchive, "lead__type__status"),
+    ],
+    LeadType: [
+        (Lead, "type"),
+        (LeadHistory, "lead__type"),
+        (LeadHistoryArchive, "lead__type"),
+    ],
+    Lead: [
+        (LeadHistory, "lead"),
+        (LeadHistoryArchive, "lead"),
+    ],
+    LeadHistory: [],
+    LeadHistoryArchive: [],
+}
+
+
+def deactivate(queryset):
+    """
+    Soft delete the rows of a queryset and all of their active children.
+    Runs one UPDATE per level in one transaction, deepest level first so the
+    root queryset still matches while children are updated.
+    Returns the number of root rows deactivated.
+    """
+    now = timezone.now()
+    roots = queryset.values("pk")
+    with transaction.atomic():
+        if queryset.model in BOARD_LOOKUPS:
+            invalidate_boards(Board.objects.filter(**{BOARD_LOOKUPS[queryset.model] + "__in": roots}))
+        _release_lead_counts(queryset, roots)
+        for model, lookup in reversed(CASCADE[queryset.model]):
+            model.objects.filter(is_active=True, **{lookup + "__in": roots}).update(
+                is_active=False, updated_at=now, **{name: 0 for name in getattr(model, "counter_fields", ())}
+            )
+        _remove_lead_search(queryset, roots)
+        if queryset.model is Lead:
+            leads = {"lead__in": roots}
+        elif Lead in dict(CASCADE[queryset.model]):
+            leads = {"lead__" + dict(CASCADE[queryset.model])[Lead] + "__in": roots}
+        else:
+            leads = None
+        if leads is not None:
+            # Summaries only count active archived rows, and these are all inactive now
+            LeadHistorySummary.objects.filter(**leads).delete()
+            if settings.LEAD_CARDS_ENABLED:
+                LeadCard.objects.filter(is_active=True, **leads).update(is_active=False, updated_at=now)
+        return queryset.filter(is_active=True).update(
+            is_active=False, updated_at=now, **{name: 0 for name in getattr(queryset.model, "counter_fields", ())}
+        )
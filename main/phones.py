@@ -0,0 +1,34 @@
+"""
+Phone number normalization.
+
+Lead phone numbers are free-form. normalize_phone() reduces them to an
+E.164-style "+<country code><number>" string used for indexed duplicate
+lookups. Local numbers without a country code get PHONE_DEFAULT_COUNTRY_CODE.
+"""
+import re
+from django.conf import settings
+
+
+NON_DIGITS_RE = re.compile(r"\D")
+
+
+def normalize_phone(phone_number):
+    """
+    Return the normalized form of a phone number, or None when it has no digits
+    """
+    if not phone_number:
+        return None
+    phone_number = phone_number.strip()
+    digits = NON_DIGITS_RE.sub("", phone_number)
+    if not digits:
+        return None
+
+    country_code = settings.PHONE_DEFAULT_COUNTRY_CODE
+    national_length = settings.PHONE_NATIONAL_NUMBER_LENGTH
+    if phone_number.startswith("+"):
+        return "+" + digits
+    if digits.startswith("00"):
+        return "+" + digits[2:]
+    if len(digits) == national_length:
+        return "+" + country_code + digits
+    return "+" + digits
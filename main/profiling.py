@@ -0,0 +1,275 @@
+"""
+On-demand profiling of single requests.
+
+ProfilingMiddleware profiles a request when a staff user sends the
+PROFILING["HEADER"] header or the PROFILING["QUERY_PARAM"] query flag.
+While the request runs, a sampler thread reads the stack of the handling
+thread every INTERVAL seconds, and every SQL statement is kept with its
+duration and the project frames it came from. Two files named after the
+profile id (sent back in the X-Profile-Id header) are then written to
+PROFILING["DIRECTORY"]:
+
+    <id>.folded  collapsed stacks, for flamegraph.pl, speedscope or inferno
+    <id>.json    the request, its duration and its SQL with stack origins
+
+Async views run their database work in sync_to_async threads, whose stacks
+hold no view code. The thread-sensitive thread of the request is sampled
+too, and the origin of its queries is read from the coroutines the request
+task is suspended in. The event loop thread may also be running other
+requests while it is sampled.
+
+The SQL wrapper is only put on the connections of a profiled request, for
+its duration, so other requests only pay for the check of the flag.
+"""
+import asyncio
+import sys
+import threading
+import traceback
+from collections import Counter
+from contextvars import ContextVar
+from pathlib import Path
+from time import perf_counter
+from uuid import uuid4
+import orjson
+import asgiref.sync
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.utils import timezone
+
+current_profile = ContextVar("current_profile", default=None)
+
+# In a thread run by sync_to_async, the frames after the last one of this
+# file are the ones it called
+SYNC_TO_ASYNC_FILE = asgiref.sync.__file__
+
+# Profiles running in this process, and the lock guarding the count
+_running = 0
+_running_lock = threading.Lock()
+
+# Frames of the instrumentation itself, left out of SQL origins
+INSTRUMENTATION_FILES = {
+    str(Path(__file__).with_name(name)) for name in ("metrics.py", "middleware.py", "profiling.py")
+}
+
+
+def _short_path(filename):
+    for prefix in (str(settings.BASE_DIR), *sys.path):
+        if prefix and filename.startswith(prefix):
+            return filename[len(prefix):].lstrip("/\\")
+    return filename
+
+
+def _frame_name(code):
+    # Frames of a folded stack are separated by ";"
+    name = f"{getattr(code, 'co_qualname', code.co_name)} ({_short_path(code.co_filename)}:{code.co_firstlineno})"
+    return name.replace(";", ":")
+
+
+def _folded_stack(frame):
+    names = []
+    while frame is not None:
+        names.append(_frame_name(frame.f_code))
+        frame = frame.f_back
+    return ";".join(reversed(names))
+
+
+def _awaited_frames(task):
+    """
+    Frames of the coroutines a suspended task is awaiting, outermost first
+    """
+    frames = []
+    awaitable = task.get_coro()
+    while awaitable is not None:
+        frame = getattr(awaitable, "cr_frame", None) or getattr(awaitable, "gi_frame", None)
+        if frame is None:
+            break
+        frames.append(frame)
+        awaitable = getattr(awaitable, "cr_await", None) or getattr(awaitable, "gi_yieldfrom", None)
+    return frames
+
+
+def _origin(profile):
+    """
+    Project frames that led to the current query, innermost last, or all
+    frames when there are none. A query of async code runs through
+    sync_to_async, in a stack without the code that awaited it: the stack
+    is cut where asgiref called in, and the coroutines the task is
+    suspended in go before it.
+    """
+    entries = [(frame.filename, frame.lineno, frame.name) for frame in traceback.extract_stack()]
+    called = [index for index, entry in enumerate(entries) if entry[0] == SYNC_TO_ASYNC_FILE]
+    if profile.task is not None and called:
+        awaited = [
+            (frame.f_code.co_filename, frame.f_lineno, frame.f_code.co_name)
+            for frame in _awaited_frames(profile.task)
+        ]
+        entries = awaited + entries[called[-1] + 1:]
+    entries = [entry for entry in entries if entry[0] not in INSTRUMENTATION_FILES]
+    base = str(settings.BASE_DIR)
+    project = [entry for entry in entries if entry[0].startswith(base) and "site-packages" not in entry[0]]
+    return [f"{_short_path(filename)}:{lineno} in {name}" for filename, lineno, name in project or entries]
+
+
+class Sampler(threading.Thread):
+    """
+    Count the stacks of a set of threads every interval seconds
+    """
+
+    def __init__(self, interval, thread_id):
+        super().__init__(name="request-profiler", daemon=True)
+        self.interval = interval
+        self.thread_ids = {thread_id}
+        self.stacks = Counter()
+        self.finished = threading.Event()
+
+    def run(self):
+        while not self.finished.wait(self.interval):
+            frames = sys._current_frames()
+            for thread_id in tuple(self.thread_ids):
+                frame = frames.get(thread_id)
+                if frame is not None:
+                    self.stacks[_folded_stack(frame)] += 1
+
+    def stop(self):
+        self.finished.set()
+        self.join()
+
+
+def track_task():
+    """
+    Read the origin of the queries of the profiled request from the running
+    task. Profile does it for async requests; call it from async views,
+    which also run in an event loop of their own under a sync request.
+    """
+    profile = current_profile.get()
+    if profile is not None:
+        profile.task = asyncio.current_task()
+
+
+def sql_wrapper(execute, sql, params, many, context):
+    profile = current_profile.get()
+    if profile is None:
+        # Put on a connection opened while another request was profiled
+        _unwrap_connection(context["connection"])
+        return execute(sql, params, many, context)
+    profile.sampler.thread_ids.add(threading.get_ident())
+    start = perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        profile.queries.append({
+            "sql": sql,
+            "many": many,
+            "duration": perf_counter() - start,
+            "origin": _origin(profile),
+        })
+
+
+def _wrap_connection(sender, connection, **kwargs):
+    if sql_wrapper not in connection.execute_wrappers:
+        connection.execute_wrappers.append(sql_wrapper)
+
+
+def _unwrap_connection(connection):
+    if sql_wrapper in connection.execute_wrappers:
+        connection.execute_wrappers.remove(sql_wrapper)
+
+
+def wrap_connections():
+    """
+    Put sql_wrapper on the connections of the current thread
+    """
+    for connection in connections.all(initialized_only=True):
+        _wrap_connection(None, connection)
+
+
+def unwrap_connections():
+    for connection in connections.all(initialized_only=True):
+        _unwrap_connection(connection)
+
+
+def _started():
+    global _running
+    with _running_lock:
+        _running += 1
+        if _running == 1:
+            # Connections opened by a profiled request, in any thread, get
+            # the wrapper too
+            connection_created.connect(_wrap_connection, dispatch_uid="main.profiling")
+
+
+def _stopped():
+    global _running
+    with _running_lock:
+        _running -= 1
+        if _running == 0:
+            connection_created.disconnect(dispatch_uid="main.profiling")
+
+
+class Profile:
+    """
+    Profile of the request handled inside the with block, or the async
+    with block of an async request
+    """
+
+    def __init__(self, interval):
+        self.id = f"{timezone.now():%Y%m%dT%H%M%S}-{uuid4().hex[:8]}"
+        self.thread_id = threading.get_ident()
+        self.sampler = Sampler(interval, self.thread_id)
+        # Task of an async request, whose coroutines give the origin of its queries
+        self.task = None
+        self.queries = []
+
+    def __enter__(self):
+        _started()
+        wrap_connections()
+        self._token = current_profile.set(self)
+        self.started_at = perf_counter()
+        self.sampler.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.sampler.stop()
+        self.duration = perf_counter() - self.started_at
+        current_profile.reset(self._token)
+        unwrap_connections()
+        _stopped()
+
+    async def __aenter__(self):
+        self.__enter__()
+        track_task()
+        await sync_to_async(self.attach)()
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await sync_to_async(unwrap_connections)()
+        self.__exit__(*exc_info)
+
+    def attach(self):
+        """
+        Sample the current thread and wrap its connections. Run through
+        sync_to_async, this is the thread the ORM calls of the request use.
+        """
+        self.sampler.thread_ids.add(threading.get_ident())
+        wrap_connections()
+
+    def dump(self, directory, request, response):
+        directory = Path(directory)
+        directory.mkdir(parents=True, exist_ok=True)
+        (directory / f"{self.id}.folded").write_text(
+            "".join(f"{stack} {count}\n" for stack, count in self.sampler.stacks.most_common())
+        )
+        (directory / f"{self.id}.json").write_bytes(orjson.dumps({
+            "id": self.id,
+            "method": request.method,
+            "path": request.get_full_path(),
+            "status": response.status_code,
+            "duration": self.duration,
+            "samples": sum(self.sampler.stacks.values()),
+            "interval": self.sampler.interval,
+            "query_count": len(self.queries),
+            "query_duration": sum(query["duration"] for query in self.queries),
+            "queries": self.queries,
+        }, option=orjson.OPT_INDENT_2))
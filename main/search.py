@@ -0,0 +1,139 @@
+"""
+Lead full-text search backed by an SQLite FTS5 table.
+
+main_lead_search holds one row per active lead, keyed by the lead id as
+rowid, with the title, the digits of the phone number, the description
+and the scalar values of extra. It uses the trigram tokenizer so that
+name and phone fragments match anywhere in a word.
+On other database backends search falls back to icontains lookups.
+"""
+import re
+from django.core.exceptions import EmptyResultSet
+from django.db import connection
+from django.db.models import Q
+from main import models
+
+
+SEARCH_TABLE = "main_lead_search"
+SEARCH_FIELDS = ("title", "phone_number", "description", "extra")
+SEARCH_REBUILD_CHUNK_SIZE = 10000
+MIN_TERM_LENGTH = 3
+
+PHONE_TERM_RE = re.compile(r"^[\d+\-() ]+$")
+
+
+def search_available():
+    return connection.vendor == "sqlite"
+
+
+def _lead_ids_sql(leads):
+    """
+    Return the SQL selecting the ids of a lead queryset, or None when it cannot match anything
+    """
+    try:
+        return leads.order_by().values("pk").query.sql_with_params()
+    except EmptyResultSet:
+        return None
+
+
+def remove_lead_search(leads):
+    """
+    Drop the search rows of a lead queryset
+    """
+    ids = _lead_ids_sql(leads) if search_available() else None
+    if ids is None:
+        return
+    ids_sql, params = ids
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {SEARCH_TABLE} WHERE rowid IN ({ids_sql})", params)
+
+
+def sync_lead_search(leads):
+    """
+    Rewrite the search rows of a lead queryset with two set-based statements.
+    Inactive leads are left out of the index.
+    """
+    ids = _lead_ids_sql(leads) if search_available() else None
+    if ids is None:
+        return
+    ids_sql, params = ids
+    lead_table = models.Lead._meta.db_table
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {SEARCH_TABLE} WHERE rowid IN ({ids_sql})", params)
+        cursor.execute(
+            f"""
+            INSERT INTO {SEARCH_TABLE} (rowid, title, phone, description, extra)
+            SELECT
+                lead.id,
+                lead.title,
+                replace(replace(replace(replace(replace(
+                    coalesce(lead.phone_number, ''), ' ', ''), '-', ''), '+', ''), '(', ''), ')', ''),
+                lead.description,
+                (SELECT group_concat(value, ' ') FROM json_tree(lead.extra) WHERE atom IS NOT NULL)
+            FROM {lead_table} AS lead
+            WHERE lead.is_active AND lead.id IN ({ids_sql})
+            """,
+            params,
+        )
+
+
+def rebuild_lead_search():
+    """
+    Rebuild the whole index in chunks of lead ids. Returns the number of chunks written.
+    """
+    if not search_available():
+        return 0
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {SEARCH_TABLE}")
+    last_id = models.Lead.objects.order_by("-pk").values_list("pk", flat=True).first() or 0
+    chunks = 0
+    for start in range(0, last_id + 1, SEARCH_REBUILD_CHUNK_SIZE):
+        sync_lead_search(models.Lead.objects.filter(pk__gte=start, pk__lt=start + SEARCH_REBUILD_CHUNK_SIZE))
+        chunks += 1
+    return chunks
+
+
+def parse_query(query):
+    """
+    Turn user input into search terms. Phone-like terms are reduced to digits
+    and terms shorter than MIN_TERM_LENGTH are dropped, since the trigram
+    index cannot match them.
+    """
+    terms = []
+    for term in re.findall(r'[^\s"]+', query or ""):
+        if PHONE_TERM_RE.match(term):
+            term = re.sub(r"\D", "", term)
+        if len(term) >= MIN_TERM_LENGTH:
+            terms.append(term)
+    return terms
+
+
+def search_leads(terms, company_uuid, limit, offset=0):
+    """
+    Return the ids of the tenant's active leads matching all terms, best match first
+    """
+    if not search_available():
+        leads = models.Lead.objects.filter(is_active=True, type__status__board__company_uuid=company_uuid)
+        for term in terms:
+            leads = leads.filter(
+                Q(title__icontains=term) | Q(phone_number__icontains=term) | Q(description__icontains=term)
+            )
+        return list(leads.order_by("-created_at").values_list("pk", flat=True)[offset:offset + limit])
+
+    match = " AND ".join('"%s"' % term for term in terms)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"""
+            SELECT lead.id
+            FROM {SEARCH_TABLE}
+            JOIN {models.Lead._meta.db_table} AS lead ON lead.id = {SEARCH_TABLE}.rowid
+            JOIN {models.LeadType._meta.db_table} AS lead_type ON lead_type.id = lead.type_id
+            JOIN {models.Status._meta.db_table} AS status ON status.id = lead_type.status_id
+            JOIN {models.Board._meta.db_table} AS board ON board.id = status.board_id
+            WHERE {SEARCH_TABLE} MATCH %s AND lead.is_active AND board.company_uuid = %s
+            ORDER BY {SEARCH_TABLE}.rank
+            LIMIT %s OFFSET %s
+            """,
+            [match, str(company_uuid), limit, offset],
+        )
+        return [row[0] for row in cursor.fetchall()]
@@ -0,0 +1,41 @@
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+from main import models
+
+LOCMEM_CACHES = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+
+
+@override_settings(CACHES=LOCMEM_CACHES, LEAD_CARDS_ENABLED=False)
+class APITestCase(TestCase):
+    """
+    Test case with an authenticated API client and helpers to build boards
+    """
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user("user", password="password")
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def create_board(self, statuses=2, lead_types=2, leads=2, company_uuid=None):
+        """
+        Board with statuses x lead types x leads, all ordered from 1
+        """
+        board = models.Board.objects.create(
+            name="Board", company_uuid=company_uuid if company_uuid is not None else self.user.id
+        )
+        for status_index in range(statuses):
+            status = models.Status.objects.create(name=f"Status {status_index}", board=board, order=status_index + 1)
+            for type_index in range(lead_types):
+                lead_type = models.LeadType.objects.create(
+                    name=f"Type {status_index}.{type_index}", status=status, order=type_index + 1
+                )
+                for lead_index in range(leads):
+                    models.Lead.objects.create(
+                        title=f"Lead {status_index}.{type_index}.{lead_index}",
+                        type=lead_type,
+                        order=lead_index + 1,
+                    )
+        return board
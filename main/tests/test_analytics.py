@@ -0,0 +1,89 @@
+import json
+from datetime import timedelta
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.utils import timezone
+from main import models
+from main.tests.base import APITestCase
+
+
+class BoardFunnelTests(APITestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.board = self.create_board(statuses=3, lead_types=1, leads=0)
+        self.statuses = list(models.Status.objects.order_by("order"))
+        self.lead_types = [status.leadtypes.get() for status in self.statuses]
+        self.url = f"/api/board/{self.board.uuid}/analytics/"
+        self.start = timezone.now() - timedelta(days=1)
+
+    def enter(self, lead, index, hours):
+        row = models.LeadHistory.objects.create(
+            lead=lead, status=self.statuses[index], lead_type=self.lead_types[index]
+        )
+        models.LeadHistory.objects.filter(pk=row.pk).update(created_at=self.start + timedelta(hours=hours))
+
+    def stages(self):
+        return self.client.get(self.url).json()["stages"]
+
+    def test_stays_percentiles_and_transitions(self):
+        leads = [models.Lead.objects.create(title=f"Lead {index}", type=self.lead_types[0]) for index in range(4)]
+        # Lead k stays k + 1 hours in the first status; the first two then
+        # stay 10 hours in the second, the last goes back to the first
+        for index, lead in enumerate(leads):
+            self.enter(lead, 0, 0)
+            self.enter(lead, 0, 0.1)
+            self.enter(lead, 1, index + 1)
+            if index < 2:
+                self.enter(lead, 2, index + 11)
+            if index == 3:
+                self.enter(lead, 0, 20)
+
+        data = self.client.get(self.url).json()
+        first, second, third = data["stages"]
+
+        self.assertEqual(
+            (first["entered"], first["leads"], first["exited"], first["moved_forward"]), (5, 4, 4, 4)
+        )
+        self.assertEqual(first["median_seconds"], 2 * 3600)
+        self.assertAlmostEqual(first["p90_seconds"], 4 * 3600, places=0)
+        self.assertEqual((second["entered"], second["moved_forward"], second["conversion_rate"]), (4, 2, 0.5))
+        self.assertAlmostEqual(second["median_seconds"], 10 * 3600, places=0)
+        self.assertIsNone(third["median_seconds"])
+        self.assertEqual(
+            {(row["from"], row["to"], row["count"]) for row in data["transitions"]},
+            {
+                (str(self.statuses[0].uuid), str(self.statuses[1].uuid), 4),
+                (str(self.statuses[1].uuid), str(self.statuses[2].uuid), 2),
+                (str(self.statuses[1].uuid), str(self.statuses[0].uuid), 1),
+            },
+        )
+
+    def test_created_leads_enter_their_first_status(self):
+        uuids = [
+            self.client.post(
+                "/api/lead/", {"type": str(self.lead_types[0].uuid), "title": f"Lead {index}"}, format="json"
+            ).json()["uuid"]
+            for index in range(4)
+        ]
+        for uuid in uuids[:3]:
+            self.client.patch("/api/lead/move/", {"uuid": uuid, "type": str(self.lead_types[1].uuid)}, format="json")
+        self.client.patch("/api/lead/move/", {"uuid": uuids[0], "type": str(self.lead_types[2].uuid)}, format="json")
+
+        stages = self.stages()
+
+        self.assertEqual([stage["entered"] for stage in stages], [4, 3, 1])
+        self.assertEqual([stage["moved_forward"] for stage in stages], [3, 1, 0])
+        self.assertEqual([stage["conversion_rate"] for stage in stages], [0.75, 0.3333, 0.0])
+
+    def test_imported_leads_enter_their_first_status(self):
+        rows = [{"type": str(self.lead_types[1].uuid), "title": f"Lead {index}"} for index in range(2)]
+        content = "\n".join(json.dumps(row) for row in rows).encode()
+        self.client.post(
+            "/api/lead/import/", {"file": SimpleUploadedFile("leads.ndjson", content)}, format="multipart"
+        )
+
+        self.assertEqual([stage["entered"] for stage in self.stages()], [0, 2, 0])
+        self.assertEqual(
+            set(models.LeadHistory.objects.values_list("lead__title", "lead_type")),
+            {("Lead 0", self.lead_types[1].pk), ("Lead 1", self.lead_types[1].pk)},
+        )
@@ -0,0 +1,82 @@
+from datetime import timedelta
+from io import StringIO
+from django.core.management import call_command
+from django.utils import timezone
+from main import archive, models
+from main.tests.base import APITestCase
+
+
+class LeadHistoryArchiveTests(APITestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.board = self.create_board(statuses=2, lead_types=1, leads=1)
+        self.lead = models.Lead.objects.get(title="Lead 0.0.0")
+        self.old = timezone.now() - timedelta(days=400)
+        for index, status in enumerate(models.Status.objects.order_by("order")):
+            self.add_history(self.lead, status, self.old + timedelta(days=index))
+        self.recent = self.add_history(self.lead, self.lead.type.status, timezone.now())
+        self.date_from = (self.old - timedelta(days=10)).date().isoformat()
+
+    def add_history(self, lead, status, created_at):
+        row = models.LeadHistory.objects.create(lead=lead, status=status, lead_type=status.leadtypes.get())
+        models.LeadHistory.objects.filter(pk=row.pk).update(created_at=created_at)
+        return row
+
+    def history_uuids(self):
+        response = self.client.get("/api/lead-history/", {"date_from": self.date_from, "page_size": 50})
+        return {row["uuid"] for row in response.json()["results"]}
+
+    def funnel_entries(self):
+        response = self.client.get(
+            f"/api/board/{self.board.uuid}/analytics/", {"date_from": self.date_from}
+        )
+        return sum(stage["entered"] for stage in response.json()["stages"])
+
+    def test_old_rows_move_to_the_archive_with_a_summary(self):
+        call_command("archive_lead_history", stdout=StringIO())
+
+        self.assertEqual(list(models.LeadHistory.objects.values_list("pk", flat=True)), [self.recent.pk])
+        self.assertEqual(models.LeadHistoryArchive.objects.count(), 2)
+        summary = models.LeadHistorySummary.objects.get(lead=self.lead)
+        self.assertEqual(summary.archived_count, 2)
+        self.assertEqual(summary.last_status, models.Status.objects.get(name="Status 1"))
+        self.assertEqual(len(self.history_uuids()), 3)
+        self.assertEqual(self.funnel_entries(), 3)
+
+    def test_deactivation_reaches_archived_rows(self):
+        archive.archive_lead_history()
+
+        self.client.delete(f"/api/lead/?uuid={self.lead.uuid}")
+
+        self.assertFalse(models.LeadHistoryArchive.objects.filter(is_active=True).exists())
+        self.assertFalse(models.LeadHistorySummary.objects.exists())
+        self.assertEqual(self.history_uuids(), set())
+        self.assertEqual(self.funnel_entries(), 0)
+
+    def test_board_deactivation_reaches_archived_rows(self):
+        archive.archive_lead_history()
+
+        models.deactivate(models.Board.objects.filter(pk=self.board.pk))
+
+        self.assertFalse(models.LeadHistoryArchive.objects.filter(is_active=True).exists())
+        self.assertFalse(models.LeadHistorySummary.objects.exists())
+
+    def test_merged_leads_hand_over_archived_history(self):
+        duplicate = models.Lead.objects.get(title="Lead 1.0.0")
+        self.add_history(duplicate, duplicate.type.status, self.old - timedelta(days=5))
+        self.add_history(duplicate, duplicate.type.status, self.old + timedelta(days=10))
+        archive.archive_lead_history()
+        models.Lead.objects.filter(pk__in=[self.lead.pk, duplicate.pk]).update(phone_normalized="+998901234567")
+
+        call_command("dedupe_leads", stdout=StringIO())
+
+        self.assertEqual(set(models.LeadHistoryArchive.objects.values_list("lead", flat=True)), {self.lead.pk})
+        self.assertFalse(models.LeadHistoryArchive.objects.filter(is_active=False).exists())
+        summary = models.LeadHistorySummary.objects.get()
+        self.assertEqual(summary.lead, self.lead)
+        self.assertEqual(summary.archived_count, 4)
+        self.assertEqual(summary.first_at, self.old - timedelta(days=5))
+        self.assertEqual(summary.last_at, self.old + timedelta(days=10))
+        self.assertEqual(summary.last_status, duplicate.type.status)
+        self.assertEqual(len(self.history_uuids()), 5)
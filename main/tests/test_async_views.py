@@ -0,0 +1,72 @@
+from io import StringIO
+from asgiref.sync import sync_to_async
+from django.core.management import call_command
+from django.test import AsyncClient, override_settings
+from rest_framework_simplejwt.tokens import AccessToken
+from main import models
+from main.tests.base import APITestCase
+
+
+class AsyncViewTests(APITestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.board = self.create_board(statuses=2, lead_types=2, leads=3)
+        self.lead = models.Lead.objects.get(title="Lead 0.0.0")
+        models.LeadHistory.objects.create(lead=self.lead, status=self.lead.type.status, lead_type=self.lead.type)
+        self.async_client = AsyncClient()
+        self.headers = {"Authorization": f"Bearer {AccessToken.for_user(self.user)}"}
+
+    async def test_requests_need_a_valid_token(self):
+        self.assertEqual((await AsyncClient().get("/api/lead/")).status_code, 401)
+        response = await AsyncClient().get("/api/lead/", headers={"Authorization": "Bearer invalid"})
+        self.assertEqual(response.status_code, 401)
+
+    async def test_lists(self):
+        response = await self.async_client.get("/api/board/", headers=self.headers)
+        self.assertEqual(len(response.json()["boards"]), 1)
+
+        response = await self.async_client.get(
+            "/api/status/", {"board_uuid": str(self.board.uuid)}, headers=self.headers
+        )
+        self.assertEqual(len(response.json()["statuses"]), 2)
+        response = await self.async_client.get(
+            "/api/status/", {"board_uuid": str(self.board.uuid)},
+            headers={**self.headers, "If-None-Match": response["ETag"]},
+        )
+        self.assertEqual(response.status_code, 304)
+
+        response = await self.async_client.get("/api/lead/", headers=self.headers)
+        self.assertEqual(len(response.json()["leads"]), 12)
+        response = await self.async_client.get(
+            "/api/lead/", {"pagination": "cursor", "page_size": 5}, headers=self.headers
+        )
+        self.assertEqual(len(response.json()["results"]), 5)
+        self.assertIsNotNone(response.json()["next"])
+
+        response = await self.async_client.get("/api/lead-history/", headers=self.headers)
+        self.assertEqual(response.json()["count"], 1)
+        response = await self.async_client.get("/api/lead-history/", {"pagination": "cursor"}, headers=self.headers)
+        self.assertEqual(len(response.json()["results"]), 1)
+
+    async def test_sync_handlers_of_async_views(self):
+        response = await self.async_client.post(
+            "/api/lead/", {"title": "New", "type": str(self.lead.type.uuid)}, content_type="application/json",
+            headers=self.headers,
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(await models.Lead.objects.filter(title="New", is_active=True).aexists())
+
+        response = await self.async_client.delete(f"/api/lead/?uuid={self.lead.uuid}", headers=self.headers)
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(await models.Lead.objects.filter(pk=self.lead.pk, is_active=True).aexists())
+
+        self.assertEqual((await self.async_client.put("/api/lead/", headers=self.headers)).status_code, 405)
+
+    @override_settings(LEAD_CARDS_ENABLED=True)
+    async def test_lead_cards(self):
+        await sync_to_async(call_command)("rebuild_lead_cards", stdout=StringIO())
+
+        response = await self.async_client.get("/api/lead/", headers=self.headers)
+
+        self.assertEqual(len(response.json()["leads"]), 12)
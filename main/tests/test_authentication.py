@@ -0,0 +1,103 @@
+from datetime import timedelta
+from io import StringIO
+from django.core.management import call_command
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+from main import models
+from main.api.auth import tokens
+from main.api.auth.authentication import UserCache, user_cache
+from main.tests.base import APITestCase
+
+
+class UserCacheTests(APITestCase):
+
+    def setUp(self):
+        super().setUp()
+        user_cache.clear()
+        self.addCleanup(user_cache.clear)
+        self.board = self.create_board(statuses=1, lead_types=1, leads=1)
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {AccessToken.for_user(self.user)}")
+        self.url = f"/api/board/{self.board.uuid}/changes/"
+
+    def auth_queries(self, url):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return [query["sql"] for query in queries if '"auth_user"' in query["sql"]]
+
+    def test_warm_requests_do_not_load_the_user(self):
+        self.assertEqual(len(self.auth_queries(self.url)), 1)
+        self.assertEqual(self.auth_queries(self.url), [])
+        self.assertEqual(self.auth_queries("/api/board/"), [])
+
+    def test_saving_the_user_drops_it_from_the_cache(self):
+        self.client.get(self.url)
+
+        self.user.is_active = False
+        self.user.save()
+        self.assertEqual(self.client.get(self.url).status_code, 401)
+
+        self.user.is_active = True
+        self.user.save()
+        self.assertEqual(self.client.get(self.url).status_code, 200)
+
+    def test_entries_expire_and_are_evicted(self):
+        cache = UserCache(timeout=-1, max_size=2)
+        cache.set("1", "first")
+        self.assertIsNone(cache.get("1"))
+
+        cache.timeout = 60
+        for user_id in ("1", "2", "3"):
+            cache.set(user_id, user_id)
+        self.assertEqual([cache.get(user_id) for user_id in ("1", "2", "3")], [None, "2", "3"])
+
+
+class RefreshRotationTests(TestCase):
+
+    def setUp(self):
+        tokens._revoked.clear()
+        self.addCleanup(tokens._revoked.clear)
+        User.objects.create_user("user", password="password")
+        self.client = APIClient()
+        self.refresh = self.client.post(
+            "/api/auth/token/", {"username": "user", "password": "password"}, format="json"
+        ).json()["refresh"]
+
+    def rotate(self, refresh):
+        return self.client.post("/api/auth/token/refresh/", {"refresh": refresh}, format="json")
+
+    def test_refresh_returns_a_new_pair(self):
+        response = self.rotate(self.refresh)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.json()["access"])
+        self.assertNotEqual(response.json()["refresh"], self.refresh)
+        self.assertEqual(self.rotate(response.json()["refresh"]).status_code, 200)
+
+    def test_replayed_tokens_are_rejected(self):
+        self.rotate(self.refresh)
+
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(self.rotate(self.refresh).status_code, 401)
+        self.assertEqual(len(queries), 0)
+
+        # Other processes find it in the table
+        tokens._revoked.clear()
+        self.assertEqual(self.rotate(self.refresh).status_code, 401)
+
+    def test_prune_deletes_expired_revocations(self):
+        self.rotate(self.refresh)
+        models.RevokedToken.objects.create(jti="expired", expires_at=timezone.now() - timedelta(days=1))
+
+        self.assertEqual(tokens.prune_revoked_tokens(batch_size=1), 1)
+        self.assertFalse(models.RevokedToken.objects.filter(jti="expired").exists())
+        self.assertEqual(models.RevokedToken.objects.count(), 1)
+
+        call_command("prune_revoked_tokens", stdout=StringIO())
+        self.assertEqual(models.RevokedToken.objects.count(), 1)
@@ -0,0 +1,97 @@
+from unittest import mock
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from main import events, models
+from main.tests.base import APITestCase
+
+
+class ResponseCacheTests(APITestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.board = self.create_board(statuses=2, lead_types=2, leads=2)
+        self.status = models.Status.objects.get(name="Status 0")
+
+    def get(self, url):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return response.json(), len(queries)
+
+    def write(self, method, url, data=None):
+        with self.captureOnCommitCallbacks(execute=True):
+            response = getattr(self.client, method)(url, data, format="json")
+        self.assertLess(response.status_code, 300)
+
+    def test_repeated_reads_are_served_without_queries(self):
+        for url in (
+            "/api/board/",
+            f"/api/status/?board_uuid={self.board.uuid}",
+            "/api/lead-type/",
+            f"/api/board/{self.board.uuid}/snapshot/",
+        ):
+            with self.subTest(url=url):
+                first, first_queries = self.get(url)
+                second, second_queries = self.get(url)
+                self.assertGreater(first_queries, 0)
+                self.assertEqual(second_queries, 0)
+                self.assertEqual(first, second)
+
+    def test_writes_invalidate_the_cached_reads(self):
+        statuses_url = f"/api/status/?board_uuid={self.board.uuid}"
+        self.get(statuses_url)
+        self.get("/api/board/")
+
+        lead_type = models.LeadType.objects.get(name="Type 0.0")
+        self.write("post", "/api/lead/", {"type": str(lead_type.uuid), "title": "New"})
+        self.assertEqual(self.get(statuses_url)[0]["statuses"][0]["lead_count"], 5)
+
+        self.write("patch", f"/api/status/?uuid={self.status.uuid}", {"name": "Renamed"})
+        self.assertEqual(self.get(statuses_url)[0]["statuses"][0]["name"], "Renamed")
+
+        self.write("patch", f"/api/board/?uuid={self.board.uuid}", {"name": "Renamed board"})
+        self.assertEqual(self.get("/api/board/")[0]["boards"][0]["name"], "Renamed board")
+
+    def test_reorder_and_deactivation_invalidate_the_cached_reads(self):
+        statuses_url = f"/api/status/?board_uuid={self.board.uuid}"
+        snapshot_url = f"/api/board/{self.board.uuid}/snapshot/"
+        self.get(statuses_url)
+        self.get(snapshot_url)
+        statuses = list(models.Status.objects.filter(board=self.board).order_by("order"))
+
+        self.write("patch", "/api/change-order/", {
+            "data": [{"uuid": str(status.uuid), "order": 10 - index} for index, status in enumerate(statuses)]
+        })
+        self.assertEqual(
+            [status["name"] for status in self.get(statuses_url)[0]["statuses"]], ["Status 1", "Status 0"]
+        )
+
+        self.write("delete", f"/api/clear/?status_uuid={self.status.uuid}")
+        self.assertEqual(len(self.get(statuses_url)[0]["statuses"]), 1)
+        self.assertEqual(len(self.get(snapshot_url)[0]["board"]["statuses"]), 1)
+
+        self.write("delete", f"/api/board/?uuid={self.board.uuid}")
+        self.assertEqual(self.get("/api/board/")[0]["boards"], [])
+
+    def test_moving_a_status_invalidates_both_boards(self):
+        other = self.create_board(statuses=1, lead_types=1, leads=1)
+        old_url = f"/api/status/?board_uuid={self.board.uuid}"
+        new_url = f"/api/status/?board_uuid={other.uuid}"
+        self.get(old_url)
+        self.get(new_url)
+        etag = self.client.get(old_url)["ETag"]
+
+        with mock.patch.object(events, "publish_board_changes") as publish:
+            self.write("patch", f"/api/status/?uuid={self.status.uuid}", {"board": str(other.uuid)})
+
+        self.assertEqual(len(self.get(old_url)[0]["statuses"]), 1)
+        self.assertEqual(len(self.get(new_url)[0]["statuses"]), 2)
+        self.assertEqual(self.client.get(old_url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+        published = {str(board_uuid) for call in publish.call_args_list for board_uuid, _ in call.args[0]}
+        self.assertEqual(published, {str(self.board.uuid), str(other.uuid)})
+
+    def test_invalidated_boards_are_read_without_ordering(self):
+        with CaptureQueriesContext(connection) as queries, self.captureOnCommitCallbacks():
+            models.invalidate_boards(models.Board.objects.filter(status__leadtypes__lead__isnull=False))
+        self.assertEqual(len(queries), 1)
+        self.assertNotIn("created_at", queries[0]["sql"])
@@ -0,0 +1,100 @@
+from datetime import timedelta
+from django.test import override_settings
+from main import models
+from main.tests.base import APITestCase
+
+
+@override_settings(SYNC_TOKEN_OVERLAP=timedelta(0))
+class BoardChangesTests(APITestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.board = self.create_board(statuses=2, lead_types=2, leads=3)
+        self.url = f"/api/board/{self.board.uuid}/changes/"
+
+    def test_first_sync_returns_the_whole_board(self):
+        data = self.client.get(self.url).json()
+
+        self.assertEqual(len(data["statuses"]), 2)
+        self.assertEqual(len(data["leadtypes"]), 4)
+        self.assertEqual(len(data["leads"]), 12)
+        self.assertNotIn("leadtypes", data["statuses"][0])
+        self.assertTrue(data["token"])
+
+    def test_token_returns_only_later_changes(self):
+        token = self.client.get(self.url).json()["token"]
+        lead = models.Lead.objects.get(title="Lead 0.0.0")
+        lead.title = "Renamed"
+        lead.save()
+        lead_type = models.LeadType.objects.get(name="Type 1.1")
+        models.deactivate(models.LeadType.objects.filter(pk=lead_type.pk))
+
+        data = self.client.get(self.url, {"since": token}).json()
+
+        self.assertEqual(data["statuses"], [])
+        self.assertEqual([(row["uuid"], row["is_active"]) for row in data["leadtypes"]], [(str(lead_type.uuid), False)])
+        self.assertEqual(
+            {row["title"] for row in data["leads"]}, {"Renamed", "Lead 1.1.0", "Lead 1.1.1", "Lead 1.1.2"}
+        )
+
+        data = self.client.get(self.url, {"since": data["token"]}).json()
+        self.assertEqual((data["statuses"], data["leadtypes"], data["leads"]), ([], [], []))
+
+    def test_invalid_token_is_rejected(self):
+        self.assertEqual(self.client.get(self.url, {"since": "invalid"}).status_code, 400)
+
+    def test_boards_of_other_companies_are_not_found(self):
+        board = self.create_board(statuses=1, lead_types=1, leads=1, company_uuid="other")
+
+        self.assertEqual(self.client.get(f"/api/board/{board.uuid}/changes/").status_code, 404)
+
+    def test_rows_moved_to_another_board_are_removed(self):
+        other = self.create_board(statuses=1, lead_types=1, leads=1)
+        other_url = f"/api/board/{other.uuid}/changes/"
+        token = self.client.get(self.url).json()["token"]
+        other_token = self.client.get(other_url).json()["token"]
+        lead = models.Lead.objects.get(title="Lead 0.0.0", type__status__board=self.board)
+        status = models.Status.objects.get(board=self.board, name="Status 1")
+
+        lead_type = models.LeadType.objects.get(status__board=other)
+        response = self.client.patch(
+            "/api/lead/move/", {"uuid": str(lead.uuid), "type": str(lead_type.uuid)}, format="json"
+        )
+        self.assertEqual(response.status_code, 200)
+        response = self.client.patch(f"/api/status/?uuid={status.uuid}", {"board": str(other.uuid)}, format="json")
+        self.assertEqual(response.status_code, 200)
+
+        data = self.client.get(self.url, {"since": token}).json()
+        moved_leads = {str(lead.uuid)} | {str(uuid) for uuid in status_leads(status)}
+        self.assertEqual(data["removed"]["statuses"], [str(status.uuid)])
+        self.assertEqual(set(data["removed"]["leadtypes"]), {str(uuid) for uuid in status_lead_types(status)})
+        self.assertEqual(set(data["removed"]["leads"]), moved_leads)
+        self.assertEqual((data["statuses"], data["leadtypes"], data["leads"]), ([], [], []))
+
+        data = self.client.get(other_url, {"since": other_token}).json()
+        self.assertEqual([row["uuid"] for row in data["statuses"]], [str(status.uuid)])
+        self.assertEqual(len(data["leadtypes"]), 2)
+        self.assertEqual({row["uuid"] for row in data["leads"]}, moved_leads)
+        self.assertEqual(data["removed"], {"statuses": [], "leadtypes": [], "leads": []})
+
+    def test_rows_moved_back_are_not_removed(self):
+        other = self.create_board(statuses=1, lead_types=1, leads=1)
+        token = self.client.get(self.url).json()["token"]
+        status = models.Status.objects.get(board=self.board, name="Status 1")
+        for board in (other, self.board):
+            status.board = board
+            status.save()
+
+        data = self.client.get(self.url, {"since": token}).json()
+
+        self.assertEqual(data["removed"], {"statuses": [], "leadtypes": [], "leads": []})
+        self.assertEqual([row["uuid"] for row in data["statuses"]], [str(status.uuid)])
+        self.assertEqual(len(data["leads"]), 6)
+
+
+def status_lead_types(status):
+    return models.LeadType.objects.filter(status=status).values_list("uuid", flat=True)
+
+
+def status_leads(status):
+    return models.Lead.objects.filter(type__status=status).values_list("uuid", flat=True)
@@ -0,0 +1,97 @@
+from io import StringIO
+from django.core.management import call_command
+from main import models
+from main.tests.base import APITestCase
+
+
+class LeadCounterTests(APITestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.board = self.create_board(statuses=2, lead_types=2, leads=3)
+
+    def assertCountersMatch(self):
+        for lead_type in models.LeadType.objects.all():
+            expected = models.Lead.objects.filter(type=lead_type, is_active=True).count() if lead_type.is_active else 0
+            self.assertEqual(lead_type.lead_count, expected, lead_type.name)
+        for status in models.Status.objects.all():
+            expected = models.Lead.objects.filter(type__status=status, is_active=True).count() if status.is_active else 0
+            self.assertEqual(status.lead_count, expected, status.name)
+
+    def test_counters_follow_creates_moves_and_deletes(self):
+        lead = models.Lead.objects.get(title="Lead 0.0.0")
+        target = models.LeadType.objects.get(name="Type 1.1")
+
+        self.client.patch(f"/api/lead/?uuid={lead.uuid}", {"type": str(target.uuid)}, format="json")
+        self.assertCountersMatch()
+        self.client.delete(f"/api/lead/?uuid={lead.uuid}")
+        self.assertCountersMatch()
+        self.client.delete(f"/api/lead-type/?uuid={target.uuid}")
+        self.assertCountersMatch()
+
+        self.assertEqual(models.Status.objects.get(name="Status 1").lead_count, 3)
+
+    def test_saving_a_lead_inactive_releases_it_once(self):
+        lead = models.Lead.objects.get(title="Lead 0.0.0")
+
+        lead.is_active = False
+        lead.save()
+        lead.save()
+
+        self.assertEqual(models.LeadType.objects.get(name="Type 0.0").lead_count, 2)
+        self.assertCountersMatch()
+
+    def test_saving_a_lead_type_inactive_releases_its_leads(self):
+        lead_type = models.LeadType.objects.get(name="Type 0.0")
+
+        lead_type.is_active = False
+        lead_type.save()
+
+        self.assertEqual(models.Status.objects.get(name="Status 0").lead_count, 3)
+        self.assertCountersMatch()
+
+    def test_saving_a_status_inactive_resets_its_counters(self):
+        status = models.Status.objects.get(name="Status 0")
+
+        status.is_active = False
+        status.save()
+
+        self.assertFalse(models.Lead.objects.filter(type__status=status, is_active=True).exists())
+        self.assertCountersMatch()
+
+    def test_moving_a_lead_type_moves_its_count(self):
+        lead_type = models.LeadType.objects.get(name="Type 0.0")
+
+        self.client.patch(
+            f"/api/lead-type/?uuid={lead_type.uuid}",
+            {"status": str(models.Status.objects.get(name="Status 1").uuid), "lead_count": 99},
+            format="json",
+        )
+
+        self.assertEqual(models.Status.objects.get(name="Status 1").lead_count, 9)
+        self.assertCountersMatch()
+
+    def test_saving_after_a_refresh_compares_with_the_refreshed_values(self):
+        lead = models.Lead.objects.get(title="Lead 0.0.0")
+        # Another request moves the lead
+        moved = models.Lead.objects.get(pk=lead.pk)
+        moved.type = models.LeadType.objects.get(name="Type 1.1")
+        moved.save()
+
+        lead.refresh_from_db()
+        lead.title = "Renamed"
+        lead.save()
+        self.assertCountersMatch()
+
+        lead.refresh_from_db(fields=["type"])
+        lead.type = models.LeadType.objects.get(name="Type 0.1")
+        lead.save()
+        self.assertCountersMatch()
+
+    def test_reconcile_fixes_drifted_counters(self):
+        models.LeadType.objects.update(lead_count=77)
+        models.Status.objects.update(lead_count=5)
+
+        call_command("reconcile_lead_counts", stdout=StringIO())
+
+        self.assertCountersMatch()
@@ -0,0 +1,58 @@
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from main import models
+from main.tests.base import APITestCase
+
+
+def active_counts():
+    return [
+        model.objects.filter(is_active=True).count()
+        for model in (models.Board, models.Status, models.LeadType, models.Lead, models.LeadHistory)
+    ]
+
+
+class DeactivateTests(APITestCase):
+
+    def add_history(self):
+        for lead in models.Lead.objects.select_related("type"):
+            models.LeadHistory.objects.create(lead=lead, status=lead.type.status, lead_type=lead.type)
+
+    def delete_board(self, board):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.delete(f"/api/board/?uuid={board.uuid}")
+        self.assertEqual(response.status_code, 200)
+        return len(queries)
+
+    def test_board_delete_deactivates_the_whole_tree(self):
+        board = self.create_board(statuses=2, lead_types=2, leads=2)
+        self.add_history()
+
+        self.delete_board(board)
+
+        self.assertEqual(active_counts(), [0, 0, 0, 0, 0])
+        self.assertEqual(self.client.delete(f"/api/board/?uuid={board.uuid}").status_code, 404)
+
+    def test_query_count_does_not_grow_with_the_tree(self):
+        small = self.delete_board(self.create_board(statuses=1, lead_types=1, leads=1))
+        large = self.delete_board(self.create_board(statuses=3, lead_types=3, leads=3))
+
+        self.assertEqual(small, large)
+
+    def test_lead_type_delete_leaves_siblings_active(self):
+        self.create_board(statuses=1, lead_types=2, leads=2)
+        lead_type = models.LeadType.objects.get(name="Type 0.0")
+
+        response = self.client.delete(f"/api/clear/?leadtype_uuid={lead_type.uuid}")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(active_counts(), [1, 1, 1, 2, 0])
+        self.assertFalse(models.Lead.objects.filter(type=lead_type, is_active=True).exists())
+
+    def test_save_inactive_cascades(self):
+        self.create_board(statuses=2, lead_types=1, leads=2)
+        status = models.Status.objects.get(name="Status 0")
+
+        status.is_active = False
+        status.save()
+
+        self.assertEqual(active_counts(), [1, 1, 1, 2, 0])
@@ -0,0 +1,95 @@
+import json
+from io import StringIO
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import SimpleTestCase
+from main import models
+from main.phones import normalize_phone
+from main.tests.base import APITestCase
+
+
+class NormalizePhoneTests(SimpleTestCase):
+
+    def test_formats_reduce_to_the_same_number(self):
+        for phone_number in ("+998 90 123-45-67", "901234567", "998901234567", "00998901234567", "(90) 123 45 67"):
+            with self.subTest(phone_number=phone_number):
+                self.assertEqual(normalize_phone(phone_number), "+998901234567")
+
+    def test_numbers_without_digits_are_none(self):
+        for phone_number in ("", "abc", None):
+            with self.subTest(phone_number=phone_number):
+                self.assertIsNone(normalize_phone(phone_number))
+
+
+class LeadDuplicateTests(APITestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.create_board(statuses=1, lead_types=2, leads=0)
+        self.first_type, self.second_type = models.LeadType.objects.order_by("order")
+
+    def create_lead(self, lead_type, title, phone_number):
+        return self.client.post(
+            "/api/lead/", {"type": str(lead_type.uuid), "title": title, "phone_number": phone_number}, format="json"
+        )
+
+    def test_created_lead_lists_the_duplicates_in_its_board(self):
+        first = self.create_lead(self.first_type, "First", "+998 90 123-45-67")
+        second = self.create_lead(self.second_type, "Second", "901234567")
+
+        self.assertEqual(first.json()["duplicates"], [])
+        self.assertEqual(second.json()["duplicates"], [first.json()["uuid"]])
+
+    def test_other_boards_are_not_duplicates(self):
+        self.create_lead(self.first_type, "First", "901234567")
+        self.create_board(statuses=1, lead_types=1, leads=0)
+        other_type = models.LeadType.objects.exclude(pk__in=[self.first_type.pk, self.second_type.pk]).get()
+
+        self.assertEqual(self.create_lead(other_type, "Other", "901234567").json()["duplicates"], [])
+
+    def test_import_can_skip_duplicates(self):
+        self.create_lead(self.first_type, "First", "901234567")
+        rows = [
+            {"type": str(self.first_type.uuid), "title": "Existing", "phone_number": "90 123 45 67"},
+            {"type": str(self.first_type.uuid), "title": "New", "phone_number": "911111111"},
+            {"type": str(self.first_type.uuid), "title": "In file", "phone_number": "+998911111111"},
+        ]
+        content = "\n".join(json.dumps(row) for row in rows).encode()
+
+        response = self.client.post(
+            "/api/lead/import/",
+            {"file": SimpleUploadedFile("leads.ndjson", content), "skip_duplicates": "true"},
+            format="multipart",
+        )
+
+        self.assertEqual(response.json()["created"], 1)
+        self.assertEqual(response.json()["duplicates"], 2)
+        self.assertEqual([error["row"] for error in response.json()["errors"]], [1, 3])
+        self.assertFalse(models.Lead.objects.filter(title__in=["Existing", "In file"]).exists())
+
+    def test_dedupe_command_merges_into_the_oldest_lead(self):
+        self.create_lead(self.first_type, "First", "+998 90 123-45-67")
+        self.create_lead(self.second_type, "Second", "901234567")
+        duplicate = models.Lead.objects.get(title="Second")
+        duplicate.extra = {"key": 1}
+        duplicate.birth_date = "2000-01-01"
+        duplicate.save()
+        models.LeadHistory.objects.create(lead=duplicate, status=duplicate.type.status, lead_type=duplicate.type)
+
+        stdout = StringIO()
+        call_command("dedupe_leads", "--dry-run", stdout=stdout)
+        self.assertIn("Would merge 1 leads in 1 duplicate groups", stdout.getvalue())
+        self.assertTrue(models.Lead.objects.get(title="Second").is_active)
+
+        call_command("dedupe_leads", stdout=StringIO())
+
+        keeper = models.Lead.objects.get(title="First")
+        self.assertTrue(keeper.is_active)
+        self.assertFalse(models.Lead.objects.get(title="Second").is_active)
+        self.assertEqual(keeper.extra, {"key": 1})
+        self.assertEqual(str(keeper.birth_date), "2000-01-01")
+        self.assertTrue(models.LeadHistory.objects.filter(lead=keeper).exists())
+        self.assertFalse(models.LeadHistory.objects.filter(lead=duplicate).exists())
+        self.assertEqual(
+            [lead_type.lead_count for lead_type in models.LeadType.objects.order_by("order")], [1, 0]
+        )
@@ -0,0 +1,75 @@
+from io import StringIO
+from django.core.management import call_command
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from main import models
+from main.tests.base import APITestCase
+
+
+class ConditionalGetTests(APITestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.board = self.create_board(statuses=2, lead_types=2, leads=3)
+        for lead in models.Lead.objects.all()[:4]:
+            models.LeadHistory.objects.create(lead=lead, status=lead.type.status, lead_type=lead.type)
+
+    def revalidate(self, url):
+        etag = self.client.get(url)["ETag"]
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        return response, len(queries)
+
+    def test_cached_reads_revalidate_without_queries(self):
+        for url in (
+            "/api/board/",
+            f"/api/status/?board_uuid={self.board.uuid}",
+            "/api/lead-type/",
+            f"/api/board/{self.board.uuid}/snapshot/",
+        ):
+            with self.subTest(url=url):
+                response, queries = self.revalidate(url)
+                self.assertEqual(response.status_code, 304)
+                self.assertEqual(response.content, b"")
+                self.assertEqual(queries, 0)
+
+    def test_lists_revalidate_with_one_query(self):
+        for url in (
+            "/api/lead/",
+            "/api/lead/?pagination=cursor&page_size=2",
+            "/api/lead-history/",
+            "/api/lead-history/?pagination=cursor",
+        ):
+            with self.subTest(url=url):
+                response, queries = self.revalidate(url)
+                self.assertEqual(response.status_code, 304)
+                self.assertEqual(queries, 1)
+
+    @override_settings(LEAD_CARDS_ENABLED=True)
+    def test_lead_cards_revalidate_with_one_query(self):
+        call_command("rebuild_lead_cards", stdout=StringIO())
+        for url in ("/api/lead/", "/api/lead/?pagination=cursor"):
+            with self.subTest(url=url):
+                response, queries = self.revalidate(url)
+                self.assertEqual(response.status_code, 304)
+                self.assertEqual(queries, 1)
+        self.assertEqual(len(self.client.get("/api/lead/").json()["leads"]), 12)
+
+    def test_changes_give_a_new_etag(self):
+        etag = self.client.get("/api/lead/")["ETag"]
+        lead_type = models.LeadType.objects.get(name="Type 0.0")
+        lead_type.name = "Renamed"
+        lead_type.save()
+        self.assertEqual(self.client.get("/api/lead/", HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+        url = f"/api/status/?board_uuid={self.board.uuid}"
+        etag = self.client.get(url)["ETag"]
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post("/api/lead/", {"type": str(lead_type.uuid), "title": "New"}, format="json")
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_other_etags_do_not_match(self):
+        response = self.client.get("/api/lead/", HTTP_IF_NONE_MATCH='W/"other"')
+
+        self.assertEqual(response.status_code, 200)
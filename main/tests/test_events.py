@@ -0,0 +1,83 @@
+import asyncio
+from unittest import mock
+from django.test import AsyncClient, override_settings
+from rest_framework_simplejwt.tokens import AccessToken
+from main import events, models
+from main.tests.base import APITestCase
+
+
+class InProcessBrokerTests(APITestCase):
+
+    async def test_subscribers_get_the_events_of_their_board(self):
+        broker = events.InProcessBroker()
+        with broker.subscribe("board") as subscription, broker.subscribe("other") as other:
+            broker.publish("board", {"event": "changed", "board": "board"})
+
+            self.assertEqual(await subscription.get(1), {"event": "changed", "board": "board"})
+            self.assertIsNone(await other.get(0.01))
+        self.assertEqual(dict(broker._subscribers), {})
+
+    async def test_slow_subscribers_keep_only_the_first_events(self):
+        broker = events.InProcessBroker({"MAX_PENDING": 1})
+        with broker.subscribe("board") as subscription:
+            broker.publish("board", {"event": "changed", "index": 1})
+            broker.publish("board", {"event": "changed", "index": 2})
+            await asyncio.sleep(0)
+
+            self.assertEqual((await subscription.get(1))["index"], 1)
+            self.assertIsNone(await subscription.get(0.01))
+
+    def test_committed_writes_publish_the_board(self):
+        board = self.create_board(statuses=1, lead_types=1, leads=1)
+        lead = models.Lead.objects.get()
+
+        with mock.patch.object(events, "publish_board_changes") as publish:
+            with self.captureOnCommitCallbacks(execute=True):
+                lead.title = "Renamed"
+                lead.save()
+
+        self.assertEqual([str(board_uuid) for board_uuid, _ in publish.call_args.args[0]], [str(board.uuid)])
+
+
+@override_settings(BOARD_EVENTS={"BACKEND": "main.events.InProcessBroker", "OPTIONS": {}, "KEEPALIVE": 0.05})
+class BoardEventsTests(APITestCase):
+
+    def setUp(self):
+        super().setUp()
+        events.get_broker.cache_clear()
+        self.addCleanup(events.get_broker.cache_clear)
+        self.board = self.create_board(statuses=1, lead_types=1, leads=1)
+        self.url = f"/api/board/{self.board.uuid}/events/"
+        self.token = str(AccessToken.for_user(self.user))
+
+    async def test_streams_need_a_token(self):
+        self.assertEqual((await AsyncClient().get(self.url)).status_code, 401)
+        self.assertEqual((await AsyncClient().get(self.url, {"token": "invalid"})).status_code, 401)
+
+    async def test_boards_of_other_companies_are_not_found(self):
+        board = await models.Board.objects.acreate(name="Other", company_uuid="other")
+
+        response = await AsyncClient().get(f"/api/board/{board.uuid}/events/", {"token": self.token})
+
+        self.assertEqual(response.status_code, 404)
+
+    async def test_stream_sends_changes_and_keep_alives(self):
+        response = await AsyncClient().get(self.url, headers={"Authorization": f"Bearer {self.token}"})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Content-Type"], "text/event-stream")
+        chunks = response.streaming_content.__aiter__()
+
+        self.assertEqual(await chunks.__anext__(), b"retry: 5000\n\n")
+        self.assertEqual(await chunks.__anext__(), b": keep-alive\n\n")
+        events.publish_board_changes([(self.board.uuid, self.user.id)])
+        chunk = await asyncio.wait_for(chunks.__anext__(), 1)
+
+        self.assertTrue(chunk.startswith(b"event: changed\ndata: "))
+        self.assertIn(str(self.board.uuid).encode(), chunk)
+
+        # A client that goes away cancels the stream while it waits
+        pending = asyncio.ensure_future(chunks.__anext__())
+        await asyncio.sleep(0.01)
+        pending.cancel()
+        await asyncio.sleep(0.01)
+        self.assertNotIn(str(self.board.uuid), events.get_broker()._subscribers)
@@ -0,0 +1,132 @@
+import json
+import tempfile
+from io import StringIO
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import CommandError, call_command
+from main import models
+from main.tests.base import APITestCase
+
+
+class LeadImportTests(APITestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.board = self.create_board(statuses=1, lead_types=1, leads=0)
+        self.lead_type = models.LeadType.objects.get()
+
+    def post_file(self, name, content, **data):
+        return self.client.post(
+            "/api/lead/import/", {"file": SimpleUploadedFile(name, content), **data}, format="multipart"
+        )
+
+    def test_ndjson_rows_are_imported_in_batches_with_row_errors(self):
+        rows = [{"type": str(self.lead_type.uuid), "title": f"Lead {index}", "extra": {"index": index}} for index in range(5)]
+        rows.append({"type": str(self.lead_type.uuid)})
+        content = ("\n".join(json.dumps(row) for row in rows) + "\nnot json\n").encode()
+
+        response = self.post_file("leads.ndjson", content, batch_size=2)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["created"], 5)
+        self.assertEqual([error["row"] for error in response.json()["errors"]], [6, 7])
+        self.assertEqual(models.Lead.objects.get(title="Lead 3").extra, {"index": 3})
+        self.lead_type.refresh_from_db()
+        self.assertEqual(self.lead_type.lead_count, 5)
+
+    def test_csv_rows_are_imported(self):
+        content = (
+            "type,title,phone_number,birth_date,extra\n"
+            f"{self.lead_type.uuid},First,123,,\n"
+            f'{self.lead_type.uuid},Second,,2020-01-01,"{{""key"": 1}}"\n'
+        ).encode()
+
+        response = self.post_file("leads.csv", content)
+
+        self.assertEqual(response.json()["created"], 2)
+        self.assertEqual(models.Lead.objects.get(title="Second").extra, {"key": 1})
+
+    def test_lead_types_of_other_companies_are_rejected(self):
+        self.create_board(statuses=1, lead_types=1, leads=0, company_uuid="other")
+        other_type = models.LeadType.objects.exclude(pk=self.lead_type.pk).get()
+        content = json.dumps({"type": str(other_type.uuid), "title": "Lead"}).encode()
+
+        response = self.post_file("leads.ndjson", content)
+
+        self.assertEqual(response.json()["created"], 0)
+        self.assertEqual(response.json()["errors"][0]["errors"], {"type": ["Lead type not found."]})
+
+    def test_non_utf8_file_is_a_bad_request(self):
+        content = f"type,title\n{self.lead_type.uuid},Caf\xe9\n".encode("latin-1")
+
+        response = self.post_file("leads.csv", content)
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()["message"], "File is not UTF-8 encoded")
+        self.assertFalse(models.Lead.objects.exists())
+
+    def test_malformed_csv_is_a_bad_request(self):
+        # Longer than csv.field_size_limit()
+        content = f"type,title\n{self.lead_type.uuid},{'x' * 200000}\n".encode()
+
+        response = self.post_file("leads.csv", content)
+
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("Malformed CSV", response.json()["message"])
+
+    def test_command_imports_a_file(self):
+        with tempfile.NamedTemporaryFile(suffix=".csv") as upload:
+            upload.write(f"type,title\n{self.lead_type.uuid},From command\n".encode())
+            upload.flush()
+            call_command("import_leads", upload.name, company=str(self.user.id), stdout=StringIO())
+
+        self.assertTrue(models.Lead.objects.filter(title="From command").exists())
+
+    def test_command_reports_undecodable_files(self):
+        with tempfile.NamedTemporaryFile(suffix=".ndjson") as upload:
+            upload.write(b'{"title": "\xff"}\n')
+            upload.flush()
+            with self.assertRaisesMessage(CommandError, "File is not UTF-8 encoded"):
+                call_command("import_leads", upload.name, company=str(self.user.id))
+
+
+class LeadExportTests(APITestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.board = self.create_board(statuses=2, lead_types=1, leads=3)
+
+    def read(self, response):
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        return b"".join(response.streaming_content).decode()
+
+    def test_csv_has_a_header_and_one_line_per_active_lead(self):
+        models.deactivate(models.Lead.objects.filter(title="Lead 0.0.0"))
+
+        lines = self.read(self.client.get("/api/lead/export/")).splitlines()
+
+        self.assertTrue(lines[0].startswith("uuid,title,phone_number"))
+        self.assertEqual(len(lines), 6)
+
+    def test_ndjson_is_filtered_by_status_and_dates(self):
+        status = models.Status.objects.get(name="Status 1")
+
+        body = self.read(self.client.get(
+            "/api/lead/export/",
+            {"file_format": "ndjson", "status": str(status.uuid), "created_from": "2000-01-01", "created_to": "2100-01-01T00:00:00"},
+        ))
+
+        rows = [json.loads(line) for line in body.splitlines()]
+        self.assertEqual({row["title"] for row in rows}, {"Lead 1.0.0", "Lead 1.0.1", "Lead 1.0.2"})
+        self.assertEqual({row["status"] for row in rows}, {str(status.uuid)})
+
+    def test_leads_of_other_companies_are_not_exported(self):
+        self.create_board(statuses=1, lead_types=1, leads=2, company_uuid="other")
+
+        body = self.read(self.client.get("/api/lead/export/", {"file_format": "ndjson"}))
+
+        self.assertEqual(len(body.splitlines()), 6)
+
+    def test_invalid_dates_are_rejected(self):
+        self.assertEqual(self.client.get("/api/lead/export/", {"created_to": "garbage"}).status_code, 400)
+        self.assertEqual(self.client.get("/api/lead/export/", {"file_format": "xml"}).status_code, 400)
@@ -0,0 +1,41 @@
+from io import StringIO
+from unittest import skipUnless
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from main import models
+
+
+class MigrationTests(TestCase):
+
+    def test_models_and_migrations_are_in_sync(self):
+        call_command("makemigrations", "main", check=True, dry_run=True, stdout=StringIO())
+
+
+@skipUnless(connection.vendor == "sqlite", "Query plans are checked on SQLite")
+class QueryPlanTests(TestCase):
+
+    def plan(self, queryset):
+        sql, params = queryset.query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute("EXPLAIN QUERY PLAN " + sql, params)
+            return " ".join(row[-1] for row in cursor.fetchall())
+
+    def test_tenant_boards_use_the_company_index(self):
+        plan = self.plan(models.Board.objects.filter(company_uuid="1", is_active=True))
+
+        self.assertIn("board_company_active_idx", plan)
+
+    def test_column_of_active_leads_uses_the_partial_index(self):
+        plan = self.plan(
+            models.Lead.objects.filter(type_id=1, is_active=True).order_by("order", "-created_at", "-id")
+        )
+
+        self.assertIn("lead_active_type_order_idx", plan)
+        self.assertNotIn("TEMP B-TREE", plan)
+
+    def test_history_listing_uses_the_partial_index(self):
+        plan = self.plan(models.LeadHistory.objects.filter(is_active=True).order_by("-created_at", "-id")[:10])
+
+        self.assertIn("leadhistory_active_created_idx", plan)
+        self.assertNotIn("TEMP B-TREE", plan)
@@ -0,0 +1,54 @@
+from io import StringIO
+from django.core.management import call_command
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from main import models
+from main.tests.base import APITestCase
+
+
+@override_settings(LEAD_CARDS_ENABLED=True)
+class LeadCardTests(APITestCase):
+
+    def test_cards_follow_lead_and_parent_writes(self):
+        self.create_board(statuses=1, lead_types=1, leads=2)
+        lead_type = models.LeadType.objects.get()
+        status = lead_type.status
+
+        lead_type.name = "Renamed type"
+        lead_type.save()
+        status.name = "Renamed status"
+        status.save()
+
+        cards = models.LeadCard.objects.filter(is_active=True)
+        self.assertEqual(cards.count(), 2)
+        self.assertEqual(set(cards.values_list("type_name", "status_name", "company_uuid")), {
+            ("Renamed type", "Renamed status", str(self.user.id)),
+        })
+
+    def test_deactivated_leads_leave_the_listing(self):
+        self.create_board(statuses=1, lead_types=1, leads=2)
+        models.deactivate(models.Lead.objects.filter(title="Lead 0.0.0"))
+
+        response = self.client.get("/api/lead/")
+
+        self.assertEqual([lead["title"] for lead in response.json()["leads"]], ["Lead 0.0.1"])
+
+    def test_listing_reads_a_single_table(self):
+        self.create_board(statuses=2, lead_types=2, leads=2)
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get("/api/lead/")
+
+        self.assertEqual(len(response.json()["leads"]), 8)
+        rows = [query["sql"] for query in queries.captured_queries if '"main_leadcard"."title"' in query["sql"]]
+        self.assertEqual(len(rows), 1)
+        self.assertNotIn("JOIN", rows[0])
+
+    def test_rebuild_command_restores_missing_cards(self):
+        self.create_board(statuses=1, lead_types=1, leads=3)
+        models.LeadCard.objects.all().delete()
+
+        call_command("rebuild_lead_cards", stdout=StringIO())
+
+        self.assertEqual(models.LeadCard.objects.count(), 3)
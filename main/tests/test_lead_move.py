@@ -0,0 +1,62 @@
+from main import models
+from main.tests.base import APITestCase
+
+
+class LeadMoveTests(APITestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.board = self.create_board(statuses=2, lead_types=2, leads=5)
+        self.source = models.LeadType.objects.get(name="Type 0.0")
+        self.target = models.LeadType.objects.get(name="Type 1.0")
+        self.lead = models.Lead.objects.get(title="Lead 0.0.0")
+
+    def move(self, lead, lead_type, **data):
+        return self.client.patch(
+            "/api/lead/move/", {"uuid": str(lead.uuid), "type": str(lead_type.uuid), **data}, format="json"
+        )
+
+    def column(self, lead_type):
+        return list(
+            models.Lead.objects.filter(type=lead_type, is_active=True)
+            .order_by("order", "-created_at", "-id")
+            .values_list("pk", flat=True)
+        )
+
+    def test_move_to_another_column_keeps_counts_and_history(self):
+        response = self.move(self.lead, self.target, position=2)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.column(self.target)[2], self.lead.pk)
+        self.assertEqual(models.LeadHistory.objects.filter(lead=self.lead, lead_type=self.target).count(), 1)
+        for lead_type in models.LeadType.objects.all():
+            self.assertEqual(lead_type.lead_count, lead_type.lead_set.filter(is_active=True).count())
+        for status in models.Status.objects.all():
+            self.assertEqual(status.lead_count, models.Lead.objects.filter(type__status=status, is_active=True).count())
+
+    def test_moves_within_a_column_write_no_history(self):
+        self.move(self.lead, self.target, position=2)
+
+        self.move(self.lead, self.target, position=0)
+        self.assertEqual(self.column(self.target)[0], self.lead.pk)
+        self.move(self.lead, self.target, position=99)
+        self.assertEqual(self.column(self.target)[-1], self.lead.pk)
+
+        self.assertEqual(models.LeadHistory.objects.filter(lead=self.lead).count(), 1)
+
+    def test_column_without_gaps_is_renumbered(self):
+        models.Lead.objects.filter(type=self.target).update(order=1)
+
+        self.move(self.lead, self.target, position=2)
+
+        column = self.column(self.target)
+        self.assertEqual(column[2], self.lead.pk)
+        self.assertEqual(models.Lead.objects.filter(pk__in=column).values("order").distinct().count(), len(column))
+
+    def test_unknown_lead_types_and_leads_are_not_found(self):
+        self.assertEqual(self.move(self.lead, self.board).status_code, 404)
+
+        other_board = self.create_board(statuses=1, lead_types=1, leads=1, company_uuid="other")
+        other_lead = models.Lead.objects.get(type__status__board=other_board)
+        self.assertEqual(self.move(other_lead, self.target).status_code, 404)
+        self.assertEqual(self.move(self.lead, other_lead.type).status_code, 404)
@@ -0,0 +1,112 @@
+import tempfile
+from unittest import mock
+from django.test import AsyncClient, Client, SimpleTestCase, override_settings
+from rest_framework_simplejwt.tokens import AccessToken
+from main import metrics
+from main.tests.base import APITestCase
+
+
+class RegistryTests(SimpleTestCase):
+
+    def test_render_writes_cumulative_histograms(self):
+        registry = metrics.Registry()
+        registry.record_request("/api/lead/", "GET", 200, 0.02, 3, 0.004, 300)
+        registry.record_request("/api/lead/", "GET", 200, 0.2, 12, 0.05, 5000)
+
+        lines = metrics.render(registry.collect()).splitlines()
+
+        self.assertIn("# TYPE http_requests_total counter", lines)
+        self.assertIn('http_requests_total{view="/api/lead/",method="GET",status="200"} 2', lines)
+        self.assertIn("# TYPE http_request_db_queries histogram", lines)
+        self.assertIn('http_request_db_queries_bucket{view="/api/lead/",method="GET",le="5"} 1', lines)
+        self.assertIn('http_request_db_queries_bucket{view="/api/lead/",method="GET",le="20"} 2', lines)
+        self.assertIn('http_request_db_queries_bucket{view="/api/lead/",method="GET",le="+Inf"} 2', lines)
+        self.assertIn('http_request_db_queries_sum{view="/api/lead/",method="GET"} 15', lines)
+        self.assertIn('http_response_size_bytes_count{view="/api/lead/",method="GET"} 2', lines)
+
+    def test_label_values_are_escaped(self):
+        registry = metrics.Registry()
+        registry.record_request('/a"b\\c', "GET", 200, 0.01, 0, 0.0, None)
+
+        text = metrics.render(registry.collect())
+
+        self.assertIn('view="/a\\"b\\\\c"', text)
+        self.assertNotIn("http_response_size_bytes_count", text)
+
+    def test_processes_sharing_a_directory_are_summed(self):
+        with tempfile.TemporaryDirectory() as directory:
+            first, second = metrics.Registry(directory), metrics.Registry(directory)
+            first.record_request("/api/lead/", "GET", 200, 0.01, 1, 0.001, 100)
+            first.flush()
+            # Files are named by pid, so the second worker writes its own
+            with mock.patch("os.getpid", return_value=0):
+                second.record_request("/api/lead/", "GET", 200, 0.01, 1, 0.001, 100)
+                second.flush()
+
+            totals = first.collect()
+
+        labels = (("view", "/api/lead/"), ("method", "GET"))
+        self.assertEqual(totals[("http_requests_total", labels + (("status", "200"),))], 2)
+        self.assertEqual(totals[("http_request_duration_seconds", labels)][-1], 2)
+
+
+@override_settings(METRICS={"ENABLED": True, "TOKEN": None, "PUBLIC": True})
+class MetricsMiddlewareTests(APITestCase):
+
+    def setUp(self):
+        super().setUp()
+        patcher = mock.patch.object(metrics, "registry", metrics.Registry())
+        self.registry = patcher.start()
+        self.addCleanup(patcher.stop)
+        self.board = self.create_board(statuses=1, lead_types=1, leads=2)
+
+    def totals(self, name, view, method="GET"):
+        return self.registry.collect().get((name, (("view", view), ("method", method))))
+
+    def test_requests_are_labelled_by_route(self):
+        for _ in range(3):
+            self.client.get("/api/lead/")
+        self.client.get(f"/api/board/{self.board.uuid}/changes/")
+        self.client.get("/api/missing/")
+
+        collected = self.registry.collect()
+        self.assertEqual(collected[("http_requests_total", (("view", "/api/lead/"), ("method", "GET"), ("status", "200")))], 3)
+        self.assertEqual(collected[("http_requests_total", (("view", "unmatched"), ("method", "GET"), ("status", "404")))], 1)
+        self.assertEqual(self.totals("http_request_duration_seconds", "/api/board/<uuid:uuid>/changes/")[-1], 1)
+
+    async def test_queries_of_async_views_are_counted(self):
+        token = AccessToken.for_user(self.user)
+
+        response = await AsyncClient().get("/api/lead/", headers={"Authorization": f"Bearer {token}"})
+
+        self.assertEqual(response.status_code, 200)
+        queries = self.totals("http_request_db_queries", "/api/lead/")
+        self.assertEqual(queries[-1], 1)
+        self.assertGreater(queries[-2], 0)
+
+    def test_endpoint_serves_the_text_format(self):
+        self.client.get("/api/lead/")
+
+        response = self.client.get("/api/metrics")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Content-Type"], "text/plain; version=0.0.4; charset=utf-8")
+        self.assertIn('http_requests_total{view="/api/lead/",method="GET",status="200"} 1', response.content.decode())
+
+    def test_endpoint_checks_the_token(self):
+        with self.settings(METRICS={"ENABLED": True, "TOKEN": "secret"}):
+            self.assertEqual(self.client.get("/api/metrics").status_code, 401)
+            self.assertEqual(self.client.get("/api/metrics", HTTP_AUTHORIZATION="Bearer wrong").status_code, 401)
+            self.assertEqual(self.client.get("/api/metrics", HTTP_AUTHORIZATION="Bearer secret").status_code, 200)
+
+    def test_endpoint_is_closed_without_a_token(self):
+        client = Client()
+        with self.settings(METRICS={"ENABLED": True, "TOKEN": None}):
+            self.assertEqual(client.get("/api/metrics").status_code, 401)
+            self.assertEqual(client.get("/api/metrics", HTTP_AUTHORIZATION="Bearer ").status_code, 401)
+
+            token = AccessToken.for_user(self.user)
+            self.assertEqual(client.get("/api/metrics", HTTP_AUTHORIZATION=f"Bearer {token}").status_code, 401)
+            self.user.is_staff = True
+            self.user.save()
+            self.assertEqual(client.get("/api/metrics", HTTP_AUTHORIZATION=f"Bearer {token}").status_code, 200)
@@ -0,0 +1,92 @@
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from main import models
+from main.tests.base import APITestCase
+
+
+class ChangeOrderTests(APITestCase):
+
+    def test_bulk_reorder_writes_every_order(self):
+        board = self.create_board(statuses=4, lead_types=0, leads=0)
+        statuses = list(models.Status.objects.filter(board=board).order_by("order"))
+
+        response = self.client.patch(
+            "/api/change-order/",
+            {"data": [{"uuid": str(status.uuid), "order": 10 - index} for index, status in enumerate(statuses)]},
+            format="json",
+        )
+
+        self.assertEqual(response.json()["updated"], 4)
+        self.assertEqual(
+            [status.name for status in models.Status.objects.filter(board=board).order_by("order")],
+            ["Status 3", "Status 2", "Status 1", "Status 0"],
+        )
+
+    def test_rows_of_other_companies_are_left_alone(self):
+        self.create_board(statuses=1, lead_types=0, leads=0, company_uuid="other")
+        status = models.Status.objects.get()
+
+        response = self.client.patch(
+            "/api/change-order/", {"data": [{"uuid": str(status.uuid), "order": 99}]}, format="json"
+        )
+
+        self.assertEqual(response.json()["updated"], 0)
+        status.refresh_from_db()
+        self.assertEqual(status.order, 1)
+
+
+class MoveAfterTests(APITestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.create_board(statuses=1, lead_types=1, leads=5)
+        self.lead_type = models.LeadType.objects.get()
+
+    def column(self):
+        return [lead.title for lead in models.Lead.objects.filter(type=self.lead_type).order_by("order", "-created_at", "-id")]
+
+    def move(self, lead, after):
+        return self.client.patch(
+            "/api/change-order/move/",
+            {"model": "lead", "uuid": str(lead.uuid), "after": str(after.uuid) if after else None},
+            format="json",
+        )
+
+    def lead(self, index):
+        return models.Lead.objects.get(type=self.lead_type, title=f"Lead 0.0.{index}")
+
+    def test_move_writes_only_the_moved_row_when_there_is_a_gap(self):
+        for index in range(5):
+            models.Lead.objects.filter(title=f"Lead 0.0.{index}").update(order=(index + 1) * 1024)
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.move(self.lead(4), self.lead(0))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["order"], 1536)
+        self.assertEqual(self.column(), ["Lead 0.0.0", "Lead 0.0.4", "Lead 0.0.1", "Lead 0.0.2", "Lead 0.0.3"])
+        updates = [query for query in queries.captured_queries if query["sql"].startswith('UPDATE "main_lead"')]
+        self.assertEqual(len(updates), 1)
+
+    def test_column_is_renumbered_when_there_is_no_gap(self):
+        models.Lead.objects.filter(type=self.lead_type).update(order=0)
+        before = self.column()
+
+        self.move(models.Lead.objects.get(title=before[0]), models.Lead.objects.get(title=before[1]))
+
+        self.assertEqual(self.column(), [before[1], before[0], *before[2:]])
+        orders = list(models.Lead.objects.filter(type=self.lead_type).order_by("order").values_list("order", flat=True))
+        self.assertEqual(orders, [1024, 2048, 3072, 4096, 5120])
+
+    def test_move_to_the_top_and_after_another_lead(self):
+        self.move(self.lead(3), None)
+        self.assertEqual(self.column()[0], "Lead 0.0.3")
+
+        self.move(self.lead(3), self.lead(4))
+        self.assertEqual(self.column()[-1], "Lead 0.0.3")
+
+    def test_rows_of_another_column_are_not_found(self):
+        other = self.create_board(statuses=1, lead_types=1, leads=1)
+        other_lead = models.Lead.objects.filter(type__status__board=other).get()
+
+        self.assertEqual(self.move(self.lead(0), other_lead).status_code, 404)
@@ -0,0 +1,47 @@
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from main import models
+from main.tests.base import APITestCase
+
+
+class KeysetPaginationTests(APITestCase):
+
+    def collect_pages(self, url):
+        uuids, query_counts = [], []
+        while url:
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            query_counts.append(len(queries))
+            uuids += [row["uuid"] for row in response.json()["results"]]
+            url = response.json()["next"]
+        return uuids, query_counts
+
+    def test_lead_pages_follow_the_list_order_without_gaps(self):
+        self.create_board(statuses=2, lead_types=2, leads=6)
+        # Ties on order are broken by created_at and id
+        models.Lead.objects.filter(title__startswith="Lead 1").update(order=3)
+
+        uuids, query_counts = self.collect_pages("/api/lead/?pagination=cursor&page_size=5")
+
+        expected = [lead["uuid"] for lead in self.client.get("/api/lead/").json()["leads"]]
+        self.assertEqual(uuids, expected)
+        self.assertEqual(len(query_counts), 5)
+        self.assertEqual(len(set(query_counts)), 1)
+
+    def test_lead_history_pages(self):
+        self.create_board(statuses=1, lead_types=1, leads=5)
+        for lead in models.Lead.objects.select_related("type"):
+            models.LeadHistory.objects.create(lead=lead, status=lead.type.status, lead_type=lead.type)
+        expected = list(
+            models.LeadHistory.objects.order_by("-created_at", "-id").values_list("uuid", flat=True)
+        )
+
+        uuids, _ = self.collect_pages("/api/lead-history/?pagination=cursor&page_size=2")
+
+        self.assertEqual(uuids, [str(uuid) for uuid in expected])
+
+    def test_invalid_cursor_is_rejected(self):
+        response = self.client.get("/api/lead/?pagination=cursor&cursor=zzz")
+
+        self.assertEqual(response.status_code, 404)
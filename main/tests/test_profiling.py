@@ -0,0 +1,89 @@
+import json
+import tempfile
+from pathlib import Path
+from django.db import connection, connections
+from django.db.backends.signals import connection_created
+from django.test import AsyncClient, override_settings
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+from main import profiling
+from main.tests.base import APITestCase
+
+
+class ProfilingMiddlewareTests(APITestCase):
+
+    def setUp(self):
+        super().setUp()
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = Path(directory.name)
+        settings = override_settings(PROFILING={
+            "ENABLED": True, "DIRECTORY": self.directory, "HEADER": "X-Profile", "QUERY_PARAM": "profile",
+            "INTERVAL": 0.001,
+        })
+        settings.enable()
+        self.addCleanup(settings.disable)
+        self.user.is_staff = True
+        self.user.save()
+        self.board = self.create_board(statuses=1, lead_types=1, leads=2)
+        self.token = str(AccessToken.for_user(self.user))
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {self.token}")
+
+    def assert_from_view(self, origin):
+        self.assertTrue(any(line.startswith("main/api/views.py") for line in origin), origin)
+
+    def report(self, response):
+        self.assertEqual(response.status_code, 200)
+        profile_id = response["X-Profile-Id"]
+        self.assertTrue((self.directory / f"{profile_id}.folded").exists())
+        return json.loads((self.directory / f"{profile_id}.json").read_text())
+
+    def assert_unwrapped(self):
+        for alias in connections:
+            self.assertNotIn(profiling.sql_wrapper, connections[alias].execute_wrappers)
+        self.assertFalse(connection_created.disconnect(dispatch_uid="main.profiling"))
+        self.assertEqual(profiling._running, 0)
+
+    def test_sync_view_queries_come_from_the_view(self):
+        report = self.report(self.client.get("/api/lead-type/", HTTP_X_PROFILE="1"))
+
+        self.assertEqual(report["query_count"], len(report["queries"]))
+        self.assertGreater(report["query_count"], 0)
+        self.assert_from_view(report["queries"][0]["origin"])
+        self.assert_unwrapped()
+
+    def test_async_view_queries_come_from_the_view(self):
+        report = self.report(self.client.get("/api/lead/", {"profile": "1"}))
+
+        for query in report["queries"]:
+            self.assert_from_view(query["origin"])
+        self.assert_unwrapped()
+
+    async def test_async_request_queries_come_from_the_view(self):
+        response = await AsyncClient().get(
+            "/api/status/", {"board_uuid": str(self.board.uuid), "profile": "1"},
+            headers={"Authorization": f"Bearer {self.token}"},
+        )
+
+        report = self.report(response)
+        self.assertGreater(report["query_count"], 0)
+        for query in report["queries"]:
+            self.assert_from_view(query["origin"])
+        self.assert_unwrapped()
+
+    def test_unflagged_and_non_staff_requests_are_not_profiled(self):
+        self.assertNotIn("X-Profile-Id", self.client.get("/api/lead-type/"))
+
+        self.user.is_staff = False
+        self.user.save()
+        self.assertNotIn("X-Profile-Id", self.client.get("/api/lead-type/", HTTP_X_PROFILE="1"))
+        self.assertEqual(list(self.directory.iterdir()), [])
+
+    def test_wrapper_left_on_a_connection_removes_itself(self):
+        connection.execute_wrappers.append(profiling.sql_wrapper)
+
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT 1")
+
+        self.assertNotIn(profiling.sql_wrapper, connection.execute_wrappers)
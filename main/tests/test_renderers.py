@@ -0,0 +1,77 @@
+from datetime import date, datetime, time, timezone as dt_timezone
+from decimal import Decimal
+from importlib.util import find_spec
+from io import BytesIO
+from unittest import skipUnless
+from uuid import uuid4
+from django.test import SimpleTestCase
+from django.utils.translation import gettext_lazy
+from rest_framework.exceptions import ParseError
+from rest_framework.renderers import JSONRenderer
+from main.api.parsers import MessagePackParser, ORJSONParser
+from main.api.renderers import MessagePackRenderer, ORJSONRenderer
+from main.tests.base import APITestCase
+
+SAMPLE = {
+    "uuid": uuid4(),
+    "utc": datetime(2024, 5, 1, 12, 30, 15, 123456, tzinfo=dt_timezone.utc),
+    "naive": datetime(2024, 5, 1, 12, 30, 15),
+    "date": date(2024, 5, 1),
+    "time": time(9, 15, 0, 500000),
+    "decimal": Decimal("10.50"),
+    "lazy": gettext_lazy("Lead"),
+    "text": "Tashkent\u2028Samarqand\u2029ü",
+    "nested": [{1: None, "flag": True, "number": 1.5}],
+}
+
+
+class ORJSONRendererTests(SimpleTestCase):
+
+    def test_output_matches_the_drf_renderer(self):
+        self.assertEqual(ORJSONRenderer().render(SAMPLE), JSONRenderer().render(SAMPLE))
+
+    def test_indent_is_two_spaces(self):
+        rendered = ORJSONRenderer().render({"key": [1]}, "application/json; indent=4")
+
+        self.assertEqual(rendered, b'{\n  "key": [\n    1\n  ]\n}')
+
+    def test_none_renders_an_empty_body(self):
+        self.assertEqual(ORJSONRenderer().render(None), b"")
+
+
+class ORJSONParserTests(SimpleTestCase):
+
+    def test_parses_json(self):
+        self.assertEqual(ORJSONParser().parse(BytesIO('{"title": "ü", "n": [1]}'.encode())), {"title": "ü", "n": [1]})
+
+    def test_invalid_json_is_a_parse_error(self):
+        with self.assertRaisesMessage(ParseError, "JSON parse error"):
+            ORJSONParser().parse(BytesIO(b"{"))
+
+
+@skipUnless(find_spec("msgpack"), "msgpack is not installed")
+class MessagePackTests(SimpleTestCase):
+
+    def test_round_trip_matches_json(self):
+        import orjson
+
+        packed = MessagePackRenderer().render(SAMPLE)
+
+        self.assertEqual(MessagePackParser().parse(BytesIO(packed)), orjson.loads(JSONRenderer().render(SAMPLE)))
+
+
+class RenderedResponseTests(APITestCase):
+
+    def test_responses_match_the_drf_renderer(self):
+        self.create_board(statuses=1, lead_types=1, leads=2)
+
+        response = self.client.get("/api/lead/")
+
+        self.assertEqual(response["Content-Type"], "application/json")
+        self.assertEqual(response.content, JSONRenderer().render(response.data))
+
+    def test_invalid_request_body_is_a_400(self):
+        response = self.client.post("/api/board/", b"{", content_type="application/json")
+
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("JSON parse error", response.json()["detail"])
@@ -0,0 +1,60 @@
+from io import StringIO
+from unittest import skipUnless
+from django.core.management import call_command
+from django.db import connection
+from main import models, search
+from main.tests.base import APITestCase
+
+
+@skipUnless(search.search_available(), "The FTS5 index is SQLite only")
+class LeadSearchTests(APITestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.board = self.create_board(statuses=1, lead_types=1, leads=3)
+        self.lead = models.Lead.objects.get(title="Lead 0.0.0")
+        self.lead.title = "Shukurillo Karimov"
+        self.lead.extra = {"city": "Tashkent", "address": {"region": "Samarqand"}}
+        self.lead.phone_number = "+998 (90) 777-45-67"
+        self.lead.save()
+
+    def search(self, query, **params):
+        return self.client.get("/api/lead/search/", {"q": query, **params})
+
+    def titles(self, query):
+        return [lead["title"] for lead in self.search(query).json()["results"]]
+
+    def test_matches_fragments_of_title_extra_and_phone(self):
+        for query in ("kurill", "tashk", "samarq", "7774567", "777-45-67"):
+            with self.subTest(query=query):
+                self.assertEqual(self.titles(query), ["Shukurillo Karimov"])
+
+    def test_short_terms_are_rejected(self):
+        self.assertEqual(self.search("zz").status_code, 400)
+
+    def test_results_are_paged(self):
+        response = self.search("Lead", page_size=1)
+
+        self.assertEqual(len(response.json()["results"]), 1)
+        self.assertIsNotNone(response.json()["next"])
+
+    def test_deactivated_leads_leave_the_index(self):
+        self.client.delete(f"/api/lead/?uuid={self.lead.uuid}")
+        self.assertEqual(self.titles("kurill"), [])
+
+        self.client.delete(f"/api/board/?uuid={self.board.uuid}")
+        self.assertEqual(self.titles("Lead"), [])
+
+    def test_other_companies_do_not_see_the_leads(self):
+        self.create_board(statuses=1, lead_types=1, leads=1, company_uuid="other")
+
+        self.assertEqual(len(self.titles("Lead")), 2)
+
+    def test_rebuild_command_restores_the_index(self):
+        with connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {search.SEARCH_TABLE}")
+        self.assertEqual(self.titles("kurill"), [])
+
+        call_command("rebuild_lead_search", stdout=StringIO())
+
+        self.assertEqual(self.titles("kurill"), ["Shukurillo Karimov"])
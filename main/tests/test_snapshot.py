@@ -0,0 +1,38 @@
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from main import models
+from main.tests.base import APITestCase
+
+
+class BoardSnapshotTests(APITestCase):
+
+    def get_snapshot(self, board):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(f"/api/board/{board.uuid}/snapshot/")
+        self.assertEqual(response.status_code, 200)
+        return response.json()["board"], len(queries)
+
+    def test_nests_active_statuses_lead_types_and_leads(self):
+        board = self.create_board(statuses=2, lead_types=2, leads=3)
+        models.deactivate(models.Lead.objects.filter(title="Lead 0.0.0"))
+
+        snapshot, _ = self.get_snapshot(board)
+
+        self.assertEqual(snapshot["uuid"], str(board.uuid))
+        self.assertEqual([status["name"] for status in snapshot["statuses"]], ["Status 0", "Status 1"])
+        lead_type = snapshot["statuses"][0]["leadtypes"][0]
+        self.assertEqual(lead_type["name"], "Type 0.0")
+        self.assertEqual([lead["title"] for lead in lead_type["leads"]], ["Lead 0.0.1", "Lead 0.0.2"])
+
+    def test_query_count_does_not_grow_with_the_board(self):
+        _, small = self.get_snapshot(self.create_board(statuses=1, lead_types=1, leads=1))
+        _, large = self.get_snapshot(self.create_board(statuses=4, lead_types=4, leads=4))
+
+        self.assertEqual(small, large)
+
+    def test_other_company_board_is_not_found(self):
+        board = self.create_board(company_uuid="other")
+
+        response = self.client.get(f"/api/board/{board.uuid}/snapshot/")
+
+        self.assertEqual(response.status_code, 404)